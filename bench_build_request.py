@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""
+Microbenchmark for the per-request cost of building API request bodies.
+
+Compares the compiled request templates used by call_api against building the
+same body with an ElementTree and ElementTree.tostring on every call.
+"""
+
+import sys
+import os
+import timeit
+sys.path.insert(0, os.path.dirname(__file__))
+
+from xml.etree.ElementTree import Element, SubElement, tostring
+
+from omnilogic import build_request_payload
+
+REQUESTS = {
+    "GetTelemetryData": {"Token": "dummy_token", "MspSystemID": 49840},
+    "GetAlarmList": {"Token": "dummy_token", "MspSystemID": 49840, "Version": "0"},
+    "SetUIEquipmentCmd": {
+        "Token": "dummy_token",
+        "MspSystemID": 49840,
+        "Version": "0",
+        "PoolID": 1,
+        "EquipmentID": 10,
+        "IsOn": 100,
+        "IsCountDownTimer": False,
+        "StartTimeHours": 0,
+        "StartTimeMinutes": 0,
+        "EndTimeHours": 0,
+        "EndTimeMinutes": 0,
+        "DaysActive": 0,
+        "Recurring": False,
+    },
+    "SetCHLORParams": {
+        "Token": "dummy_token",
+        "MspSystemID": 49840,
+        "PoolID": 1,
+        "ChlorID": 10,
+        "CfgState": 3,
+        "OpMode": 1,
+        "BOWType": 0,
+        "CellType": 4,
+        "TimedPercent": 50,
+        "SCTimeout": 4,
+        "ORPTimout": 4,
+    },
+}
+
+
+def elementtree_request(requestName, params):
+    """Build the body the way buildRequest did before templates were compiled."""
+    req = Element("Request")
+    reqName = SubElement(req, "Name")
+    reqName.text = requestName
+    paramTag = SubElement(req, "Parameters")
+
+    for k, v in params.items():
+        if type(v) == int:
+            datatype = "int"
+        elif type(v) == str:
+            datatype = "string"
+        elif type(v) == bool:
+            datatype = "bool"
+        if str(k) != "Token":
+            param = SubElement(paramTag, "Parameter", name=k, dataType=datatype)
+            param.text = str(v)
+
+    return tostring(req).decode().encode()
+
+
+def bench(func, requestName, params, number):
+    best = min(timeit.repeat(lambda: func(requestName, params), number=number, repeat=5))
+    return best / number * 1e6
+
+
+def run(number=20000):
+    print(f"{'request':<20} {'elementtree us':>15} {'template us':>12} {'speedup':>8}")
+    for requestName, params in REQUESTS.items():
+        template_us = bench(build_request_payload, requestName, params, number)
+        if requestName == "SetCHLORParams":
+            # No ElementTree equivalent - this body was always hand built
+            print(f"{requestName:<20} {'-':>15} {template_us:>12.2f} {'-':>8}")
+            continue
+        elementtree_us = bench(elementtree_request, requestName, params, number)
+        print(f"{requestName:<20} {elementtree_us:>15.2f} {template_us:>12.2f} {elementtree_us / template_us:>7.1f}x")
+
+
+if __name__ == "__main__":
+    run()
@@ -0,0 +1,128 @@
+"""
+Stand-in for the Hayward API used by the tests.
+
+FakeSession replaces aiohttp.ClientSession: it decodes each request body,
+looks up a canned response for the API method and can delay responses to
+exercise timeouts.
+"""
+
+import asyncio
+from xml.etree import ElementTree
+
+
+class FakeResponse:
+    def __init__(self, text, delay=0):
+        self._text = text
+        self._delay = delay
+
+    async def text(self):
+        if self._delay:
+            await asyncio.sleep(self._delay)
+        return self._text
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *args):
+        return False
+
+
+class FakeSession:
+    """Replays canned bodies per API method.
+
+    bodies and delays map a method name to a value, or to a callable taking the
+    request parameters (a dict of name to text) and returning the value.
+    """
+
+    def __init__(self, bodies, delays=None):
+        self.bodies = bodies
+        self.delays = delays or {}
+        self.calls = []
+
+    def post(self, url, data=None, headers=None, **kwargs):
+        request = ElementTree.fromstring(data)
+        name = request.find("Name").text
+        params = {param.get("name"): param.text for param in request.iter("Parameter")}
+        self.calls.append((name, params))
+
+        body = self.bodies[name]
+        delay = self.delays.get(name, 0)
+        if callable(body):
+            body = body(params)
+        if callable(delay):
+            delay = delay(params)
+
+        return FakeResponse(body, delay)
+
+    async def close(self):
+        pass
+
+
+def status_body(status, message=""):
+    return (
+        "<Response><Name>Status</Name><Parameters>"
+        f'<Parameter name="Status" dataType="int">{status}</Parameter>'
+        f'<Parameter name="StatusMessage" dataType="String">{message}</Parameter>'
+        "</Parameters></Response>"
+    )
+
+
+def site_list_body(sites):
+    items = "".join(
+        "<Item>"
+        f'<Property name="MspSystemID" dataType="int">{site_id}</Property>'
+        f'<Property name="BackyardName" dataType="String">{name}</Property>'
+        "</Item>"
+        for site_id, name in sites
+    )
+    return (
+        "<Response><Name>GetSiteList</Name><Parameters>"
+        '<Parameter name="Status" dataType="int">0</Parameter>'
+        f'<Parameter name="List" dataType="List">{items}</Parameter>'
+        "</Parameters></Response>"
+    )
+
+
+def msp_config_body():
+    """A minimal one-pool config with a single relay."""
+    return (
+        "<Response><MSPConfig>"
+        "<System><Msp-Vsp-Speed-Format>Percent</Msp-Vsp-Speed-Format>"
+        "<Msp-Time-Format>12 Hour Format</Msp-Time-Format><Units>Standard</Units>"
+        "<Msp-Chlor-Display>Salt</Msp-Chlor-Display><Msp-Language>English</Msp-Language></System>"
+        "<Backyard><System-Id>0</System-Id><Name>Backyard</Name>"
+        "<Sensor><System-Id>11</System-Id><Name>AirSensor</Name><Units>UNITS_FAHRENHEIT</Units></Sensor>"
+        "<Body-of-water><System-Id>1</System-Id><Name>Pool</Name><Type>BOW_POOL</Type>"
+        "<Supports-Spillover>no</Supports-Spillover>"
+        "<Relay><System-Id>2</System-Id><Name>Waterfall</Name><Type>RLY_HIGH_VOLTAGE_RELAY</Type>"
+        "<Function>RLY_WATER_FEATURE</Function></Relay>"
+        "</Body-of-water></Backyard>"
+        "</MSPConfig></Response>"
+    )
+
+
+def telemetry_body(water_temp=80, relay_state=0):
+    return (
+        '<STATUS version="1.11">'
+        '<Backyard systemId="0" statusVersion="11" airTemp="72" state="1" />'
+        f'<BodyOfWater systemId="1" waterTemp="{water_temp}" flow="1" />'
+        f'<Relay systemId="2" relayState="{relay_state}" />'
+        "</STATUS>"
+    )
+
+
+def alarm_list_body(alarms=()):
+    items = "".join(
+        "<Item>"
+        f'<Property name="BowID" dataType="int">{bow_id}</Property>'
+        f'<Property name="EquipmentID" dataType="int">{equipment_id}</Property>'
+        f'<Property name="Message" dataType="String">{message}</Property>'
+        "</Item>"
+        for bow_id, equipment_id, message in alarms
+    )
+    return (
+        "<Response><Name>GetAlarmList</Name><Parameters>"
+        '<Parameter name="Status" dataType="int">0</Parameter>'
+        f'<Parameter name="List" dataType="List">{items}</Parameter>'
+        "</Parameters></Response>"
+    )
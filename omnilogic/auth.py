@@ -0,0 +1,167 @@
+"""
+Login and token refresh against the Hayward auth service.
+"""
+
+import logging
+import time
+from datetime import datetime, timedelta
+
+import aiohttp
+
+from .instrumentation import _traced
+from .models import LoginException
+
+HAYWARD_AUTH_URL = "https://services-gamma.haywardcloud.net/auth-service/v2/login"
+HAYWARD_REFRESH_URL = "https://services-gamma.haywardcloud.net/auth-service/v2/refresh"
+HAYWARD_APP_ID = "tzwqg83jvkyurxblidnepmachs"
+
+_LOGGER = logging.getLogger("omnilogic")
+
+
+class AuthMixin:
+    """ Token handling for OmniLogic """
+
+    async def _get_token(self):
+        """ Get a new authentication token using the new auth endpoint """
+        headers = {
+            "Content-Type": "application/json",
+            "X-HAYWARD-APP-ID": HAYWARD_APP_ID
+        }
+        
+        payload = {
+            "email": self.username,
+            "password": self.password
+        }
+        
+        started = time.monotonic()
+        _LOGGER.debug("Authenticating with URL: %s", self.auth_url)
+        _LOGGER.debug("Using headers: %s", headers)
+        _LOGGER.debug("Using payload structure: %s", list(payload.keys()))
+        
+        try:
+            async with self.session.post(
+                self.auth_url, json=payload, headers=headers
+            ) as resp:
+                if resp.status != 200:
+                    error_text = await resp.text()
+                    _LOGGER.error(f"Authentication failed with status {resp.status}")
+                    _LOGGER.error(f"Error details: {error_text}")
+                    _LOGGER.error(f"Response headers: {resp.headers}")
+                    _LOGGER.error(f"Request URL: {self.auth_url}")
+                    _LOGGER.error(f"Request payload keys: {list(payload.keys())}")
+                    _LOGGER.error(f"Using username/email: {self.username[:3]}...{self.username[-3:] if len(self.username) > 6 else ''}")
+                    self._observe_auth("login", started, False)
+                    raise LoginException(f"Failed login: {resp.status}. Details: {error_text}")
+                
+                response = await resp.json()
+                _LOGGER.debug("Authentication successful. Response keys: %s", list(response.keys()))
+                
+                # Set token expiry to 24 hours from now (refresh daily)
+                self.token_expiry = datetime.now() + timedelta(hours=24)
+                
+                # Debug the actual response structure
+                _LOGGER.debug("Token value in response: %s, userID: %s", response.get('token'), response.get('userID'))
+                self._observe_auth("login", started, True)
+                
+                return {
+                    "token": response.get("token"),  # API returns 'token', not 'access_token'
+                    "refresh_token": response.get("refreshToken"),  # API returns 'refreshToken'
+                    "userid": response.get("userID")  # API returns 'userID'
+                }
+                
+        except aiohttp.ClientConnectorError as e:
+            self._observe_auth("login", started, False)
+            raise LoginException(f"Connection error: {e}")
+
+    def _observe_auth(self, kind, started, ok):
+        if self.metrics is not None:
+            self.metrics.observe_auth(kind, time.monotonic() - started, ok)
+
+    async def _get_new_token(self):
+        return await self._get_token()
+
+        
+    async def _refresh_token(self):
+        """ Refresh the authentication token """
+        if not self.refresh_token:
+            # If no refresh token is available, get a new token instead
+            return await self._get_token()
+            
+        headers = {
+            "Content-Type": "application/json",
+            "X-HAYWARD-APP-ID": HAYWARD_APP_ID
+        }
+        
+        payload = {
+            "refresh_token": self.refresh_token
+        }
+        started = time.monotonic()
+        
+        try:
+            async with self.session.post(
+                self.refresh_url, json=payload, headers=headers
+            ) as resp:
+                if resp.status != 200:
+                    _LOGGER.warning("Token refresh failed, getting new token")
+                    self._observe_auth("refresh", started, False)
+                    # If refresh fails, fall back to getting a new token
+                    return await self._get_token()
+                
+                response = await resp.json()
+                
+                # Set token expiry to 24 hours from now
+                self.token_expiry = datetime.now() + timedelta(hours=24)
+                self._observe_auth("refresh", started, True)
+                
+                return {
+                    "token": response.get("access_token"),
+                    "refresh_token": response.get("refresh_token"),
+                    "userid": self.userid  # Keep the existing user ID
+                }
+                
+        except aiohttp.ClientConnectorError as e:
+            _LOGGER.error(f"Token refresh connection error: {e}")
+            self._observe_auth("refresh", started, False)
+            # If refresh fails with connection error, fall back to getting a new token
+            return await self._get_token()
+
+    @_traced("authenticate")
+    async def authenticate(self):
+        """ Authenticate or refresh token if needed """
+        # Check if token needs refresh
+        if self.token and self.token_expiry and datetime.now() < self.token_expiry:
+            # Token is still valid, no action needed
+            return
+            
+        # Get new token or refresh existing token
+        if not self.token or not self.refresh_token:
+            response = await self._get_new_token()
+        else:
+            response = await self._refresh_token()
+
+        if response and "token" in response:
+            self.token = response["token"]
+            self.refresh_token = response.get("refresh_token")
+            self.userid = response["userid"]
+        else:
+            self.token = None
+            self.refresh_token = None
+            self.userid = None
+
+    async def connect(self):
+        """
+        Connect to the omnilogic API and if successful, return 
+        token and user id from the xml response
+        """
+        # assert self.username != "", "Username not provided"
+        # assert self.password != "", "password not provided"
+
+        if self.username != "" and self.password != "":
+            await self.authenticate()
+
+            if self.token is None:
+                return False
+
+            self.logged_in = True
+
+            return self.token, self.userid
@@ -0,0 +1,226 @@
+"""
+Benchmarks for the request building, parsing and normalization hot paths.
+
+Each case is timed over a number of rounds with garbage collection paused, then
+run once more under tracemalloc to report how much memory it allocates.
+"""
+
+import gc
+import json
+import subprocess
+import sys
+import time
+import statistics
+import tracemalloc
+
+from .client import OmniLogic
+from .parsing import TelemetryFilter, build_request_payload
+
+
+class BenchmarkResult:
+    """ Timings in seconds and allocations in bytes for one benchmark case """
+
+    __slots__ = ("name", "rounds", "best", "median", "peak_bytes", "allocated_blocks")
+
+    def __init__(self, name, rounds, best, median, peak_bytes, allocated_blocks):
+        self.name = name
+        self.rounds = rounds
+        self.best = best
+        self.median = median
+        self.peak_bytes = peak_bytes
+        self.allocated_blocks = allocated_blocks
+
+    def as_dict(self):
+        return {slot: getattr(self, slot) for slot in self.__slots__}
+
+    def __repr__(self):
+        return f"<BenchmarkResult {self.name} median={self.median * 1e6:.1f}us peak={self.peak_bytes}B>"
+
+
+def measure(name, func, rounds=50, warmup=3):
+    """ Time func over rounds calls and record the allocations of one more call """
+    for _ in range(warmup):
+        func()
+
+    timings = []
+    gc_enabled = gc.isenabled()
+    gc.collect()
+    gc.disable()
+    try:
+        for _ in range(rounds):
+            started = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - started)
+    finally:
+        if gc_enabled:
+            gc.enable()
+
+    tracing = tracemalloc.is_tracing()
+    if not tracing:
+        tracemalloc.start()
+    try:
+        tracemalloc.reset_peak()
+        before = tracemalloc.take_snapshot()
+        baseline, _ = tracemalloc.get_traced_memory()
+        result = func()
+        _, peak = tracemalloc.get_traced_memory()
+        after = tracemalloc.take_snapshot()
+        del result
+    finally:
+        if not tracing:
+            tracemalloc.stop()
+
+    blocks = sum(stat.count_diff for stat in after.compare_to(before, "filename") if stat.count_diff > 0)
+
+    return BenchmarkResult(name, rounds, min(timings), statistics.median(timings), peak - baseline, blocks)
+
+
+def parser_cases(msp_config, telemetry, alarms, system=None):
+    """ Benchmark callables for the parsers, keyed by name.
+
+    msp_config is a GetMspConfigFile response body (MSPConfig wrapped in a
+    Response), telemetry a GetTelemetryData body and alarms a GetAlarmList body.
+    """
+    system = system or {"MspSystemID": 1, "BackyardName": "Benchmark"}
+    client = OmniLogic("benchmark", "benchmark")
+
+    config_item = client.msp_config_to_json(msp_config, system)
+    client.msp_config = msp_config
+
+    chlor_ids = [
+        bow["Chlorinator"]["System-Id"] for bow in config_item["Backyard"]["BOWS"] if "Chlorinator" in bow
+    ]
+
+    telemetry_params = {"Token": "benchmark", "MspSystemID": system["MspSystemID"]}
+    command_params = {
+        "Token": "benchmark",
+        "MspSystemID": system["MspSystemID"],
+        "Version": "0",
+        "PoolID": 1,
+        "EquipmentID": 10,
+        "IsOn": 100,
+        "IsCountDownTimer": False,
+        "StartTimeHours": 0,
+        "StartTimeMinutes": 0,
+        "EndTimeHours": 0,
+        "EndTimeMinutes": 0,
+        "DaysActive": 0,
+        "Recurring": False,
+    }
+
+    cases = {
+        "convert_to_json": lambda: client.convert_to_json(msp_config),
+        "msp_config_to_json": lambda: client.msp_config_to_json(msp_config, system),
+        "telemetry_to_json": lambda: client.telemetry_to_json(telemetry, config_item, client.alarms_to_json(alarms)),
+        "telemetry_to_json_filtered": lambda: client.telemetry_to_json(
+            telemetry, config_item, client.alarms_to_json(alarms), TelemetryFilter(types={"Filter", "Heater"})
+        ),
+        "alarms_to_json": lambda: client.alarms_to_json(alarms),
+        "buildRequest_telemetry": lambda: build_request_payload("GetTelemetryData", telemetry_params),
+        "buildRequest_command": lambda: build_request_payload("SetUIEquipmentCmd", command_params),
+    }
+
+    if chlor_ids:
+        chlor_id = int(chlor_ids[0])
+
+        def parse_chlorinator_config():
+            # Drop the cached tree so the lookup includes parsing the config, as on first use
+            client.msp_config_xml = None
+            return client._parse_chlorinator_config(chlor_id)
+
+        cases["_parse_chlorinator_config"] = parse_chlorinator_config
+
+    return cases
+
+
+def run_parser_benchmarks(msp_config, telemetry, alarms, rounds=50, names=None):
+    """ Run the parser benchmarks and return a list of BenchmarkResult """
+    cases = parser_cases(msp_config, telemetry, alarms)
+    return [
+        measure(name, func, rounds)
+        for name, func in cases.items()
+        if names is None or name in names
+    ]
+
+
+def format_results(results):
+    lines = [f"{'benchmark':<28} {'median us':>10} {'best us':>10} {'peak KiB':>10} {'blocks':>8}"]
+    for result in results:
+        lines.append(
+            f"{result.name:<28} {result.median * 1e6:>10.1f} {result.best * 1e6:>10.1f} "
+            f"{result.peak_bytes / 1024:>10.1f} {result.allocated_blocks:>8}"
+        )
+    return "\n".join(lines)
+
+
+def default_site(size):
+    """ A site that grows in bodies of water, equipment per body and alarms together """
+    from .synthetic import SyntheticSite
+
+    return SyntheticSite(
+        bows=size, relays=size, lights=size, pumps=size, heaters=2, alarms=4 * size, v2_lights=True
+    )
+
+
+def run_scaling_benchmarks(sizes=(1, 2, 4, 8, 16), site_factory=default_site, rounds=10, names=None):
+    """ Run the parser benchmarks over synthetic sites of increasing size.
+
+    Returns a list of (size, equipment_count, [BenchmarkResult]) rows.
+    """
+    rows = []
+    for size in sizes:
+        site = site_factory(size)
+        cases = parser_cases(site.msp_config(), site.telemetry(), site.alarm_list(), site.system)
+        results = [
+            measure(name, func, rounds)
+            for name, func in cases.items()
+            if names is None or name in names
+        ]
+        rows.append((size, site.equipment_count, results))
+    return rows
+
+
+def format_scaling(rows, width=40):
+    """ Table of median times per size, followed by a bar chart per benchmark """
+    names = [result.name for result in rows[0][2]]
+    lines = [f"{'size':>5} {'equipment':>9} " + " ".join(f"{name[:18]:>18}" for name in names)]
+    for size, equipment, results in rows:
+        lines.append(f"{size:>5} {equipment:>9} " + " ".join(f"{result.median * 1e6:>16.1f}us" for result in results))
+
+    for index, name in enumerate(names):
+        medians = [results[index].median for _, _, results in rows]
+        longest = max(medians) or 1
+        lines.append("")
+        lines.append(f"{name} (median, per equipment)")
+        for (size, equipment, _), median in zip(rows, medians):
+            bar = "#" * max(1, int(width * median / longest))
+            lines.append(f"{size:>5} {bar:<{width}} {median * 1e6:>10.1f}us {median * 1e6 / equipment:>8.2f}us")
+
+    return "\n".join(lines)
+
+
+_IMPORT_PROBE = """
+import sys, time, json
+started = time.perf_counter()
+exec(sys.argv[1])
+elapsed = time.perf_counter() - started
+print(json.dumps({"seconds": elapsed, "modules": sorted({name.split(".")[0] for name in sys.modules})}))
+"""
+
+
+def measure_import(statement, rounds=5, cwd=None):
+    """ Best cold-start time of an import statement, each round in a fresh interpreter.
+
+    Returns (seconds, modules) where modules is the set of top level modules
+    loaded once the statement has run.
+    """
+    best = None
+    modules = set()
+    for _ in range(rounds):
+        output = subprocess.run(
+            [sys.executable, "-c", _IMPORT_PROBE, statement], cwd=cwd, capture_output=True, text=True, check=True
+        ).stdout
+        result = json.loads(output)
+        modules = set(result["modules"])
+        best = result["seconds"] if best is None else min(best, result["seconds"])
+    return best, modules
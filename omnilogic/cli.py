@@ -0,0 +1,210 @@
+"""
+The omnilogic command line tool.
+
+    omnilogic poll [--interval 30] [--count N] [--output telemetry.jsonl]
+    omnilogic dump-config [--output-dir config]
+    omnilogic replay --config MspConfig.xml --telemetry Telemetry.xml [--alarms AlarmList.xml] [--rounds 100]
+    omnilogic bench parsers [--data-dir test_data] [--scaling]
+    omnilogic bench load [--accounts 10 ...]
+    omnilogic fanout [--port 8765]
+    omnilogic exporter [--port 9745]
+
+Commands that talk to the cloud read credentials from --credentials (a JSON
+file with "username" and "password") or from the OMNILOGIC_USERNAME and
+OMNILOGIC_PASSWORD environment variables, like the `python -m` entry points of
+the services (see omnilogic.service). --api-url points them at another API,
+such as the stand-in from `python -m omnilogic.loadtest serve`.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import time
+from xml.etree import ElementTree
+
+from .service import CredentialsError, add_client_arguments, client_from_args
+
+
+def _open_output(path):
+    return sys.stdout if path in (None, "-") else open(path, "a")
+
+
+async def poll(args):
+    """ Write each site's telemetry as one JSON line as soon as it arrives """
+    client = client_from_args(args)
+    output = _open_output(args.output)
+    written = 0
+    try:
+        async for site in client.stream_telemetry(interval=args.interval, changed_only=args.changed_only):
+            output.write(json.dumps({"ts": time.time(), **site}, default=str) + "\n")
+            output.flush()
+            written += 1
+            if args.count is not None and written >= args.count:
+                break
+    finally:
+        await client.close()
+        if output is not sys.stdout:
+            output.close()
+    return written
+
+
+async def dump_config(args):
+    """ Save every site's raw MSPConfig XML and its normalized JSON """
+    client = client_from_args(args)
+    os.makedirs(args.output_dir, exist_ok=True)
+    paths = []
+    try:
+        await client.connect()
+        for system in await client.get_site_list():
+            params = {"Token": client.token, "MspSystemID": system["MspSystemID"], "Version": 0}
+            response = await client.call_api("GetMspConfigFile", params)
+            base = os.path.join(args.output_dir, str(system["MspSystemID"]))
+            with open(base + ".xml", "w") as f:
+                f.write(response.text)
+            with open(base + ".json", "w") as f:
+                json.dump(client.msp_config_to_json(response, system), f, indent=2, default=str)
+            paths += [base + ".xml", base + ".json"]
+    finally:
+        await client.close()
+    for path in paths:
+        print(path)
+    return paths
+
+
+def _read_response(path, root_tag=None):
+    """ A recorded response body, with a bare root_tag element wrapped in a Response like the API sends """
+    with open(path) as f:
+        text = f.read()
+    if root_tag is not None and ElementTree.fromstring(text.encode()).tag == root_tag:
+        text = "<Response>" + text.split("?>", 1)[-1] + "</Response>"
+    return text
+
+
+def replay(args):
+    """ Run the parsers over recorded responses and print the telemetry, or time them with --rounds """
+    from .bench import format_results, run_parser_benchmarks
+    from .client import OmniLogic
+
+    msp_config = _read_response(args.config, "MSPConfig")
+    telemetry = _read_response(args.telemetry)
+    alarms = _read_response(args.alarms) if args.alarms else "<Response><Parameters/></Response>"
+
+    if args.rounds:
+        print(format_results(run_parser_benchmarks(msp_config, telemetry, alarms, rounds=args.rounds)))
+        return None
+
+    client = OmniLogic("replay", "replay")
+    system = {"MspSystemID": args.site, "BackyardName": "Replay"}
+    config = client.msp_config_to_json(msp_config, system)
+    result = client.telemetry_to_json(telemetry, config, client.alarms_to_json(alarms))
+    result["MspSystemID"] = args.site
+    print(json.dumps(result, indent=2, default=str))
+    return result
+
+
+def bench_parsers(args):
+    from .bench import default_site, format_results, format_scaling, run_parser_benchmarks, run_scaling_benchmarks
+
+    if args.scaling:
+        print(format_scaling(run_scaling_benchmarks(rounds=args.rounds)))
+        return
+
+    if args.data_dir:
+        msp_config = _read_response(os.path.join(args.data_dir, "MspConfiguration.txt"), "MSPConfig")
+        telemetry = _read_response(os.path.join(args.data_dir, "Telemetry.txt"))
+        alarms = _read_response(os.path.join(args.data_dir, "AlarmList.txt"))
+    else:
+        site = default_site(args.size)
+        msp_config, telemetry, alarms = site.msp_config(), site.telemetry(), site.alarm_list()
+    print(format_results(run_parser_benchmarks(msp_config, telemetry, alarms, rounds=args.rounds)))
+
+
+def bench_load(args):
+    # Parsed here, so only this command imports the load test
+    from .loadtest import add_run_arguments, run_from_args
+
+    parser = argparse.ArgumentParser(prog="omnilogic bench load", description="load test against a stand-in API")
+    add_run_arguments(parser)
+    run_from_args(parser.parse_args(args.options))
+
+
+def fanout(args):
+    from .fanout import serve_from_args
+
+    serve_from_args(args, client_from_args(args))
+
+
+def exporter(args):
+    from .exporter import serve_from_args
+
+    serve_from_args(args, client_from_args(args, metrics=True))
+
+
+def build_parser():
+    from . import exporter as exporter_module
+    from . import fanout as fanout_module
+
+    parser = argparse.ArgumentParser(prog="omnilogic", description="Hayward OmniLogic command line tool")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    def add_command(name, func, help_text, cloud=True):
+        command = commands.add_parser(name, help=help_text)
+        if cloud:
+            add_client_arguments(command)
+        command.set_defaults(func=func)
+        return command
+
+    poll_parser = add_command("poll", lambda args: asyncio.run(poll(args)), "poll telemetry as JSON lines")
+    poll_parser.add_argument("--interval", type=float, help="seconds between polls, once if left out")
+    poll_parser.add_argument("--count", type=int, help="stop after this many site snapshots")
+    poll_parser.add_argument("--changed-only", action="store_true", help="only write sites whose telemetry changed")
+    poll_parser.add_argument("--output", help="append to this file instead of stdout")
+
+    dump_parser = add_command("dump-config", lambda args: asyncio.run(dump_config(args)),
+                              "save raw and normalized MSPConfig per site")
+    dump_parser.add_argument("--output-dir", default=".")
+
+    replay_parser = add_command("replay", replay, "run the parsers over recorded responses", cloud=False)
+    replay_parser.add_argument("--config", required=True, help="GetMspConfigFile response or bare MSPConfig")
+    replay_parser.add_argument("--telemetry", required=True, help="GetTelemetryData response")
+    replay_parser.add_argument("--alarms", help="GetAlarmList response")
+    replay_parser.add_argument("--site", type=int, default=0, help="MspSystemID to report")
+    replay_parser.add_argument("--rounds", type=int, help="time the parsers over this many rounds instead")
+
+    bench_parser = commands.add_parser("bench", help="parser and load benchmarks")
+    bench_commands = bench_parser.add_subparsers(dest="bench", required=True)
+    parsers_parser = bench_commands.add_parser("parsers", help="time the parsers")
+    parsers_parser.add_argument("--data-dir", help="directory with MspConfiguration.txt, Telemetry.txt and AlarmList.txt")
+    parsers_parser.add_argument("--size", type=int, default=1, help="synthetic site size without --data-dir")
+    parsers_parser.add_argument("--rounds", type=int, default=30)
+    parsers_parser.add_argument("--scaling", action="store_true", help="chart cost over growing synthetic sites")
+    parsers_parser.set_defaults(func=bench_parsers)
+    load_parser = bench_commands.add_parser("load", help="load test against a stand-in API", add_help=False)
+    load_parser.set_defaults(options=[])
+    load_parser.set_defaults(func=bench_load)
+
+    fanout_module.add_arguments(add_command("fanout", fanout, "share one poll with local subscribers"))
+    exporter_module.add_arguments(add_command("exporter", exporter, "serve telemetry to Prometheus"))
+
+    return parser
+
+
+def main(argv=None):
+    parser = build_parser()
+    args, options = parser.parse_known_args(argv)
+    if options:
+        if args.func is not bench_load:
+            parser.error(f"unrecognized arguments: {' '.join(options)}")
+        args.options = options
+    try:
+        args.func(args)
+    except CredentialsError as e:
+        parser.error(str(e))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,1148 @@
+"""
+The OmniLogic client.
+"""
+
+import asyncio
+import contextlib
+import copy
+import logging
+import os
+import time
+from xml.etree import ElementTree
+
+import aiohttp
+
+from .auth import HAYWARD_AUTH_URL, HAYWARD_REFRESH_URL, AuthMixin
+from .configdiff import build_index, config_digest, diff_index
+from .instrumentation import NULL_TRACER, MetricsCollector, _instrumented, _traced
+from .models import Deadline, OmniLogicException, OmniLogicTimeoutException
+from .parsing import (
+    _equipment_state,
+    alarms_to_json,
+    build_request_payload,
+    convert_to_json,
+    normalize_msp_config,
+    telemetry_to_json,
+)
+from .snapshot import SnapshotStore, encode_snapshot
+from .transport import (
+    DEFAULT_REQUEST_TIMEOUT,
+    HAYWARD_API_URL,
+    ConnectorSettings,
+    HedgePolicy,
+    TransportMixin,
+    TransportStats,
+)
+
+# Seconds between GetAlarmList refreshes per site during get_telemetry_data
+DEFAULT_ALARM_INTERVAL = 300
+
+_LOGGER = logging.getLogger("omnilogic")
+
+
+class OmniLogic(TransportMixin, AuthMixin):
+    def __init__(self, username, password, session:aiohttp.ClientSession = None,
+                 request_timeout=DEFAULT_REQUEST_TIMEOUT, timeouts=None, poll_deadline=None,
+                 hedging=None, alarm_interval=DEFAULT_ALARM_INTERVAL, metrics=None,
+                 tracer=None, profiler=None, history=None, sink=None, snapshot=None, connector=None,
+                 config_listener=None):
+        self.username = username
+        self.password = password
+        self.systemid = None
+        self.systemname = None
+        self.userid = None
+        self.token = None
+        self.refresh_token = None
+        self.token_expiry = None
+        self.verbose = True
+        self.logged_in = False
+        self.retry = 5
+        # Created on first use when not supplied, so a client can be built outside an event loop
+        self._session = session
+        # Pool settings (a ConnectorSettings or an aiohttp connector) and wire stats for a session created here
+        self.connector = connector or ConnectorSettings()
+        self.transport_stats = TransportStats() if session is None else None
+
+        # Endpoints, overridable to point the client at a stand-in API
+        self.api_url = HAYWARD_API_URL
+        self.auth_url = HAYWARD_AUTH_URL
+        self.refresh_url = HAYWARD_REFRESH_URL
+            
+        self.systems = []
+
+        # Per-method request timeouts in seconds, falling back to request_timeout
+        self.request_timeout = request_timeout
+        self.timeouts = dict(timeouts or {})
+        # Overall budget in seconds for get_telemetry_data when no deadline is passed
+        self.poll_deadline = poll_deadline
+
+        # Opt-in hedging of read-only requests: True for the default HedgePolicy or a HedgePolicy
+        self.hedging = HedgePolicy() if hedging is True else (hedging or None)
+
+        # Opt-in instrumentation: True for a new MetricsCollector or a MetricsCollector to share
+        self.metrics = MetricsCollector() if metrics is True else (metrics or None)
+
+        # Tracing hooks, a no-op unless a Tracer such as omnilogic.tracing.OpenTelemetryTracer is passed
+        self.tracer = tracer or NULL_TRACER
+
+        # Opt-in cProfile/tracemalloc capture of public calls, see omnilogic.profiling.Profiler
+        self.profiler = profiler
+
+        # Optional omnilogic.history.TelemetryHistory fed by get_telemetry_data
+        self.history = history
+        # Optional omnilogic.storage.SQLiteSink that persists each poll
+        self.sink = sink
+        # Optional warm-start file (a path or omnilogic.snapshot.SnapshotStore) saved after each poll
+        self.snapshot = SnapshotStore(snapshot) if isinstance(snapshot, (str, bytes, os.PathLike)) else snapshot
+
+        # Alarms change far less often than telemetry, so get_telemetry_data only
+        # refreshes them every alarm_interval seconds, when equipment state changes
+        # or after a command fails. 0 fetches them on every poll.
+        self.alarm_interval = alarm_interval
+        self._alarm_cache = {}
+        self._equipment_states = {}
+
+        # Last good result per MspSystemID, served marked stale when a site misses the deadline
+        self._last_config = {}
+        self._last_telemetry = {}
+
+        # Digest of each site's raw config and its {System-Id: ConfigEntry} index, see omnilogic.configdiff.
+        # config_listener(MspSystemID, ConfigDiff) is called when equipment is added, removed or changed.
+        self.config_listener = config_listener
+        self._config_digests = {}
+        self._config_indexes = {}
+
+    @contextlib.contextmanager
+    def profiling(self, directory, **options):
+        """ Profile this client's public calls within the block, see omnilogic.profiling.Profiler """
+        from .profiling import Profiler
+
+        previous = self.profiler
+        self.profiler = Profiler(directory, **options)
+        try:
+            yield self.profiler
+        finally:
+            self.profiler = previous
+
+    def buildRequest(self, requestName, params):
+        """ Generate the XML object required for each API call
+        Args:
+            requestName (str): Passing the param of the request, ex: Login, GetMspConfig, etc.
+            params (dict): Differing requirements based on requestName
+        Returns:
+            XML object that will be sent to the API
+        Raises:
+            TBD
+        """
+        payload = build_request_payload(requestName, params)
+
+        if payload is None:
+            return None
+
+        return payload.decode()
+
+    @_traced("get_site_list")
+    async def get_site_list(self, deadline=None):
+        # assert self.token != "", "No login token"
+
+        if self.token is not None:
+            params = {"Token": self.token, "UserID": self.userid}
+
+            response = await self.call_api("GetSiteList", params, Deadline.coerce(deadline))
+
+            if not response.ok:
+                self.systems = []
+            else:
+                for child in response.xml.findall("./Parameters/Parameter/Item"):
+                    siteID = 0
+                    siteName = ""
+                    site = {}
+
+                    for item in child:
+
+                        if item.get("name") == "MspSystemID":
+                            siteID = int(item.text)
+                        elif item.get("name") == "BackyardName":
+                            siteName = str(item.text)
+
+                    site["MspSystemID"] = siteID
+                    site["BackyardName"] = siteName
+
+                    self.systems.append(site)
+
+        return self.systems
+
+    @_traced("get_msp_config_file")
+    async def get_msp_config_file(self, deadline=None):
+        """
+        Return the normalized MSP config for every site on the account.
+
+        With a deadline (seconds or a Deadline), sites that don't finish in time
+        are returned from the last good config marked "Stale", or left out if
+        there is none yet. If the site list itself misses the deadline, every
+        site with a last good config is returned from it; without any, the
+        OmniLogicTimeoutException is raised.
+        """
+        deadline = Deadline.coerce(deadline)
+
+        if self.token is None:
+            await self.connect()
+        if len(self.systems) == 0:
+            stale = await self._load_site_list(deadline, self._last_config)
+            if stale is not None:
+                return stale
+
+        mspconfig_list = []
+
+        if len(self.systems) != 0 and self.token != "":
+            for system in self.systems:
+                with self.tracer.span("omnilogic.load_site_config", {"omnilogic.msp_system_id": system["MspSystemID"]}):
+                    params = {
+                        "Token": self.token,
+                        "MspSystemID": system["MspSystemID"],
+                        "Version": 0,
+                    }
+
+                    try:
+                        mspconfig = await self.call_api("GetMspConfigFile", params, deadline)
+                    except OmniLogicTimeoutException as e:
+                        stale = self._stale_copy(self._last_config, system, e)
+                        if stale is not None:
+                            mspconfig_list.append(stale)
+                        continue
+            
+                    digest = config_digest(mspconfig.text)
+                    unchanged = self._config_digests.get(system["MspSystemID"]) == digest
+
+                    # Store raw MSP config XML for use by set_chlor_params method
+                    if not hasattr(self, 'msp_config') or not self.msp_config or (
+                        not unchanged and system["MspSystemID"] == self.systems[0]["MspSystemID"]
+                    ):
+                        self.msp_config = mspconfig.text
+                        self.msp_config_xml = mspconfig.xml
+
+                    if unchanged:
+                        configitem = self._last_config[system["MspSystemID"]]
+                    else:
+                        configitem = self.msp_config_to_json(mspconfig, system)
+                        configitem["Stale"] = False
+                        self._update_config_index(system, configitem)
+                        self._config_digests[system["MspSystemID"]] = digest
+                        self._last_config[system["MspSystemID"]] = configitem
+
+                    # The cached config outlives this call, so callers get their own copy of it
+                    mspconfig_list.append(copy.deepcopy(configitem))
+
+            
+            return mspconfig_list
+        else:
+            raise OmniLogicException("Failed getting MSP Config Data.")
+
+    def _update_config_index(self, system, configitem):
+        """ Index a site's changed config and diff it against the previous index """
+        site_id = system["MspSystemID"]
+        # The API only sends whole configs, so a changed one is indexed in full
+        new_index = build_index(configitem)
+        index = self._config_indexes.get(site_id)
+        if index is None and site_id in self._last_config:
+            # A config from a warm start, compare against it instead of starting over
+            index = build_index(self._last_config[site_id])
+        self._config_indexes[site_id] = new_index
+        if index is None:
+            return None
+
+        diff = diff_index(index, new_index)
+        if not diff:
+            return None
+
+        _LOGGER.debug(
+            "Config of system %s changed: %s added, %s removed, %s changed",
+            site_id, len(diff.added), len(diff.removed), len(diff.changed),
+        )
+        if diff.added or diff.removed:
+            # Cached alarms and equipment states describe the old equipment
+            self.invalidate_alarms(site_id)
+            self._equipment_states.pop(site_id, None)
+        if self.config_listener is not None:
+            try:
+                self.config_listener(site_id, diff)
+            except Exception as e:
+                _LOGGER.error(f"Error in config listener: {e}")
+        return diff
+
+    def config_index(self, MspSystemID):
+        """ {System-Id: ConfigEntry} of a site's equipment as of its last config, empty before one is loaded """
+        return self._config_indexes.get(int(MspSystemID), {})
+
+    @_instrumented("msp_config_to_json")
+    def msp_config_to_json(self, mspconfig, system):
+        """ Normalize one site's MSP config: relays, lights and heaters are forced into lists per body of water """
+        return normalize_msp_config(self.convert_to_json(mspconfig), system)
+
+    async def get_BOWS(self):
+        # DEPRECATED - USE get_msp_config_data instead.
+        if self.token is None:
+            await self.connect()
+        if self.systemid is None:
+            await self.get_site_list()
+        assert self.token != "", "No login token"
+        assert self.systemid != "", "No MSP id"
+
+        params = {"Token": self.token, "MspSystemID": self.systemid, "Version": "0"}
+
+        mspconfig = await self.call_api("GetMspConfigFile", params)
+
+        config_data = self.convert_to_json(mspconfig)
+
+        if isinstance(config_data["Backyard"]["Body-of-water"], list):
+            BOWS = config_data["Backyard"]["Body-of-water"]
+        else:
+            BOWS = []
+            BOWS.append(config_data["Backyard"]["Body-of-water"])
+
+        return BOWS
+
+    @_traced("get_alarm_list")
+    async def get_alarm_list(self, deadline=None):
+        deadline = Deadline.coerce(deadline)
+
+        if self.token is None:
+            await self.connect()
+        if len(self.systems) == 0:
+            await self.get_site_list(deadline)
+
+        alarmslist = []
+
+        if len(self.systems) != 0 and self.token is not None:
+            for system in self.systems:
+                params = {
+                    "Token": self.token,
+                    "MspSystemID": system["MspSystemID"],
+                    "Version": "0",
+                }
+                site_alarms = {}
+
+                this_alarm = await self.call_api("GetAlarmList", params, deadline)
+
+                site_alarms["Alarms"] = self.alarms_to_json(this_alarm)
+                self._alarm_cache[system["MspSystemID"]] = (time.monotonic(), site_alarms["Alarms"])
+                site_alarms["MspSystemID"] = system["MspSystemID"]
+                site_alarms["BackyardName"] = system["BackyardName"]
+                alarmslist.append(site_alarms)
+        else:
+            raise OmniLogicException("Failure getting alarms.")
+
+        return alarmslist
+
+    @_traced("set_heater_onoff")
+    async def set_heater_onoff(self, MspSystemID, PoolID, HeaterID, HeaterEnable):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "HeaterID": HeaterID,
+                "Enabled": HeaterEnable,
+            }
+
+            response = await self.call_api("SetHeaterEnable", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_heater_temperature")
+    async def set_heater_temperature(self, MspSystemID, PoolID, HeaterID, Temperature):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "HeaterID": HeaterID,
+                "Temp": Temperature,
+            }
+
+            response = await self.call_api("SetUIHeaterCmd", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_pump_speed")
+    async def set_pump_speed(self, MspSystemID, PoolID, PumpID, Speed):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "EquipmentID": PumpID,
+                "IsOn": Speed,
+                "IsCountDownTimer": False,
+                "StartTimeHours": 0,
+                "StartTimeMinutes": 0,
+                "EndTimeHours": 0,
+                "EndTimeMinutes": 0,
+                "DaysActive": 0,
+                "Recurring": False,
+            }
+
+            response = await self.call_api("SetUIEquipmentCmd", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_relay_valve")
+    async def set_relay_valve(self, MspSystemID, PoolID, EquipmentID, OnOff):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "EquipmentID": EquipmentID,
+                "IsOn": OnOff,
+                "IsCountDownTimer": False,
+                "StartTimeHours": 0,
+                "StartTimeMinutes": 0,
+                "EndTimeHours": 0,
+                "EndTimeMinutes": 0,
+                "DaysActive": 0,
+                "Recurring": False,
+            }
+
+            response = await self.call_api("SetUIEquipmentCmd", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_spillover_speed")
+    async def set_spillover_speed(self, MspSystemID, PoolID, Speed):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "Speed": Speed,
+                "IsCountDownTimer": False,
+                "StartTimeHours": 0,
+                "StartTimeMinutes": 0,
+                "EndTimeHours": 0,
+                "EndTimeMinutes": 0,
+                "DaysActive": 0,
+                "Recurring": False,
+            }
+
+            response = await self.call_api("SetUISpilloverCmd", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_superchlorination")
+    async def set_superchlorination(self, MspSystemID, PoolID, ChlorID, IsOn):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "ChlorID": ChlorID,
+                "IsOn": IsOn,
+            }
+
+            response = await self.call_api("SetUISuperCHLORCmd", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_lightshow")
+    async def set_lightshow(self, MspSystemID, PoolID, LightID, ShowID):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "LightID": LightID,
+                "Show": ShowID,
+                "IsCountDownTimer": False,
+                "StartTimeHours": 0,
+                "StartTimeMinutes": 0,
+                "EndTimeHours": 0,
+                "EndTimeMinutes": 0,
+                "DaysActive": 0,
+                "Recurring": False,
+            }
+
+            response = await self.call_api("SetStandAloneLightShow", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_lightshowv2")
+    async def set_lightshowv2(
+        self, MspSystemID, PoolID, LightID, ShowID, Speed, Brightness
+    ):
+        if self.token is None:
+            await self.connect()
+
+        success = False
+
+        if self.token is not None:
+            params = {
+                "Token": self.token,
+                "MspSystemID": MspSystemID,
+                "Version": "0",
+                "PoolID": PoolID,
+                "LightID": LightID,
+                "Show": ShowID,
+                "Speed": Speed,
+                "Brightness": Brightness,
+                "IsCountDownTimer": False,
+                "StartTimeHours": 0,
+                "StartTimeMinutes": 0,
+                "EndTimeHours": 0,
+                "EndTimeMinutes": 0,
+                "DaysActive": 0,
+                "Recurring": False,
+            }
+
+            response = await self.call_api("SetStandAloneLightShowV2", params)
+
+            success = response.ok
+
+        return success
+
+    @_instrumented("alarms_to_json")
+    def alarms_to_json(self, alarms):
+        return alarms_to_json(alarms)
+
+    @_instrumented("telemetry_to_json")
+    def telemetry_to_json(self, telemetry, config_data, site_alarms, equipment=None):
+        return telemetry_to_json(telemetry, config_data, site_alarms, equipment)
+
+    def invalidate_alarms(self, MspSystemID=None):
+        """ Force the next telemetry poll to fetch alarms for one site, or all sites """
+        if MspSystemID is None:
+            self._alarm_cache.clear()
+        else:
+            self._alarm_cache.pop(int(MspSystemID), None)
+
+    async def _site_alarms(self, system, telemetry, deadline=None):
+        """ Alarms for a site, served from the cache unless a refresh is due.
+
+        The alarms end up in the caller's telemetry, so the cache keeps its own
+        copies and hands out new ones.
+        """
+        site_id = system["MspSystemID"]
+        state = _equipment_state(telemetry.xml)
+        cached = self._alarm_cache.get(site_id)
+
+        if (
+            cached is not None
+            and self._equipment_states.get(site_id) == state
+            and time.monotonic() - cached[0] < self.alarm_interval
+        ):
+            return [dict(alarm) for alarm in cached[1]]
+
+        params = {
+            "Token": self.token,
+            "MspSystemID": site_id,
+            "Version": "0",
+        }
+        _LOGGER.debug("Getting alarm list for system %s", site_id)
+
+        try:
+            this_alarm = await self.call_api("GetAlarmList", params, deadline)
+        except OmniLogicTimeoutException:
+            if cached is None:
+                raise
+            _LOGGER.debug("Alarm list for system %s timed out, using cached alarms", site_id)
+            return [dict(alarm) for alarm in cached[1]]
+
+        site_alarms = self.alarms_to_json(this_alarm)
+        self._alarm_cache[site_id] = (time.monotonic(), [dict(alarm) for alarm in site_alarms])
+        self._equipment_states[site_id] = state
+        return site_alarms
+
+    def _stale_copy(self, cache, system, reason):
+        previous = cache.get(system["MspSystemID"])
+
+        if previous is None:
+            _LOGGER.warning(f"No data for system {system['MspSystemID']} within the deadline: {reason}")
+            return None
+
+        _LOGGER.warning(f"Serving stale data for system {system['MspSystemID']}: {reason}")
+        stale = copy.deepcopy(previous)
+        stale["Stale"] = True
+        return stale
+
+    async def _load_site_list(self, deadline, cache):
+        """
+        Load the site list, or return the sites in cache marked "Stale" if it times out.
+
+        Returns None once the site list is loaded. Without anything in cache the
+        OmniLogicTimeoutException is raised.
+        """
+        try:
+            await self.get_site_list(deadline)
+        except OmniLogicTimeoutException as e:
+            if not cache:
+                raise
+            return [self._stale_copy(cache, {"MspSystemID": site_id}, e) for site_id in sorted(cache)]
+        return None
+
+    async def _poll_config(self, deadline):
+        """
+        Log in and find the sites if needed, then load the config of every site.
+
+        Returns (config, stale telemetry). The stale telemetry is only there when
+        the site list timed out, one entry per site with a last good snapshot,
+        and there is no config then.
+        """
+        if self.token is None:
+            _LOGGER.debug("Token is None, attempting to connect")
+            result = await self.connect()
+            if not result:
+                _LOGGER.error("Failed to connect and obtain token")
+                raise OmniLogicException("No authentication token available")
+            _LOGGER.debug("Connection successful, token obtained: %s", self.token is not None)
+            
+        if len(self.systems) == 0:
+            _LOGGER.debug("No systems found, retrieving site list")
+            stale = await self._load_site_list(deadline, self._last_telemetry)
+            if stale is not None:
+                return [], stale
+
+        # assert self.token != "", "No login token"
+        if self.token != "" and len(self.systems) != 0:
+            try:
+                _LOGGER.debug("Getting MSP config file for %s systems", len(self.systems))
+                config_data = await self.get_msp_config_file(deadline)
+                _LOGGER.debug("Successfully retrieved MSP config data")
+                
+                """
+                f = open("mspconfig_" + self.username + ".txt", "w")
+                f.write(str(config_data))
+                f.close()
+                """
+            except Exception as e:
+                _LOGGER.error(f"Error getting telemetry data: {str(e)}")
+                _LOGGER.debug("Exception details", exc_info=True)
+                raise OmniLogicException(f"Failure getting telemetry: {str(e)}")
+
+            return config_data, []
+        else:
+            if self.token is None:
+                _LOGGER.error("Failed to get telemetry: No authentication token available")
+                raise OmniLogicException("Failure getting telemetry: No authentication token")
+            elif len(self.systems) == 0:
+                _LOGGER.error("Failed to get telemetry: No systems found")
+                raise OmniLogicException("Failure getting telemetry: No systems found")
+            else:
+                _LOGGER.error("Failed to get telemetry: Unknown reason")
+                raise OmniLogicException("Failure getting telemetry.")
+
+    async def _poll_site(self, system, config_data, deadline, equipment=None):
+        """
+        Poll one site and return (telemetry, telemetry XML).
+
+        A site served from its last good snapshot returns (stale telemetry,
+        None) and a site with nothing to return (None, None). Only unfiltered
+        telemetry becomes the last good snapshot.
+        """
+        with self.tracer.span("omnilogic.poll_site", {"omnilogic.msp_system_id": system["MspSystemID"]}):
+            try:
+                # Get the right instance of the ID for this system
+                config_item = {}
+                _LOGGER.debug("Processing system: %s - %s", system['MspSystemID'], system.get('BackyardName', 'Unknown'))
+
+                for sys_data in config_data:
+                    if sys_data["MspSystemID"] == system["MspSystemID"]:
+                        config_item = sys_data
+
+                if not config_item:
+                    _LOGGER.warning(f"Could not find config data for system {system['MspSystemID']}")
+                    if deadline is not None and deadline.expired:
+                        return self._stale_copy(self._last_telemetry, system, "config not loaded"), None
+                    return None, None
+
+                params = {"Token": self.token, "MspSystemID": system["MspSystemID"]}
+                _LOGGER.debug("Getting telemetry data for system %s", system['MspSystemID'])
+
+                telem = await self.call_api("GetTelemetryData", params, deadline)
+                if self.history is not None:
+                    self.history.record(system["MspSystemID"], telem)
+                _LOGGER.debug("Successfully retrieved telemetry data for system %s", system['MspSystemID'])
+
+                site_alarms = await self._site_alarms(system, telem, deadline)
+                _LOGGER.debug("Processed alarms: %s found", len(site_alarms))
+
+                _LOGGER.debug("Converting telemetry to JSON for system %s", system['MspSystemID'])
+                site_telem = self.telemetry_to_json(telem, config_item, site_alarms, equipment)
+
+                if site_alarms[0].get("BowID") == "False":
+                    site_alarms = []
+
+                _LOGGER.debug("Successfully converted telemetry to JSON for system %s", system['MspSystemID'])
+
+                site_telem["MspSystemID"] = system["MspSystemID"]
+                site_telem["BackyardName"] = config_item["BackyardName"]
+
+                try:
+                    site_telem["Msp-Vsp-Speed-Format"] = config_item["System"]["Msp-Vsp-Speed-Format"]
+                    site_telem["Msp-Time-Format"] = config_item["System"]["Msp-Time-Format"]
+                    site_telem["Units"] = config_item["System"]["Units"]
+                    site_telem["Msp-Chlor-Display"] = config_item["System"]["Msp-Chlor-Display"]
+                    site_telem["Msp-Language"] = config_item["System"]["Msp-Language"]
+                    site_telem["Unit-of-Measurement"] = config_item["System"]["Units"]
+                    site_telem["Alarms"] = site_alarms
+                except KeyError as e:
+                    _LOGGER.error(f"Missing key in system config: {e}")
+                    _LOGGER.debug("Available system keys: %s", list(config_item.get('System', {}).keys()))
+
+                try:
+                    if "Sensor" in config_item["Backyard"]:
+                        sensors = config_item["Backyard"]["Sensor"]
+                        _LOGGER.debug("Found sensors in Backyard")
+                    else:
+                        if "Sensor" in config_item["Backyard"].get("Body-of-water", {}):
+                            sensors = config_item["Backyard"]["Body-of-water"]["Sensor"]
+                            _LOGGER.debug("Found sensors in Body-of-water")
+                        else:
+                            sensors = {}
+                            _LOGGER.debug("No sensors found")
+
+                    hasAirSensor = False
+
+                    if type(sensors) == dict and sensors != {}:
+                        site_telem["Unit-of-Temperature"] = sensors.get("Units","UNITS_FAHRENHEIT")
+
+                        if sensors["Name"] == "AirSensor":
+                            hasAirSensor = True
+                            _LOGGER.debug("Found AirSensor")
+                    else:
+                        for sensor in sensors:
+                            if sensor["Name"] == "AirSensor":
+                                site_telem["Unit-of-Temperature"] = sensor.get("Units","UNITS_FAHRENHEIT")
+                                hasAirSensor = True
+                                _LOGGER.debug("Found AirSensor in sensor list")
+
+                    if hasAirSensor == False:
+                        if "airTemp" in site_telem:
+                            del site_telem["airTemp"]
+                            _LOGGER.debug("Removed airTemp as no AirSensor was found")
+                except KeyError as e:
+                    _LOGGER.error(f"Error processing sensors: {e}")
+                    _LOGGER.debug("Backyard keys: %s", list(config_item.get('Backyard', {}).keys()))
+
+                _LOGGER.debug("Adding telemetry for system %s to results", system['MspSystemID'])
+                site_telem["Stale"] = False
+                if equipment is None:
+                    self._last_telemetry[system["MspSystemID"]] = site_telem
+                return site_telem, telem.xml
+            except OmniLogicTimeoutException as e:
+                return self._stale_copy(self._last_telemetry, system, e), None
+            except Exception as e:
+                _LOGGER.error(f"Error processing system {system['MspSystemID']}: {str(e)}")
+                _LOGGER.debug("Exception details", exc_info=True)
+                return None, None
+
+    async def _finish_poll(self, polled):
+        """ Hand the sites polled fresh to the sink and snapshot, if any """
+        if self.sink is not None and polled:
+            self.sink.submit_poll(polled)
+        if self.snapshot is not None and polled:
+            await self._save_snapshot()
+
+    @_traced("get_telemetry_data")
+    async def get_telemetry_data(self, deadline=None, equipment=None):
+        """
+        Return telemetry for every site on the account, enriched with config and alarms.
+
+        deadline (seconds or a Deadline, defaults to poll_deadline) bounds the
+        whole poll; each config, telemetry and alarm request only gets what is
+        left of it. Sites that miss the deadline are returned from their last
+        good snapshot with "Stale" set to True instead of failing the poll. If
+        the site list misses it, every site with a last good snapshot is
+        returned that way; without any, OmniLogicTimeoutException is raised.
+
+        equipment (an omnilogic.TelemetryFilter) limits the equipment that is
+        converted and returned, for consumers that only need a few readings.
+        """
+        deadline = Deadline.coerce(deadline if deadline is not None else self.poll_deadline)
+        # Only stale telemetry comes back here, when the site list timed out; self.systems is empty then
+        config_data, telem_list = await self._poll_config(deadline)
+
+        # (MspSystemID, telemetry, telemetry XML) of the sites polled fresh, for the sink
+        polled = []
+
+        for system in self.systems:
+            site_telem, telemetryXML = await self._poll_site(system, config_data, deadline, equipment)
+            if site_telem is None:
+                continue
+            telem_list.append(site_telem)
+            if telemetryXML is not None:
+                polled.append((system["MspSystemID"], site_telem, telemetryXML))
+
+        """
+        f = open("telemetry_" + self.username + ".txt", "w")
+        f.write(str(telem_list))
+        f.close()
+        """
+
+        await self._finish_poll(polled)
+        return telem_list
+
+    async def stream_telemetry(self, interval=None, deadline=None, changed_only=False, equipment=None):
+        """
+        Yield each site's telemetry as soon as it is ready instead of once every site is done.
+
+        Sites are polled concurrently, so fast sites don't wait for slow ones.
+        Without an interval the stream ends after one poll; with one (seconds)
+        it polls again interval seconds after the previous poll started, until
+        the consumer stops iterating. A new poll only starts once the consumer
+        has taken every site of the last one, and leaving the loop cancels the
+        requests still in flight.
+
+        Args:
+            interval (float): Seconds between the start of one poll and the next, None for a single poll.
+            deadline (float): Budget in seconds for each poll, defaults to poll_deadline.
+            changed_only (bool): Skip sites whose telemetry is the same as the last one yielded.
+            equipment (TelemetryFilter): Only convert and return this equipment.
+        """
+        loop = asyncio.get_running_loop()
+        last_yielded = {}
+
+        while True:
+            started = loop.time()
+            poll_deadline = Deadline.coerce(deadline if deadline is not None else self.poll_deadline)
+            config_data, stale = await self._poll_config(poll_deadline)
+
+            async def poll(system):
+                return system["MspSystemID"], await self._poll_site(system, config_data, poll_deadline, equipment)
+
+            async def served(site_telem):
+                return site_telem["MspSystemID"], (site_telem, None)
+
+            polled = []
+            tasks = [asyncio.ensure_future(served(site_telem)) for site_telem in stale]
+            tasks += [asyncio.ensure_future(poll(system)) for system in self.systems]
+            try:
+                for next_site in asyncio.as_completed(tasks):
+                    site_id, (site_telem, telemetryXML) = await next_site
+                    if site_telem is None:
+                        continue
+                    if telemetryXML is not None:
+                        polled.append((site_id, site_telem, telemetryXML))
+                    if changed_only and last_yielded.get(site_id) == site_telem:
+                        continue
+                    last_yielded[site_id] = dict(site_telem)
+                    yield site_telem
+            finally:
+                for task in tasks:
+                    task.cancel()
+
+            await self._finish_poll(polled)
+
+            if interval is None:
+                return
+            await asyncio.sleep(max(0, interval - (loop.time() - started)))
+
+    def warm_start(self):
+        """
+        Return the telemetry saved in the snapshot file, marked "Stale", without any network call.
+
+        The saved config and telemetry also become the last good results that
+        get_msp_config_file and get_telemetry_data fall back to for sites that
+        miss their deadline. Returns an empty list without a snapshot file.
+        """
+        if self.snapshot is None:
+            return []
+
+        loaded = self.snapshot.load()
+        if loaded is None:
+            return []
+
+        saved, configs, telemetry = loaded
+        _LOGGER.debug("Loaded snapshot of %s sites saved at %s", len(telemetry), saved)
+
+        for site_id, config in configs.items():
+            config["Stale"] = True
+            self._last_config.setdefault(site_id, config)
+
+        telem_list = []
+        for site_id in sorted(telemetry):
+            site_telem = telemetry[site_id]
+            site_telem["Stale"] = True
+            self._last_telemetry.setdefault(site_id, site_telem)
+            telem_list.append(dict(site_telem))
+        return telem_list
+
+    async def close(self):
+        """ Wait for the sink's queued writes, then close the session """
+        if self.sink is not None:
+            await self.sink.flush()
+        await super().close()
+
+    async def _save_snapshot(self):
+        # Encode now, since callers may change the returned dicts, and write off the event loop
+        data = encode_snapshot(self._last_config, self._last_telemetry)
+        try:
+            await asyncio.get_running_loop().run_in_executor(None, self.snapshot.write, data)
+        except OSError as e:
+            _LOGGER.error(f"Error saving snapshot: {e}")
+
+    # def get_alarm_list(self):
+
+    @_instrumented("convert_to_json")
+    def convert_to_json(self, xmlString):
+        return convert_to_json(xmlString)
+
+    @_traced("set_equipment")
+    async def set_equipment(self, poolId, equipmentId, isOn):
+        if self.token is None:
+            await self.connect()
+        if len(self.systems) == 0:
+            await self.get_site_list()
+
+        success = False
+
+        if self.token is not None and len(self.systems) > 0:
+            # Use the first system's ID (like other methods do)
+            system_id = self.systems[0]["MspSystemID"]
+            
+            params = {
+                "Token": self.token,
+                "MspSystemID": system_id,
+                "Version": "0",
+                "PoolID": poolId,
+                "EquipmentID": equipmentId,
+                "IsOn": isOn,
+                "IsCountDownTimer": False,
+                "StartTimeHours": 0,
+                "StartTimeMinutes": 0,
+                "EndTimeHours": 0,
+                "EndTimeMinutes": 0,
+                "DaysActive": 0,
+                "Recurring": False,
+            }
+
+            response = await self.call_api("SetUIEquipmentCmd", params)
+
+            success = response.ok
+
+        return success
+
+    @_traced("set_chlor_params")
+    async def set_chlor_params(self, poolId, chlorId, cfgState=None, opMode=None, bowType=None, 
+                              timedPercent=None, cellType=None, scTimeout=None, orpTimeout=None):
+        """
+        Set chlorinator parameters using the SetCHLORParams API call.
+        Uses current chlorinator configuration from MSP config as defaults, with ability to override.
+        
+        Args:
+            poolId (int): Pool ID
+            chlorId (int): Chlorinator ID  
+            cfgState (int, optional): Configuration state (2=Disable/Off, 3=Enable/On)
+            opMode (int, optional): Operating mode (0=Not Configured, 1=Timed, 2=ORP Autosense)
+            bowType (int, optional): Body of Water Type (0=Pool, 1=SPA)
+            timedPercent (int, optional): Timed percentage [0-100]
+            cellType (int, optional): Cell type (1=T-3, 2=T-5, 3=T-9, 4=T-15)
+            scTimeout (int, optional): Superchlorinate timeout in hours [1-96]
+            orpTimeout (int, optional): ORP timeout in hours [1-96]
+            
+        Returns:
+            tuple: (success: bool, response: ApiResponse) - success status and parsed API response
+        """
+        if self.token is None:
+            await self.connect()
+
+        success = False
+        response = ""
+
+        if self.token is not None:
+            # Ensure we have system data
+            if not self.systems:
+                await self.get_site_list()
+            
+            # Ensure we have MSP config data for parsing defaults
+            if not hasattr(self, 'msp_config') or not self.msp_config:
+                await self.get_msp_config_file()
+            
+            # Parse current chlorinator configuration as defaults
+            current_config = self._parse_chlorinator_config(chlorId)
+            _LOGGER.info(f"Parsed chlorinator config for ID {chlorId}: {current_config}")
+            
+            # Use provided values or fall back to current config - NO hard-coded defaults
+            cfgState = cfgState if cfgState is not None else current_config["cfgState"]
+            opMode = opMode if opMode is not None else current_config["opMode"]
+            bowType = bowType if bowType is not None else current_config["bowType"]
+            timedPercent = timedPercent if timedPercent is not None else current_config["timedPercent"]
+            cellType = cellType if cellType is not None else current_config["cellType"]
+            scTimeout = scTimeout if scTimeout is not None else current_config["scTimeout"]
+            orpTimeout = orpTimeout if orpTimeout is not None else current_config["orpTimeout"]
+            
+            # Create parameters - include all parameters as per manufacturer sample
+            # Note: Hayward API has typo - expects "ORPTimout" (missing 'e')
+            params = {
+                "Token": self.token,
+                "MspSystemID": self.systems[0]["MspSystemID"],
+                "PoolID": poolId,
+                "ChlorID": chlorId,
+                "CfgState": cfgState,
+                "OpMode": opMode,
+                "BOWType": bowType,
+                "CellType": cellType,
+                "TimedPercent": timedPercent,
+                "SCTimeout": scTimeout,
+                "ORPTimout": orpTimeout  # Hayward's typo - missing 'e'
+            }
+
+            response = await self.call_api("SetCHLORParams", params)
+
+            success = response.ok
+
+        return success, response
+
+    @_instrumented("_parse_chlorinator_config")
+    def _parse_chlorinator_config(self, chlorId):
+        """Parse chlorinator configuration from MSP config file."""
+        if not self.msp_config:
+            raise ValueError("MSP config not available - cannot determine chlorinator configuration. Call get_msp_config_file() first.")
+        
+        try:
+            root = getattr(self, "msp_config_xml", None)
+            if root is None:
+                root = ElementTree.fromstring(self.msp_config)
+                self.msp_config_xml = root
+            
+            # Find the chlorinator with the specified ID
+            chlorinator = None
+            for chlor in root.findall(".//Chlorinator"):
+                system_id_elem = chlor.find("System-Id")
+                if system_id_elem is not None and int(system_id_elem.text) == chlorId:
+                    chlorinator = chlor
+                    break
+            
+            if not chlorinator:
+                raise ValueError(f"Chlorinator with ID {chlorId} not found in MSP config - cannot determine configuration")
+            
+            # Parse configuration values
+            config = {}
+            
+            # Enabled -> CfgState (yes=3, no=2)
+            enabled = chlorinator.find("Enabled")
+            config["cfgState"] = 3 if enabled is not None and enabled.text == "yes" else 2
+            
+            # Mode -> OpMode
+            mode = chlorinator.find("Mode")
+            if mode is not None:
+                mode_text = mode.text
+                if "NOT_CONFIGURED" in mode_text:
+                    config["opMode"] = 0
+                elif "TIMED" in mode_text:
+                    config["opMode"] = 1
+                elif "ORP_AUTO" in mode_text:
+                    config["opMode"] = 2
+                else:
+                    config["opMode"] = 0
+            else:
+                config["opMode"] = 0
+            
+            # BOWType - find the pool/spa that contains this chlorinator
+            # Look for Body-Of-Water that contains this chlorinator
+            bow_type = 0  # Default to Pool
+            for bow in root.findall(".//Body-Of-Water"):
+                # Check if this chlorinator is in this body of water
+                chlor_in_bow = bow.find(f".//Chlorinator[System-Id='{chlorId}']")
+                if chlor_in_bow is not None:
+                    type_elem = bow.find("Type")
+                    if type_elem is not None:
+                        if "BOW_POOL" in type_elem.text:
+                            bow_type = 0
+                        else:  # BOW_SPA or anything else
+                            bow_type = 1
+                    break
+            config["bowType"] = bow_type
+            
+            # Cell-Type -> CellType
+            cell_type = chlorinator.find("Cell-Type")
+            if cell_type is not None:
+                cell_text = cell_type.text
+                if "T3" in cell_text:
+                    config["cellType"] = 1
+                elif "T5" in cell_text:
+                    config["cellType"] = 2
+                elif "T9" in cell_text:
+                    config["cellType"] = 3
+                elif "T15" in cell_text:
+                    config["cellType"] = 4
+                else:
+                    config["cellType"] = 4  # Default to T-15
+            else:
+                config["cellType"] = 4  # Default to T-15
+            
+            # Timed-Percent -> TimedPercent
+            timed_percent = chlorinator.find("Timed-Percent")
+            config["timedPercent"] = int(timed_percent.text) if timed_percent is not None else 50
+            
+            # SuperChlor-Timeout -> SCTimeout (already in hours)
+            sc_timeout = chlorinator.find("SuperChlor-Timeout")
+            config["scTimeout"] = int(sc_timeout.text) if sc_timeout is not None else 5
+            
+            # ORP-Timeout -> ORPTimeout (convert from seconds to hours)
+            orp_timeout = chlorinator.find("ORP-Timeout")
+            if orp_timeout is not None:
+                config["orpTimeout"] = int(int(orp_timeout.text) / 3600)  # Convert seconds to hours
+            else:
+                config["orpTimeout"] = None  # No default - use None if not found
+            
+            return config
+            
+        except Exception as e:
+            _LOGGER.error(f"Error parsing chlorinator config: {e}")
+            raise ValueError(f"Failed to parse chlorinator configuration from MSP config: {e}")
@@ -0,0 +1,167 @@
+"""
+Change detection for MSP configs.
+
+The client hashes each GetMspConfigFile response and only normalizes a site's
+config again when the hash changes. A changed config is indexed by System-Id
+and compared with the previous index, so consumers learn which equipment was
+added, removed or changed instead of diffing the whole config:
+
+    def on_change(site_id, diff):
+        for entry in diff.added:
+            print(f"{site_id}: new {entry.type} {entry.name}")
+
+    api_client = OmniLogic(username, password, config_listener=on_change)
+
+A changed config is normalized and indexed in full, since the API only sends
+whole configs; the diff only decides which caches are dropped and what
+consumers are told about.
+"""
+
+import hashlib
+
+# Lists normalize_msp_config derives from the tree it converted, indexed where they came from instead
+_DERIVED = frozenset(("BOWS", "Relays", "Lights", "Heaters"))
+
+
+def config_digest(text):
+    """ Digest of a raw MSPConfig response, to tell whether it needs normalizing again """
+    if isinstance(text, str):
+        text = text.encode()
+    return hashlib.blake2b(text, digest_size=16).digest()
+
+
+class ConfigEntry:
+    """ One piece of equipment in a site's config.
+
+    Args:
+        system_id (str): Its System-Id.
+        type (str): Config tag, e.g. "Pump" or "ColorLogic-Light".
+        name (str): Its Name, or None.
+        parent (str): System-Id of the equipment it sits under, None at the top.
+        bow (str): System-Id of its body of water, None outside one.
+        fields (dict): Its own settings, without the equipment nested in it.
+    """
+
+    __slots__ = ("system_id", "type", "name", "parent", "bow", "fields")
+
+    def __init__(self, system_id, type, name, parent, bow, fields):
+        self.system_id = system_id
+        self.type = type
+        self.name = name
+        self.parent = parent
+        self.bow = bow
+        self.fields = fields
+
+    def __eq__(self, other):
+        if not isinstance(other, ConfigEntry):
+            return NotImplemented
+        return (
+            self.system_id == other.system_id
+            and self.type == other.type
+            and self.parent == other.parent
+            and self.bow == other.bow
+            and self.fields == other.fields
+        )
+
+    def as_dict(self):
+        return {
+            "System-Id": self.system_id,
+            "Type": self.type,
+            "Name": self.name,
+            "Parent": self.parent,
+            "BowID": self.bow,
+        }
+
+    def __repr__(self):
+        return f"ConfigEntry({self.type} {self.system_id} {self.name!r})"
+
+
+def _walk(node, tag, parent, bow, index):
+    """ Index the equipment in node, returning True if there is any """
+    if isinstance(node, list):
+        found = False
+        for item in node:
+            found = _walk(item, tag, parent, bow, index) or found
+        return found
+    if not isinstance(node, dict):
+        return False
+
+    system_id = node.get("System-Id")
+    if system_id is not None and tag == "Body-of-water":
+        bow = system_id
+    child_parent = parent if system_id is None else system_id
+
+    fields = {}
+    found = False
+    for key, value in node.items():
+        if key in _DERIVED:
+            continue
+        if _walk(value, key, child_parent, bow, index):
+            found = True
+        else:
+            fields[key] = value
+
+    if system_id is None:
+        return found
+    index[system_id] = ConfigEntry(system_id, tag, node.get("Name"), parent, bow, fields)
+    return True
+
+
+def build_index(config):
+    """ {System-Id: ConfigEntry} of every piece of equipment in a normalized site config """
+    index = {}
+    for key, value in config.items():
+        if key not in _DERIVED:
+            _walk(value, key, None, None, index)
+    return index
+
+
+class ConfigDiff:
+    """ Equipment added, removed and changed between two configs of a site.
+
+    changed holds (old, new) ConfigEntry pairs; an entry that moved to another
+    parent or body of water counts as changed.
+    """
+
+    __slots__ = ("added", "removed", "changed")
+
+    def __init__(self, added=(), removed=(), changed=()):
+        self.added = list(added)
+        self.removed = list(removed)
+        self.changed = list(changed)
+
+    def __bool__(self):
+        return bool(self.added or self.removed or self.changed)
+
+    def as_dict(self):
+        """ JSON-friendly form, with the names of the changed fields """
+        return {
+            "added": [entry.as_dict() for entry in self.added],
+            "removed": [entry.as_dict() for entry in self.removed],
+            "changed": [
+                dict(new.as_dict(), Fields=changed_fields(old, new))
+                for old, new in self.changed
+            ],
+        }
+
+    def __repr__(self):
+        return f"ConfigDiff(added={self.added}, removed={self.removed}, changed={[new for _, new in self.changed]})"
+
+
+def changed_fields(old, new):
+    """ Names of the settings that differ between two entries of the same equipment """
+    keys = list(new.fields) + [key for key in old.fields if key not in new.fields]
+    return [key for key in keys if old.fields.get(key) != new.fields.get(key)]
+
+
+def diff_index(old, new):
+    """ ConfigDiff from one {System-Id: ConfigEntry} index to the next """
+    return ConfigDiff(
+        added=[entry for system_id, entry in new.items() if system_id not in old],
+        removed=[entry for system_id, entry in old.items() if system_id not in new],
+        changed=[
+            (old[system_id], entry)
+            for system_id, entry in new.items()
+            if system_id in old and old[system_id] != entry
+        ],
+    )
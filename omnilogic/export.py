@@ -0,0 +1,266 @@
+"""
+Streaming columnar export of telemetry samples.
+
+Samples are rows of (ts, site_id, equipment_id, attribute, value). They come
+from a generator over a source:
+
+- sqlite_rows() reads a SQLiteSink database in batches;
+- history_rows() reads an in-memory TelemetryHistory;
+- poll_rows() reads the telemetry of one poll.
+
+export() or an exporter writes them to CSV, Arrow IPC or Parquet, one row group
+at a time, so memory stays bounded by row_group_size however much history is
+exported:
+
+    from omnilogic.export import export, sqlite_rows
+
+    export(sqlite_rows("pool.db", start=month_ago), "pool.parquet")
+
+Arrow and Parquet need pyarrow. LiveExporter can be given to a client as its
+sink to stream polls straight to a file as they arrive.
+"""
+
+import asyncio
+import concurrent.futures
+import csv
+import logging
+import os
+import pathlib
+import sqlite3
+import time
+
+from .history import DEFAULT_HISTORY_ATTRIBUTES, numeric_samples
+
+_LOGGER = logging.getLogger("omnilogic")
+
+COLUMNS = ("ts", "site_id", "equipment_id", "attribute", "value")
+
+DEFAULT_ROW_GROUP_SIZE = 65536
+
+FORMATS = {".csv": "csv", ".arrow": "arrow", ".feather": "arrow", ".parquet": "parquet"}
+
+
+def sqlite_rows(path, start=None, end=None, MspSystemID=None, batch_size=10000):
+    """ Samples stored by a SQLiteSink, oldest first, fetched batch_size rows at a time """
+    clauses = ["ts >= ?", "ts <= ?"]
+    params = [float("-inf") if start is None else start, float("inf") if end is None else end]
+    if MspSystemID is not None:
+        clauses.append("site_id = ?")
+        params.append(int(MspSystemID))
+
+    connection = sqlite3.connect(pathlib.Path(path).resolve().as_uri() + "?mode=ro", uri=True)
+    try:
+        cursor = connection.execute(
+            "SELECT ts, site_id, equipment_id, attribute, value FROM samples "
+            f"WHERE {' AND '.join(clauses)} ORDER BY ts",
+            params,
+        )
+        while True:
+            batch = cursor.fetchmany(batch_size)
+            if not batch:
+                break
+            yield from batch
+    finally:
+        connection.close()
+
+
+def history_rows(history, start=None, end=None, MspSystemID=None):
+    """ Samples held by a TelemetryHistory, one series after another """
+    for site_id, equipment_id, attribute in history.keys(MspSystemID):
+        times, values = history.query(site_id, equipment_id, attribute, start, end)
+        for timestamp, value in zip(times, values):
+            yield float(timestamp), site_id, equipment_id, attribute, float(value)
+
+
+def poll_rows(polled, timestamp=None, attributes=DEFAULT_HISTORY_ATTRIBUTES):
+    """ Samples from one poll, given as (MspSystemID, telemetry, telemetry XML) like a sink receives """
+    timestamp = time.time() if timestamp is None else timestamp
+    for site_id, _, telemetryXML in polled:
+        if telemetryXML is None:
+            continue
+        for equipment_id, _, attribute, value in numeric_samples(telemetryXML, attributes):
+            yield timestamp, int(site_id), equipment_id, attribute, value
+
+
+def row_groups(rows, size=DEFAULT_ROW_GROUP_SIZE):
+    """ Group rows into column lists of at most size rows """
+    columns = tuple([] for _ in COLUMNS)
+    count = 0
+    for row in rows:
+        for column, value in zip(columns, row):
+            column.append(value)
+        count += 1
+        if count == size:
+            yield dict(zip(COLUMNS, columns))
+            columns = tuple([] for _ in COLUMNS)
+            count = 0
+    if count:
+        yield dict(zip(COLUMNS, columns))
+
+
+class CSVExporter:
+    """ Writes row groups to a CSV file with a header row """
+
+    def __init__(self, path):
+        self._file = open(path, "w", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(COLUMNS)
+        self.rows = 0
+
+    def write(self, group):
+        self._writer.writerows(zip(*(group[column] for column in COLUMNS)))
+        self.rows += len(group["ts"])
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+def _pyarrow():
+    try:
+        import pyarrow
+    except ImportError as e:
+        raise ImportError("Arrow and Parquet export need the pyarrow package") from e
+    return pyarrow
+
+
+def _arrow_schema(pyarrow):
+    return pyarrow.schema([
+        ("ts", pyarrow.float64()),
+        ("site_id", pyarrow.int64()),
+        ("equipment_id", pyarrow.int64()),
+        ("attribute", pyarrow.dictionary(pyarrow.int32(), pyarrow.string())),
+        ("value", pyarrow.float64()),
+    ])
+
+
+class _ArrowBase:
+    def __init__(self):
+        self._pyarrow = _pyarrow()
+        self.schema = _arrow_schema(self._pyarrow)
+        self.rows = 0
+
+    def _table(self, group):
+        return self._pyarrow.Table.from_pydict({column: group[column] for column in COLUMNS}, schema=self.schema)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+class ArrowExporter(_ArrowBase):
+    """ Writes each row group as a record batch of an Arrow IPC file """
+
+    def __init__(self, path):
+        super().__init__()
+        import pyarrow.ipc
+
+        self._writer = pyarrow.ipc.new_file(path, self.schema)
+
+    def write(self, group):
+        self._writer.write_table(self._table(group))
+        self.rows += len(group["ts"])
+
+    def close(self):
+        self._writer.close()
+
+
+class ParquetExporter(_ArrowBase):
+    """ Writes each row group as a Parquet row group """
+
+    def __init__(self, path, compression="zstd"):
+        super().__init__()
+        import pyarrow.parquet
+
+        self._writer = pyarrow.parquet.ParquetWriter(path, self.schema, compression=compression)
+
+    def write(self, group):
+        self._writer.write_table(self._table(group))
+        self.rows += len(group["ts"])
+
+    def close(self):
+        self._writer.close()
+
+
+def open_exporter(path, format=None):
+    """ Exporter for format ("csv", "arrow" or "parquet"), by default guessed from the file extension """
+    if format is None:
+        format = FORMATS.get(os.path.splitext(path)[1].lower())
+    if format == "csv":
+        return CSVExporter(path)
+    if format == "arrow":
+        return ArrowExporter(path)
+    if format == "parquet":
+        return ParquetExporter(path)
+    raise ValueError(f"Unknown export format for {path}: {format}")
+
+
+def export(rows, path, format=None, row_group_size=DEFAULT_ROW_GROUP_SIZE):
+    """ Stream rows into a file one row group at a time and return the number of rows written """
+    with open_exporter(path, format) as exporter:
+        for group in row_groups(rows, row_group_size):
+            exporter.write(group)
+    return exporter.rows
+
+
+class LiveExporter:
+    """ Client sink that streams each poll's samples to a file.
+
+    Rows are buffered until a row group is full. Full row groups are written
+    on a thread of their own, so polling doesn't wait on the file. Like
+    SQLiteSink, flush() and close() are coroutines.
+    """
+
+    def __init__(self, path, format=None, row_group_size=DEFAULT_ROW_GROUP_SIZE,
+                 attributes=DEFAULT_HISTORY_ATTRIBUTES):
+        self.row_group_size = row_group_size
+        self.attributes = attributes
+        self._rows = []
+        self._pending = set()
+        self._exporter = open_exporter(path, format)
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="omnilogic-export")
+
+    @property
+    def rows(self):
+        return self._exporter.rows
+
+    def submit_poll(self, polled, timestamp=None):
+        self._rows.extend(poll_rows(polled, timestamp, self.attributes))
+        while len(self._rows) >= self.row_group_size:
+            group = self._rows[:self.row_group_size]
+            del self._rows[:self.row_group_size]
+            self._write(group)
+
+    def _write(self, rows):
+        for group in row_groups(rows, len(rows)):
+            future = self._executor.submit(self._exporter.write, group)
+            self._pending.add(future)
+            future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            _LOGGER.error("Telemetry export write failed: %s", future.exception())
+
+    async def flush(self):
+        """ Wait until every full row group handed to the writer thread is written """
+        while self._pending:
+            await asyncio.wait([asyncio.wrap_future(future) for future in list(self._pending)])
+
+    async def close(self):
+        """ Write what is buffered, then close the file and the writer thread """
+        if self._rows:
+            self._write(self._rows)
+            self._rows = []
+        await self.flush()
+        await asyncio.wrap_future(self._executor.submit(self._exporter.close))
+        self._executor.shutdown()
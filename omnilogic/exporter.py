@@ -0,0 +1,214 @@
+"""
+Prometheus exporter for pool telemetry.
+
+The exporter polls on its own schedule and keeps the latest telemetry of every
+site in memory, already rendered in the Prometheus text format. Each site is
+rendered on its own as it arrives and the sites are only joined when a scrape
+needs it. A scrape of /metrics never reaches the cloud; it returns the rendered
+text plus the client's own request metrics:
+
+    python -m omnilogic.exporter --interval 60 --port 9745
+
+with OMNILOGIC_USERNAME and OMNILOGIC_PASSWORD set or --credentials (see
+omnilogic.service), or from code:
+
+    exporter = PrometheusExporter(OmniLogic(username, password, metrics=True), interval=60)
+    await exporter.start()
+
+Gauges are labelled with site and site_name, and equipment gauges also with
+bow, equipment (the systemId), type and name.
+"""
+
+import time
+
+from aiohttp import web
+
+from .instrumentation import _escape_label
+from .service import PollingService, add_service_arguments, run_service, run_until_interrupted, service_main
+
+# Telemetry attribute: (metric name, help)
+GAUGES = {
+    "airTemp": ("air_temperature", "Air temperature at the backyard."),
+    "waterTemp": ("water_temperature", "Water temperature of a body of water."),
+    "filterSpeed": ("filter_speed_percent", "Filter pump speed."),
+    "filterState": ("filter_state", "Filter pump state."),
+    "power": ("power_watts", "Power drawn by the equipment."),
+    "pumpSpeed": ("pump_speed_percent", "Pump speed."),
+    "pumpState": ("pump_state", "Pump state."),
+    "heaterState": ("heater_state", "Heater state."),
+    "Current-Set-Point": ("heater_set_point", "Heater set point."),
+    "instantSaltLevel": ("salt_level_ppm", "Instant salt level at the chlorinator."),
+    "avgSaltLevel": ("salt_level_average_ppm", "Average salt level at the chlorinator."),
+    "ph": ("ph", "pH measured by the CSAD."),
+    "orp": ("orp_millivolts", "ORP measured by the CSAD."),
+    "relayState": ("relay_state", "Relay state."),
+    "lightState": ("light_state", "ColorLogic light state."),
+}
+
+# Equipment of a body of water: normalized telemetry key -> telemetry tag
+_EQUIPMENT_LISTS = {"Pumps": "Pump", "Heaters": "Heater", "Lights": "ColorLogic-Light", "Relays": "Relay"}
+_EQUIPMENT_ITEMS = ("Filter", "Chlorinator", "CSAD", "VirtualHeater")
+
+
+def _number(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _labels(labels):
+    return ",".join(f'{key}="{_escape_label(value)}"' for key, value in labels.items())
+
+
+def telemetry_samples(telemetry):
+    """ (metric name, labels, value) for one site's normalized telemetry """
+    site = {"site": telemetry.get("MspSystemID", ""), "site_name": telemetry.get("BackyardName", "")}
+
+    value = _number(telemetry.get("airTemp"))
+    if value is not None:
+        yield GAUGES["airTemp"][0], site, value
+    yield "alarms", site, float(len(telemetry.get("Alarms") or ()))
+    yield "stale", site, 1.0 if telemetry.get("Stale") else 0.0
+
+    def equipment(item, tag, bow):
+        labels = dict(site, bow=bow, equipment=item.get("systemId", ""), type=tag, name=item.get("Name", ""))
+        for attribute, (metric, _) in GAUGES.items():
+            value = _number(item.get(attribute))
+            if value is not None:
+                yield metric, labels, value
+        yield "equipment_alarms", labels, float(len(item.get("Alarms") or ()))
+
+    for relay in telemetry.get("Relays") or ():
+        yield from equipment(relay, "Relay", "")
+
+    for bow in telemetry.get("BOWS") or ():
+        bow_id = bow.get("systemId", "")
+        value = _number(bow.get("waterTemp"))
+        if value is not None:
+            yield GAUGES["waterTemp"][0], dict(site, bow=bow_id, name=bow.get("Name", "")), value
+
+        for key, tag in _EQUIPMENT_LISTS.items():
+            for item in bow.get(key) or ():
+                yield from equipment(item, tag, bow_id)
+        for tag in _EQUIPMENT_ITEMS:
+            item = bow.get(tag)
+            if isinstance(item, dict):
+                yield from equipment(item, tag, bow_id)
+
+
+_HELP = dict(GAUGES.values())
+_HELP.update({
+    "alarms": "Alarms active at the site.",
+    "stale": "1 if the site's latest telemetry was served stale.",
+    "equipment_alarms": "Alarms active on the equipment.",
+    "last_update_timestamp_seconds": "When the site's telemetry was last received.",
+})
+
+
+def _site_lines(site_id, received, telemetry, prefix):
+    """ {metric: sample lines} of one site """
+    samples = list(telemetry_samples(telemetry))
+    samples.append((
+        "last_update_timestamp_seconds",
+        {"site": site_id, "site_name": telemetry.get("BackyardName", "")},
+        received,
+    ))
+    series = {}
+    for metric, labels, value in samples:
+        series.setdefault(metric, []).append(f"{prefix}_{metric}{{{_labels(labels)}}} {value:.15g}")
+    return series
+
+
+def _join(sites, prefix):
+    """ Prometheus text of per-site sample lines, each metric's samples under one HELP and TYPE """
+    series = {}
+    for site in sites:
+        for metric, samples in site.items():
+            series.setdefault(metric, []).extend(samples)
+
+    lines = []
+    for metric, samples in series.items():
+        lines.append(f"# HELP {prefix}_{metric} {_HELP[metric]}")
+        lines.append(f"# TYPE {prefix}_{metric} gauge")
+        lines.extend(samples)
+    return "\n".join(lines) + "\n" if lines else ""
+
+
+def render(sites, prefix="omnilogic"):
+    """ Prometheus text for {MspSystemID: (received timestamp, telemetry)} """
+    return _join(
+        [_site_lines(site_id, received, telemetry, prefix) for site_id, (received, telemetry) in sorted(sites.items())],
+        prefix,
+    )
+
+
+class PrometheusExporter(PollingService):
+    """ Polls a client on its own schedule and serves the latest telemetry on /metrics.
+
+    Args:
+        client (OmniLogic): Client to poll; its MetricsCollector, if any, is exported too.
+        interval (float): Seconds between the start of one poll and the next.
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 for any free port.
+        prefix (str): Metric name prefix.
+    """
+
+    name = "Exporter"
+
+    def __init__(self, client, interval=60, host="0.0.0.0", port=9745, prefix="omnilogic"):
+        super().__init__(client, interval, host, port)
+        self.prefix = prefix
+        self.scrapes = 0
+        # {MspSystemID: {metric: sample lines}}, joined into _text when a scrape needs it
+        self._sites = {}
+        self._text = b""
+
+    def update(self, telemetry, received=None):
+        """ Render one site's telemetry for the scrapes to come """
+        received = time.time() if received is None else received
+        site_id = telemetry["MspSystemID"]
+        self._sites[site_id] = _site_lines(site_id, received, telemetry, self.prefix)
+        self._text = None
+
+    def exposition(self):
+        """ Latest rendered telemetry, followed by the client's request metrics """
+        if self._text is None:
+            self._text = _join([self._sites[site_id] for site_id in sorted(self._sites)], self.prefix).encode()
+        metrics = getattr(self.client, "metrics", None)
+        if metrics is None:
+            return self._text
+        return self._text + metrics.to_prometheus(self.prefix).encode()
+
+    def _received(self, site):
+        self.update(site)
+
+    async def _metrics(self, request):
+        self.scrapes += 1
+        return web.Response(body=self.exposition(), content_type="text/plain", charset="utf-8",
+                            headers={"X-Content-Type-Options": "nosniff"})
+
+    def _routes(self, app):
+        app.router.add_get("/metrics", self._metrics)
+
+
+async def serve(client, interval=60, host="0.0.0.0", port=9745):
+    """ Run a PrometheusExporter until cancelled """
+    await run_service(PrometheusExporter(client, interval, host, port), "Prometheus exporter listening on {url}/metrics")
+
+
+def add_arguments(parser):
+    add_service_arguments(parser, interval=60, host="0.0.0.0", port=9745)
+
+
+def serve_from_args(args, client):
+    run_until_interrupted(serve(client, args.interval, args.host, args.port))
+
+
+def main(argv=None):
+    service_main("python -m omnilogic.exporter", __doc__.strip().splitlines()[0], add_arguments, serve_from_args, argv,
+                 metrics=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,267 @@
+"""
+Local fan-out of one account's telemetry to many subscribers.
+
+A FanoutServer runs a single poller for a client and publishes every site's
+telemetry to local subscribers over WebSocket (/ws) or Server-Sent Events
+(/events), so the number of cloud requests stays the same however many
+dashboards, automations and loggers listen:
+
+    server = FanoutServer(OmniLogic(username, password), interval=30, port=8765)
+    await server.start()
+
+or from a shell, with OMNILOGIC_USERNAME and OMNILOGIC_PASSWORD set or
+--credentials (see omnilogic.service):
+
+    python -m omnilogic.fanout --interval 30 --port 8765
+
+Subscribers choose what they get with query parameters:
+
+- site: comma separated MspSystemIDs, every site by default;
+- mode: "delta" (the default) sends each site's full snapshot first and then
+  only what changed, "snapshot" sends the full telemetry on every poll.
+
+Messages are JSON objects: {"type": "snapshot", "site": id, "data": {...}} or
+{"type": "delta", "site": id, "set": [[path, value], ...], "unset": [path, ...]},
+where a path is the list of keys and list indexes down to the changed value.
+GET /snapshot returns the latest telemetry of every site.
+
+Each message is encoded once, however many subscribers receive it. A
+subscriber that falls queue_size messages behind has its backlog dropped and
+replaced by the latest snapshot of each of its sites, so a slow consumer never
+holds up the poller or the other subscribers.
+"""
+
+import asyncio
+import json
+
+from aiohttp import web
+
+from .service import PollingService, add_service_arguments, run_service, run_until_interrupted, service_main
+
+# Queued to a subscriber to end its connection when the server stops
+_CLOSE = ("close", None)
+
+
+def telemetry_delta(previous, current, path=()):
+    """ What changed from previous to current, as ([[path, value], ...], [path, ...]) """
+    changes = []
+    removed = []
+
+    if isinstance(previous, dict) and isinstance(current, dict):
+        for key, value in current.items():
+            if key not in previous:
+                changes.append([[*path, key], value])
+            elif previous[key] != value:
+                child_changes, child_removed = telemetry_delta(previous[key], value, (*path, key))
+                changes.extend(child_changes)
+                removed.extend(child_removed)
+        removed.extend([*path, key] for key in previous if key not in current)
+    elif isinstance(previous, list) and isinstance(current, list) and len(previous) == len(current):
+        for index, (old, new) in enumerate(zip(previous, current)):
+            if old != new:
+                child_changes, child_removed = telemetry_delta(old, new, (*path, index))
+                changes.extend(child_changes)
+                removed.extend(child_removed)
+    elif previous != current:
+        changes.append([list(path), current])
+
+    return changes, removed
+
+
+class Subscriber:
+    """ One local consumer with its own filter and bounded queue of (event, encoded message) """
+
+    def __init__(self, server, sites=None, mode="delta", queue_size=64):
+        self.server = server
+        self.sites = sites
+        self.mode = mode
+        self.queue = asyncio.Queue(queue_size)
+        self.sent = 0
+        self.dropped = 0
+
+    def wants(self, site_id):
+        return self.sites is None or site_id in self.sites
+
+    def offer(self, site_id, snapshot, delta):
+        """ Queue the message for a site update, or resync if the subscriber has fallen behind """
+        if not self.wants(site_id):
+            return
+        message = snapshot if self.mode == "snapshot" else delta
+        if message is None:
+            return
+        if self.queue.full():
+            self.resync()
+            return
+        self.queue.put_nowait(message)
+
+    def resync(self):
+        """ Drop the backlog and queue the latest snapshot of every site instead """
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+        for site_id, snapshot in self.server.snapshots():
+            if self.wants(site_id) and not self.queue.full():
+                self.queue.put_nowait(snapshot)
+
+    def close(self):
+        while not self.queue.empty():
+            self.queue.get_nowait()
+        self.queue.put_nowait(_CLOSE)
+
+
+class FanoutServer(PollingService):
+    """ Polls one client on its own schedule and fans every update out to local subscribers.
+
+    Args:
+        client (OmniLogic): Client to poll, the only one talking to the cloud.
+        interval (float): Seconds between the start of one poll and the next.
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 for any free port.
+        queue_size (int): Messages a subscriber may fall behind before it is resynced.
+        heartbeat (float): Seconds between WebSocket pings and SSE comments that keep idle connections open.
+    """
+
+    name = "Fan-out"
+
+    def __init__(self, client, interval=30, host="127.0.0.1", port=8765, queue_size=64, heartbeat=30):
+        super().__init__(client, interval, host, port)
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.published = 0
+        self.subscribers = set()
+        self._latest = {}
+        self._encoded = {}
+
+    def snapshots(self):
+        """ (MspSystemID, ("snapshot", encoded message)) of every site, in site order """
+        return sorted(self._encoded.items())
+
+    def publish(self, site_id, telemetry):
+        """ Encode a site update once and offer it to every subscriber """
+        # Work on a JSON copy, so deltas compare what subscribers saw and the caller can't change it under us
+        current = json.loads(json.dumps(telemetry, default=str))
+        previous = self._latest.get(site_id)
+        snapshot = ("snapshot", json.dumps({"type": "snapshot", "site": site_id, "data": current}))
+        # A site's first update goes to delta subscribers as a snapshot, an unchanged one not at all
+        delta = snapshot
+        if previous is not None:
+            changes, removed = telemetry_delta(previous, current)
+            delta = None if not changes and not removed else (
+                "delta", json.dumps({"type": "delta", "site": site_id, "set": changes, "unset": removed})
+            )
+
+        self._latest[site_id] = current
+        self._encoded[site_id] = snapshot
+        self.published += 1
+
+        for subscriber in list(self.subscribers):
+            subscriber.offer(site_id, snapshot, delta)
+
+    def _received(self, site):
+        self.publish(site["MspSystemID"], site)
+
+    def _subscribe(self, request):
+        sites = request.query.get("site")
+        mode = request.query.get("mode", "delta")
+        if mode not in ("delta", "snapshot"):
+            raise web.HTTPBadRequest(text=f"Unknown mode {mode}")
+        try:
+            sites = None if not sites else {int(site) for site in sites.split(",")}
+        except ValueError:
+            raise web.HTTPBadRequest(text="site must be a comma separated list of MspSystemIDs")
+
+        subscriber = Subscriber(self, sites, mode, self.queue_size)
+        # New subscribers start from the latest snapshot of their sites
+        subscriber.resync()
+        self.subscribers.add(subscriber)
+        return subscriber
+
+    async def _next(self, subscriber):
+        try:
+            return await asyncio.wait_for(subscriber.queue.get(), self.heartbeat)
+        except asyncio.TimeoutError:
+            return None
+
+    async def _websocket(self, request):
+        subscriber = self._subscribe(request)
+        ws = web.WebSocketResponse(heartbeat=self.heartbeat)
+        try:
+            await ws.prepare(request)
+            receiving = asyncio.ensure_future(ws.receive())
+            while not ws.closed:
+                sending = asyncio.ensure_future(self._next(subscriber))
+                done, _ = await asyncio.wait({receiving, sending}, return_when=asyncio.FIRST_COMPLETED)
+                if receiving in done:
+                    # Subscribers don't send anything, so any message means the socket is closing
+                    sending.cancel()
+                    break
+                message = sending.result()
+                if message is _CLOSE:
+                    break
+                if message is not None:
+                    await ws.send_str(message[1])
+                    subscriber.sent += 1
+            receiving.cancel()
+            if not ws.closed:
+                await ws.close()
+        finally:
+            self.subscribers.discard(subscriber)
+        return ws
+
+    async def _events(self, request):
+        subscriber = self._subscribe(request)
+        response = web.StreamResponse(headers={"Content-Type": "text/event-stream", "Cache-Control": "no-cache"})
+        try:
+            await response.prepare(request)
+            while True:
+                message = await self._next(subscriber)
+                if message is _CLOSE:
+                    break
+                if message is None:
+                    await response.write(b": keep-alive\n\n")
+                    continue
+                event, data = message
+                await response.write(f"event: {event}\ndata: {data}\n\n".encode())
+                subscriber.sent += 1
+        except ConnectionResetError:
+            pass
+        finally:
+            self.subscribers.discard(subscriber)
+        return response
+
+    async def _snapshot(self, request):
+        return web.json_response({str(site_id): data for site_id, data in sorted(self._latest.items())})
+
+    def _routes(self, app):
+        app.router.add_get("/ws", self._websocket)
+        app.router.add_get("/events", self._events)
+        app.router.add_get("/snapshot", self._snapshot)
+
+    def _stopping(self):
+        for subscriber in list(self.subscribers):
+            subscriber.close()
+
+
+async def serve(client, interval=30, host="127.0.0.1", port=8765, queue_size=64):
+    """ Run a FanoutServer until cancelled """
+    await run_service(
+        FanoutServer(client, interval, host, port, queue_size),
+        "Fan-out server listening on {url} (/ws, /events, /snapshot)",
+    )
+
+
+def add_arguments(parser):
+    add_service_arguments(parser, interval=30, host="127.0.0.1", port=8765)
+    parser.add_argument("--queue-size", type=int, default=64, help="messages a subscriber may fall behind")
+
+
+def serve_from_args(args, client):
+    run_until_interrupted(serve(client, args.interval, args.host, args.port, args.queue_size))
+
+
+def main(argv=None):
+    service_main("python -m omnilogic.fanout", __doc__.strip().splitlines()[0], add_arguments, serve_from_args, argv)
+
+
+if __name__ == "__main__":
+    main()
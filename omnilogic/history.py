@@ -0,0 +1,557 @@
+"""
+Bounded in-memory history of numeric telemetry.
+
+Attach a TelemetryHistory to a client and every get_telemetry_data poll adds
+the numeric attributes of each piece of equipment (water and air temperature,
+salt level, pump speed, pH, ORP, ...) to a fixed-size ring buffer per
+(site, equipment, attribute):
+
+    from omnilogic.history import TelemetryHistory
+
+    history = TelemetryHistory(capacity=2880)  # a day of 30 second polls
+    api_client = OmniLogic(username, password, history=history)
+    ...
+    times, values = history.query(site_id, bow_id, "waterTemp", start=time.time() - 3600)
+    history.aggregate(site_id, chlorinator_id, "instantSaltLevel")
+    history.downsample(site_id, bow_id, "waterTemp", start=week_ago, points=300)
+
+Each series holds two float64 buffers of `capacity` entries, so memory is
+16 * capacity bytes per series no matter how long the client runs. Every
+series also keeps rollups, fixed-size rings of count/sum/min/max per time
+bucket at coarser resolutions, updated as samples arrive. Downsampling queries
+read the coarsest rollup that still resolves the requested buckets instead of
+the raw samples. Buffers are NumPy arrays when NumPy is installed and
+array.array otherwise.
+"""
+
+import array
+import bisect
+import math
+import time
+
+try:
+    import numpy
+except ImportError:  # optional
+    numpy = None
+
+from .parsing import _response_xml
+
+# Telemetry attributes worth a trend line; pass attributes=None to keep every numeric attribute
+DEFAULT_HISTORY_ATTRIBUTES = frozenset({
+    "airTemp",
+    "waterTemp",
+    "instantSaltLevel",
+    "avgSaltLevel",
+    "pumpSpeed",
+    "filterSpeed",
+    "reportedFilterSpeed",
+    "power",
+    "ph",
+    "orp",
+    "temp",
+    "Current-Set-Point",
+})
+
+# (resolution in seconds, buckets kept): 5 minutes for a week and hours for a month
+DEFAULT_ROLLUPS = ((300, 2016), (3600, 720))
+
+# LTTB picks from at least this many candidate points per output point
+LTTB_OVERSAMPLE = 4
+
+# Attributes that are identifiers rather than measurements
+_SKIPPED_ATTRIBUTES = frozenset({"systemId", "statusVersion", "version"})
+
+
+def numeric_samples(telemetry, attributes=DEFAULT_HISTORY_ATTRIBUTES):
+    """ (equipment systemId, tag, attribute, value) for each numeric attribute in a GetTelemetryData response.
+
+    attributes limits which are returned, None returns every numeric attribute.
+    """
+    for child in _response_xml(telemetry):
+        system_id = child.get("systemId")
+        if system_id is None:
+            continue
+        equipment_id = int(system_id)
+
+        for name, value in child.attrib.items():
+            if attributes is None:
+                if name in _SKIPPED_ATTRIBUTES:
+                    continue
+            elif name not in attributes:
+                continue
+            try:
+                number = float(value)
+            except (TypeError, ValueError):
+                continue
+            yield equipment_id, child.tag, name, number
+
+
+def _use_numpy(backend):
+    if backend == "auto":
+        return numpy is not None
+    if backend == "numpy":
+        if numpy is None:
+            raise ImportError("The numpy history backend needs NumPy installed")
+        return True
+    if backend == "array":
+        return False
+    raise ValueError(f"Unknown history backend: {backend}")
+
+
+def _buffer(capacity, use_numpy):
+    if use_numpy:
+        return numpy.zeros(capacity)
+    return array.array("d", bytes(8 * capacity))
+
+
+def _empty(use_numpy):
+    return numpy.zeros(0) if use_numpy else array.array("d")
+
+
+def _ring_segments(next_index, count, capacity):
+    """ (start, end) index ranges of a ring buffer in chronological order """
+    if count < capacity:
+        return [(0, count)]
+    if next_index == 0:
+        return [(0, capacity)]
+    return [(next_index, capacity), (0, next_index)]
+
+
+def _gather(buffers, ranges, use_numpy):
+    """ Concatenate the given index ranges of each buffer """
+    if use_numpy:
+        if not ranges:
+            return [numpy.zeros(0) for _ in buffers]
+        return [numpy.concatenate([buffer[low:high] for low, high in ranges]) for buffer in buffers]
+
+    result = [array.array("d") for _ in buffers]
+    for low, high in ranges:
+        for column, buffer in zip(result, buffers):
+            column.extend(buffer[low:high])
+    return result
+
+
+class RingSeries:
+    """ Fixed-capacity series of (timestamp, value) pairs, oldest overwritten first.
+
+    Timestamps must not go backwards; out of order samples are dropped.
+    """
+
+    __slots__ = ("capacity", "_times", "_values", "_next", "_count", "_numpy")
+
+    def __init__(self, capacity, backend="auto"):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.capacity = capacity
+        self._numpy = _use_numpy(backend)
+        self._times = _buffer(capacity, self._numpy)
+        self._values = _buffer(capacity, self._numpy)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return 16 * self.capacity
+
+    def append(self, timestamp, value):
+        """ Add a sample, returning False if it is older than the newest one """
+        if self._count and timestamp < self._times[self._next - 1]:
+            return False
+        self._times[self._next] = timestamp
+        self._values[self._next] = value
+        self._next = (self._next + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        return True
+
+    def latest(self):
+        """ The newest (timestamp, value), or None when empty """
+        if not self._count:
+            return None
+        return self._times[self._next - 1], self._values[self._next - 1]
+
+    def oldest(self):
+        """ Timestamp of the oldest sample still kept, or None when empty """
+        if not self._count:
+            return None
+        return self._times[_ring_segments(self._next, self._count, self.capacity)[0][0]]
+
+    def _ranges(self, start, end):
+        ranges = []
+        for low, high in _ring_segments(self._next, self._count, self.capacity):
+            if self._numpy:
+                segment = self._times[low:high]
+                first = low + (0 if start is None else int(numpy.searchsorted(segment, start, "left")))
+                last = low + (high - low if end is None else int(numpy.searchsorted(segment, end, "right")))
+            else:
+                first = low if start is None else bisect.bisect_left(self._times, start, low, high)
+                last = high if end is None else bisect.bisect_right(self._times, end, low, high)
+            if first < last:
+                ranges.append((first, last))
+        return ranges
+
+    def range(self, start=None, end=None):
+        """ Timestamps and values with start <= timestamp <= end, oldest first """
+        times, values = _gather((self._times, self._values), self._ranges(start, end), self._numpy)
+        return times, values
+
+    def aggregate(self, start=None, end=None):
+        """ count, min, max, mean, first and last over a time range, or None when it is empty """
+        times, values = self.range(start, end)
+        count = len(values)
+        if not count:
+            return None
+        if self._numpy:
+            minimum, maximum, total = float(values.min()), float(values.max()), float(values.sum())
+        else:
+            minimum, maximum, total = min(values), max(values), sum(values)
+        return {
+            "count": count,
+            "min": minimum,
+            "max": maximum,
+            "mean": total / count,
+            "first": (times[0], values[0]),
+            "last": (times[-1], values[-1]),
+        }
+
+
+class RollupSeries:
+    """ Count, sum, min and max per fixed time bucket, kept for the last `capacity` buckets.
+
+    Buckets start at multiples of resolution seconds. Adding a sample updates
+    the newest bucket or starts a new one, so the rollup never rereads samples.
+    """
+
+    __slots__ = ("resolution", "capacity", "_starts", "_counts", "_sums", "_mins", "_maxs",
+                 "_next", "_count", "_numpy")
+
+    def __init__(self, resolution, capacity, backend="auto"):
+        if capacity < 1:
+            raise ValueError("capacity must be at least 1")
+        self.resolution = resolution
+        self.capacity = capacity
+        self._numpy = _use_numpy(backend)
+        self._starts = _buffer(capacity, self._numpy)
+        self._counts = _buffer(capacity, self._numpy)
+        self._sums = _buffer(capacity, self._numpy)
+        self._mins = _buffer(capacity, self._numpy)
+        self._maxs = _buffer(capacity, self._numpy)
+        self._next = 0
+        self._count = 0
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self):
+        return 40 * self.capacity
+
+    def add(self, timestamp, value):
+        """ Fold a sample into its bucket, returning False if that bucket has already rolled off """
+        bucket = timestamp - timestamp % self.resolution
+        last = self._next - 1
+
+        if self._count and self._starts[last] == bucket:
+            self._counts[last] += 1
+            self._sums[last] += value
+            if value < self._mins[last]:
+                self._mins[last] = value
+            if value > self._maxs[last]:
+                self._maxs[last] = value
+            return True
+
+        if self._count and bucket < self._starts[last]:
+            return False
+
+        index = self._next
+        self._starts[index] = bucket
+        self._counts[index] = 1
+        self._sums[index] = value
+        self._mins[index] = value
+        self._maxs[index] = value
+        self._next = (index + 1) % self.capacity
+        if self._count < self.capacity:
+            self._count += 1
+        return True
+
+    def oldest(self):
+        """ Start of the oldest bucket still kept, or None when empty """
+        if not self._count:
+            return None
+        return self._starts[_ring_segments(self._next, self._count, self.capacity)[0][0]]
+
+    def rows(self, start=None, end=None):
+        """ (starts, counts, sums, mins, maxs) of the buckets overlapping [start, end], oldest first """
+        ranges = []
+        for low, high in _ring_segments(self._next, self._count, self.capacity):
+            first = low if start is None else bisect.bisect_right(self._starts, start - self.resolution, low, high)
+            last = high if end is None else bisect.bisect_right(self._starts, end, low, high)
+            if first < last:
+                ranges.append((first, last))
+        buffers = (self._starts, self._counts, self._sums, self._mins, self._maxs)
+        return tuple(_gather(buffers, ranges, self._numpy))
+
+
+def _bucketize(start, end, points, times, counts, sums, mins, maxs, use_numpy):
+    """ Merge (time, count, sum, min, max) rows into points equal-width buckets, dropping empty ones """
+    width = (end - start) / points
+
+    if use_numpy:
+        if width > 0:
+            index = numpy.clip(((times - start) // width).astype(numpy.int64), 0, points - 1)
+        else:
+            index = numpy.zeros(len(times), dtype=numpy.int64)
+        bucket_counts = numpy.bincount(index, weights=counts, minlength=points)
+        bucket_sums = numpy.bincount(index, weights=sums, minlength=points)
+        bucket_mins = numpy.full(points, numpy.inf)
+        bucket_maxs = numpy.full(points, -numpy.inf)
+        numpy.minimum.at(bucket_mins, index, mins)
+        numpy.maximum.at(bucket_maxs, index, maxs)
+        keep = bucket_counts > 0
+        bucket_times = start + width * numpy.arange(points)
+        return {
+            "time": bucket_times[keep],
+            "count": bucket_counts[keep],
+            "mean": bucket_sums[keep] / bucket_counts[keep],
+            "min": bucket_mins[keep],
+            "max": bucket_maxs[keep],
+        }
+
+    bucket_counts = [0.0] * points
+    bucket_sums = [0.0] * points
+    bucket_mins = [math.inf] * points
+    bucket_maxs = [-math.inf] * points
+    for timestamp, count, total, minimum, maximum in zip(times, counts, sums, mins, maxs):
+        index = min(points - 1, max(0, int((timestamp - start) // width))) if width > 0 else 0
+        bucket_counts[index] += count
+        bucket_sums[index] += total
+        if minimum < bucket_mins[index]:
+            bucket_mins[index] = minimum
+        if maximum > bucket_maxs[index]:
+            bucket_maxs[index] = maximum
+
+    result = {name: array.array("d") for name in ("time", "count", "mean", "min", "max")}
+    for index, count in enumerate(bucket_counts):
+        if count:
+            result["time"].append(start + width * index)
+            result["count"].append(count)
+            result["mean"].append(bucket_sums[index] / count)
+            result["min"].append(bucket_mins[index])
+            result["max"].append(bucket_maxs[index])
+    return result
+
+
+def lttb(times, values, points):
+    """ Largest-Triangle-Three-Buckets reduction of a series to at most points samples.
+
+    Keeps the first and last samples and, from each of points - 2 equal-count
+    buckets in between, the sample that forms the largest triangle with the
+    previously kept sample and the average of the next bucket. Returns
+    (times, values) of the same type as the input.
+    """
+    length = len(times)
+    use_numpy = numpy is not None and isinstance(times, numpy.ndarray)
+
+    if points >= length or length <= 2:
+        return times[:], values[:]
+    if points < 3:
+        indices = [0, length - 1][:max(points, 1)]
+    else:
+        indices = [0]
+        every = (length - 2) / (points - 2)
+        previous = 0
+
+        for bucket in range(points - 2):
+            first = int(bucket * every) + 1
+            last = int((bucket + 1) * every) + 1
+            next_first = last
+            next_last = min(int((bucket + 2) * every) + 1, length)
+
+            x, y = times[previous], values[previous]
+            if use_numpy:
+                average_x = times[next_first:next_last].mean()
+                average_y = values[next_first:next_last].mean()
+                areas = numpy.abs(
+                    (x - average_x) * (values[first:last] - y) - (x - times[first:last]) * (average_y - y)
+                )
+                chosen = first + int(areas.argmax())
+            else:
+                count = next_last - next_first
+                average_x = sum(times[next_first:next_last]) / count
+                average_y = sum(values[next_first:next_last]) / count
+                chosen = first
+                largest = -1.0
+                for index in range(first, last):
+                    area = abs((x - average_x) * (values[index] - y) - (x - times[index]) * (average_y - y))
+                    if area > largest:
+                        largest = area
+                        chosen = index
+
+            indices.append(chosen)
+            previous = chosen
+
+        indices.append(length - 1)
+
+    if use_numpy:
+        return times[indices], values[indices]
+    return array.array("d", (times[index] for index in indices)), array.array("d", (values[index] for index in indices))
+
+
+class TelemetryHistory:
+    """ Ring buffer history per (MspSystemID, equipment systemId, attribute).
+
+    Args:
+        capacity (int): Raw samples kept per series.
+        attributes (set): Telemetry attributes to keep, or None for every numeric attribute.
+        rollups (tuple): (resolution seconds, buckets kept) of each rollup per series.
+        backend (str): "auto" (NumPy when installed), "numpy" or "array".
+    """
+
+    def __init__(self, capacity=2880, attributes=DEFAULT_HISTORY_ATTRIBUTES, rollups=DEFAULT_ROLLUPS,
+                 backend="auto"):
+        self.capacity = capacity
+        self.attributes = attributes
+        self.rollups = tuple(sorted(rollups))
+        self.backend = backend
+        self._numpy = _use_numpy(backend)
+        self._series = {}
+        self._rollups = {}
+        # Telemetry tag per (MspSystemID, systemId), e.g. "BodyOfWater" or "Pump"
+        self.equipment = {}
+
+    def __len__(self):
+        return len(self._series)
+
+    @property
+    def nbytes(self):
+        raw = sum(series.nbytes for series in self._series.values())
+        return raw + sum(rollup.nbytes for rollups in self._rollups.values() for rollup in rollups)
+
+    def record(self, MspSystemID, telemetry, timestamp=None):
+        """ Add the numeric attributes of a GetTelemetryData response, returning the samples added """
+        timestamp = time.time() if timestamp is None else timestamp
+        site_id = int(MspSystemID)
+        added = 0
+
+        for equipment_id, tag, name, number in numeric_samples(telemetry, self.attributes):
+            key = (site_id, equipment_id, name)
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = RingSeries(self.capacity, self.backend)
+                self._rollups[key] = tuple(
+                    RollupSeries(resolution, buckets, self.backend) for resolution, buckets in self.rollups
+                )
+                self.equipment[(site_id, equipment_id)] = tag
+            if series.append(timestamp, number):
+                for rollup in self._rollups[key]:
+                    rollup.add(timestamp, number)
+                added += 1
+
+        return added
+
+    def series(self, MspSystemID, equipment_id, attribute):
+        return self._series.get((int(MspSystemID), int(equipment_id), attribute))
+
+    def keys(self, MspSystemID=None):
+        """ (MspSystemID, equipment systemId, attribute) of every series, optionally for one site """
+        if MspSystemID is None:
+            return list(self._series)
+        site_id = int(MspSystemID)
+        return [key for key in self._series if key[0] == site_id]
+
+    def query(self, MspSystemID, equipment_id, attribute, start=None, end=None):
+        """ (timestamps, values) for one series within [start, end], empty if it doesn't exist """
+        series = self.series(MspSystemID, equipment_id, attribute)
+        if series is None:
+            return _empty(self._numpy), _empty(self._numpy)
+        return series.range(start, end)
+
+    def aggregate(self, MspSystemID, equipment_id, attribute, start=None, end=None):
+        series = self.series(MspSystemID, equipment_id, attribute)
+        return None if series is None else series.aggregate(start, end)
+
+    def _rollup_for(self, key, width, start):
+        """ The coarsest rollup no coarser than width that reaches back to start, or None for raw samples.
+
+        When nothing reaches back that far, whichever of the raw samples and
+        the eligible rollups goes back furthest is used.
+        """
+        best = None
+        best_oldest = self._series[key].oldest()
+        for rollup in reversed(self._rollups[key]):
+            if rollup.resolution > width:
+                continue
+            oldest = rollup.oldest()
+            if oldest <= start:
+                return rollup
+            if oldest < best_oldest:
+                best, best_oldest = rollup, oldest
+        return best
+
+    def downsample(self, MspSystemID, equipment_id, attribute, start=None, end=None, points=200, method="buckets"):
+        """ Reduce one series over [start, end] to at most points entries for plotting.
+
+        method "buckets" splits the range into points equal-width buckets and
+        returns {"time", "count", "mean", "min", "max"} columns for the
+        non-empty ones, "time" being each bucket's start. method "lttb" returns
+        {"time", "value"} picked with lttb(). Both read the coarsest rollup
+        that resolves the request and fall back to the raw samples when none
+        does. "resolution" in the result is the rollup used, 0 for raw.
+        """
+        key = (int(MspSystemID), int(equipment_id), attribute)
+        series = self._series.get(key)
+        if method not in ("buckets", "lttb"):
+            raise ValueError(f"Unknown downsampling method: {method}")
+        if series is None or not len(series) or points < 1:
+            columns = ("time", "count", "mean", "min", "max") if method == "buckets" else ("time", "value")
+            result = {column: _empty(self._numpy) for column in columns}
+            result["resolution"] = 0
+            return result
+
+        newest = series.latest()[0]
+        end = newest if end is None else end
+        if start is None:
+            start = series.oldest()
+            for rollup in self._rollups[key]:
+                start = min(start, rollup.oldest())
+
+        width = (end - start) / points
+        if method == "lttb":
+            width /= LTTB_OVERSAMPLE
+        rollup = self._rollup_for(key, width, start)
+
+        if rollup is None:
+            times, values = series.range(start, end)
+            if method == "lttb":
+                times, values = lttb(times, values, points)
+                return {"time": times, "value": values, "resolution": 0}
+            ones = numpy.ones(len(values)) if self._numpy else array.array("d", [1.0]) * len(values)
+            result = _bucketize(start, end, points, times, ones, values, values, values, self._numpy)
+            result["resolution"] = 0
+            return result
+
+        starts, counts, sums, mins, maxs = rollup.rows(start, end)
+        if method == "lttb":
+            if self._numpy:
+                middles = starts + rollup.resolution / 2
+                means = sums / counts
+            else:
+                middles = array.array("d", (bucket + rollup.resolution / 2 for bucket in starts))
+                means = array.array("d", (total / count for total, count in zip(sums, counts)))
+            times, values = lttb(middles, means, points)
+            return {"time": times, "value": values, "resolution": rollup.resolution}
+
+        result = _bucketize(start, end, points, starts, counts, sums, mins, maxs, self._numpy)
+        result["resolution"] = rollup.resolution
+        return result
+
+    def clear(self, MspSystemID=None):
+        for key in self.keys(MspSystemID):
+            del self._series[key]
+            del self._rollups[key]
+        self.equipment = {
+            key: tag for key, tag in self.equipment.items() if MspSystemID is not None and key[0] != int(MspSystemID)
+        }
@@ -0,0 +1,234 @@
+"""
+Metrics and tracing hooks used by the client.
+"""
+
+import bisect
+import collections
+import functools
+import time
+
+class Histogram:
+    """ Cumulative-bucket histogram in the Prometheus style """
+
+    __slots__ = ("bounds", "counts", "sum", "count")
+
+    def __init__(self, bounds):
+        self.bounds = bounds
+        self.counts = [0] * (len(bounds) + 1)
+        self.sum = 0
+        self.count = 0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def buckets(self):
+        """ (upper bound, cumulative count) pairs ending with +Inf """
+        total = 0
+        result = []
+        for bound, count in zip(self.bounds + (float("inf"),), self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+    def as_dict(self):
+        return {"count": self.count, "sum": self.sum, "buckets": self.buckets()}
+
+
+class MetricsCollector:
+    """ In-process metrics for an OmniLogic client.
+
+    Pass one as metrics= to record, per API method, request latency, response
+    size, XML parse time, retries, hedged duplicates and errors, plus auth
+    logins and refreshes and the time spent in each converter. Read it with
+    snapshot() or render it for Prometheus with to_prometheus(). Without a
+    collector the client skips all of this.
+    """
+
+    LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+    PARSE_BUCKETS = (0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1)
+    SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576)
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.request_latency = {}
+        self.response_bytes = {}
+        self.parse_time = {}
+        self.normalize_time = {}
+        self.auth_latency = {}
+        self.errors = collections.Counter()
+        self.retries = collections.Counter()
+        self.hedges = collections.Counter()
+        self.auth = collections.Counter()
+
+    @staticmethod
+    def _histogram(table, key, bounds):
+        histogram = table.get(key)
+        if histogram is None:
+            histogram = table[key] = Histogram(bounds)
+        return histogram
+
+    def observe_request(self, method, elapsed, size):
+        self._histogram(self.request_latency, method, self.LATENCY_BUCKETS).observe(elapsed)
+        self._histogram(self.response_bytes, method, self.SIZE_BUCKETS).observe(size)
+
+    def observe_parse(self, method, elapsed):
+        self._histogram(self.parse_time, method, self.PARSE_BUCKETS).observe(elapsed)
+
+    def observe_normalize(self, operation, elapsed):
+        self._histogram(self.normalize_time, operation, self.PARSE_BUCKETS).observe(elapsed)
+
+    def observe_auth(self, kind, elapsed, ok):
+        """ kind is "login" or "refresh" """
+        self._histogram(self.auth_latency, kind, self.LATENCY_BUCKETS).observe(elapsed)
+        self.auth[(kind, "ok" if ok else "error")] += 1
+
+    def count_error(self, method, kind):
+        """ kind is "timeout", "http", "parse", "status" or "login" """
+        self.errors[(method, kind)] += 1
+
+    def count_retry(self, method):
+        self.retries[method] += 1
+
+    def count_hedge(self, method):
+        """ A duplicate of a slow read-only request was sent, see HedgePolicy """
+        self.hedges[method] += 1
+
+    def snapshot(self):
+        """ Plain dict copy of everything recorded so far """
+        def histograms(table):
+            return {key: histogram.as_dict() for key, histogram in table.items()}
+
+        return {
+            "request_latency": histograms(self.request_latency),
+            "response_bytes": histograms(self.response_bytes),
+            "parse_time": histograms(self.parse_time),
+            "normalize_time": histograms(self.normalize_time),
+            "auth_latency": histograms(self.auth_latency),
+            "errors": {f"{method}:{kind}": count for (method, kind), count in self.errors.items()},
+            "retries": dict(self.retries),
+            "hedges": dict(self.hedges),
+            "auth": {f"{kind}:{result}": count for (kind, result), count in self.auth.items()},
+        }
+
+    def to_prometheus(self, prefix="omnilogic"):
+        """ Metrics in the Prometheus text exposition format """
+        lines = []
+
+        def histogram(name, help_text, label, table):
+            if not table:
+                return
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} histogram")
+            for key, values in sorted(table.items()):
+                labels = f'{label}="{_escape_label(key)}"'
+                for bound, count in values.buckets():
+                    le = "+Inf" if bound == float("inf") else repr(float(bound))
+                    lines.append(f'{prefix}_{name}_bucket{{{labels},le="{le}"}} {count}')
+                lines.append(f"{prefix}_{name}_sum{{{labels}}} {values.sum}")
+                lines.append(f"{prefix}_{name}_count{{{labels}}} {values.count}")
+
+        def counter(name, help_text, label_names, counts):
+            if not counts:
+                return
+            lines.append(f"# HELP {prefix}_{name} {help_text}")
+            lines.append(f"# TYPE {prefix}_{name} counter")
+            for key, count in sorted(counts.items()):
+                key = key if isinstance(key, tuple) else (key,)
+                labels = ",".join(f'{label}="{_escape_label(value)}"' for label, value in zip(label_names, key))
+                lines.append(f"{prefix}_{name}{{{labels}}} {count}")
+
+        histogram("request_duration_seconds", "API request latency.", "method", self.request_latency)
+        histogram("response_size_bytes", "API response body size.", "method", self.response_bytes)
+        histogram("parse_duration_seconds", "Time to parse API response XML.", "method", self.parse_time)
+        histogram("normalize_duration_seconds", "Time spent converting responses.", "operation", self.normalize_time)
+        histogram("auth_duration_seconds", "Login and token refresh latency.", "kind", self.auth_latency)
+        counter("request_errors_total", "Failed API requests.", ("method", "kind"), self.errors)
+        counter("request_retries_total", "API requests sent again after a failure.", ("method",), self.retries)
+        counter("request_hedges_total", "Hedged duplicates of slow API requests.", ("method",), self.hedges)
+        counter("auth_requests_total", "Logins and token refreshes.", ("kind", "result"), self.auth)
+
+        return "\n".join(lines) + "\n"
+
+
+def _escape_label(value):
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _instrumented(operation):
+    """ Trace a converter and record how long it takes on the client's MetricsCollector, if any """
+    name = f"omnilogic.{operation}"
+
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name):
+                metrics = self.metrics
+                if metrics is None:
+                    return func(self, *args, **kwargs)
+                started = time.perf_counter()
+                try:
+                    return func(self, *args, **kwargs)
+                finally:
+                    metrics.observe_normalize(operation, time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+def _text_bytes(text):
+    return len(text) if text.isascii() else len(text.encode())
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def set_attribute(self, key, value):
+        pass
+
+    def record_exception(self, exception):
+        pass
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class Tracer:
+    """ Tracing hooks for the client, a no-op unless overridden.
+
+    span() returns a context manager around one phase of work and yields an
+    object with set_attribute(key, value) and record_exception(exception).
+    Spans opened inside another span's block are its children. See
+    omnilogic.tracing for an OpenTelemetry adapter and a recording tracer.
+    """
+
+    def span(self, name, attributes=None):
+        return _NULL_SPAN
+
+
+NULL_TRACER = Tracer()
+
+
+def _traced(operation):
+    """ Run a public coroutine method inside a span named after it, profiled if the client has a profiler """
+    name = f"omnilogic.{operation}"
+
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            with self.tracer.span(name):
+                profiler = self.profiler
+                if profiler is None:
+                    return await func(self, *args, **kwargs)
+                with profiler.capture(operation):
+                    return await func(self, *args, **kwargs)
+        return wrapper
+    return decorator
@@ -0,0 +1,532 @@
+"""
+Fleet-scale load test for the OmniLogic client.
+
+A local stand-in for the Hayward API serves synthetic installations with
+configurable latency and error rates. N simulated accounts, each with its own
+OmniLogic client, connect, poll get_telemetry_data on an interval and send a
+mix of commands. The run reports requests per second, per-method latency
+percentiles, event-loop lag, CPU and RSS, and can save them as JSON.
+
+    python -m omnilogic.loadtest run --accounts 100 --sites 2 --interval 10 --duration 60 --output results.json
+
+By default the stand-in runs in the same process and its CPU time counts
+towards the totals. Start it separately with `python -m omnilogic.loadtest
+serve` and pass --api-url to measure the client alone.
+"""
+
+import argparse
+import asyncio
+import json
+import math
+import os
+import platform
+import random
+import socket
+import sys
+import time
+from xml.etree import ElementTree
+
+from aiohttp import web
+
+from .client import OmniLogic
+from .synthetic import SyntheticSite, site_list
+
+API_PATH = "/HAAPI/HomeAutomation/API.ashx"
+AUTH_PATH = "/auth-service/v2/login"
+REFRESH_PATH = "/auth-service/v2/refresh"
+
+COMMANDS = ("set_relay_valve", "set_pump_speed", "set_heater_temperature", "set_lightshow")
+
+
+def percentile(values, pct):
+    """ Nearest-rank percentile of values, or None when there are none """
+    if not values:
+        return None
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, math.ceil(pct / 100 * len(ordered)) - 1))
+    return ordered[index]
+
+
+def summarize(values, scale=1000):
+    """ Count and p50/p95/p99/max of a list of seconds, in milliseconds """
+    return {
+        "count": len(values),
+        "p50": _scaled(percentile(values, 50), scale),
+        "p95": _scaled(percentile(values, 95), scale),
+        "p99": _scaled(percentile(values, 99), scale),
+        "max": _scaled(max(values) if values else None, scale),
+    }
+
+
+def _scaled(value, scale):
+    return None if value is None else round(value * scale, 3)
+
+
+class LatencyModel:
+    """ Log-normal response latency with a median and spread, optionally per method """
+
+    def __init__(self, median=0.2, sigma=0.5, per_method=None, seed=None):
+        self.median = median
+        self.sigma = sigma
+        self.per_method = per_method or {}
+        self._random = random.Random(seed)
+
+    def sample(self, method):
+        median = self.per_method.get(method, self.median)
+        if median <= 0:
+            return 0
+        return self._random.lognormvariate(0, self.sigma) * median if self.sigma else median
+
+
+class StandInApi:
+    """ Local stand-in for the Hayward auth service and XML API.
+
+    Each account owns sites_per_account synthetic sites. A share of API
+    responses (error_rate) fail: http_error_share of them as an HTTP 500 with
+    an HTML body, the rest as a non-zero Status.
+    """
+
+    def __init__(self, accounts, sites_per_account=1, site_shape=None, latency=None,
+                 error_rate=0.0, http_error_share=0.5, seed=0):
+        self.latency = latency or LatencyModel(seed=seed)
+        self.error_rate = error_rate
+        self.http_error_share = http_error_share
+        self._random = random.Random(seed)
+        self._runner = None
+        self._ticks = {}
+        self.requests = 0
+        self.url = None
+
+        self.accounts = {}
+        self.sites = {}
+        next_id = 1000
+        for account in range(accounts):
+            sites = []
+            for number in range(sites_per_account):
+                next_id += 1
+                site = SyntheticSite(msp_system_id=next_id, name=f"Account {account} Site {number}",
+                                     seed=next_id, **(site_shape or {}))
+                sites.append(site)
+                self.sites[next_id] = site
+            self.accounts[self.username(account)] = sites
+        self._site_lists = {username: site_list(sites) for username, sites in self.accounts.items()}
+
+    @staticmethod
+    def username(account):
+        return f"user{account}@example.com"
+
+    async def start(self, host="127.0.0.1", port=0):
+        app = web.Application()
+        app.router.add_post(API_PATH, self._api)
+        app.router.add_post(AUTH_PATH, self._login)
+        app.router.add_post(REFRESH_PATH, self._refresh)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+
+        sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+        sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        sock.bind((host, port))
+        await web.SockSite(self._runner, sock).start()
+        self.url = f"http://{host}:{sock.getsockname()[1]}"
+        return self.url
+
+    async def stop(self):
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+    def configure(self, client):
+        """ Point an OmniLogic client at this stand-in """
+        client.api_url = self.url + API_PATH
+        client.auth_url = self.url + AUTH_PATH
+        client.refresh_url = self.url + REFRESH_PATH
+        return client
+
+    async def _login(self, request):
+        body = await request.json()
+        username = body.get("email")
+        if username not in self.accounts:
+            return web.Response(status=401, text="Invalid credentials")
+        return web.json_response({"token": f"token-{username}", "refreshToken": f"refresh-{username}",
+                                  "userID": username})
+
+    async def _refresh(self, request):
+        body = await request.json()
+        username = body.get("refresh_token", "").replace("refresh-", "", 1)
+        return web.json_response({"access_token": f"token-{username}", "refresh_token": f"refresh-{username}"})
+
+    async def _api(self, request):
+        self.requests += 1
+        xml = ElementTree.fromstring(await request.read())
+        method = xml.findtext("Name")
+        params = {param.get("name"): param.text for param in xml.iter("Parameter")}
+
+        delay = self.latency.sample(method)
+        if delay:
+            await asyncio.sleep(delay)
+
+        if self.error_rate and self._random.random() < self.error_rate:
+            if self._random.random() < self.http_error_share:
+                return web.Response(status=500, text="<html><body>Server Error</body></html>")
+            return self._xml(_status_body(method, 1, "Simulated failure"))
+
+        if method == "GetSiteList":
+            username = request.headers.get("Token", "").replace("token-", "", 1)
+            return self._xml(self._site_lists.get(username) or _status_body(method, 4, "You don't have permission"))
+
+        site = self.sites.get(int(params.get("MspSystemID") or 0))
+        if site is None:
+            return self._xml(_status_body(method, 4, "You don't have permission"))
+
+        if method == "GetMspConfigFile":
+            return self._xml(site.msp_config())
+        if method == "GetTelemetryData":
+            tick = self._ticks[site.msp_system_id] = self._ticks.get(site.msp_system_id, 0) + 1
+            return self._xml(site.telemetry(tick))
+        if method == "GetAlarmList":
+            return self._xml(site.alarm_list())
+
+        return self._xml(_status_body(method, 0, "Successfully"))
+
+    @staticmethod
+    def _xml(body):
+        return web.Response(text=body, content_type="text/xml")
+
+
+def _status_body(method, status, message):
+    return (
+        f"<Response><Name>{method}</Name><Parameters>"
+        f'<Parameter name="Status" dataType="int">{status}</Parameter>'
+        f'<Parameter name="StatusMessage" dataType="String">{message}</Parameter>'
+        "</Parameters></Response>"
+    )
+
+
+class Recorder:
+    """ Latencies and error counts per API method and per client operation """
+
+    def __init__(self):
+        self.methods = {}
+        self.method_errors = {}
+        self.operations = {}
+        self.operation_errors = {}
+
+    def record(self, table, errors, name, elapsed, ok):
+        table.setdefault(name, []).append(elapsed)
+        if not ok:
+            errors[name] = errors.get(name, 0) + 1
+
+    def request(self, method, elapsed, ok):
+        self.record(self.methods, self.method_errors, method, elapsed, ok)
+
+    def operation(self, name, elapsed, ok):
+        self.record(self.operations, self.operation_errors, name, elapsed, ok)
+
+
+class LoadTestClient(OmniLogic):
+    """ OmniLogic client that records the latency and outcome of every request """
+
+    def __init__(self, recorder, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.recorder = recorder
+
+    async def call_api(self, methodName, params, deadline=None):
+        started = time.perf_counter()
+        try:
+            response = await super().call_api(methodName, params, deadline)
+        except Exception:
+            self.recorder.request(methodName, time.perf_counter() - started, False)
+            raise
+        self.recorder.request(methodName, time.perf_counter() - started, response.ok)
+        return response
+
+    async def _get_token(self):
+        started = time.perf_counter()
+        try:
+            response = await super()._get_token()
+        except Exception:
+            self.recorder.request("Login", time.perf_counter() - started, False)
+            raise
+        self.recorder.request("Login", time.perf_counter() - started, True)
+        return response
+
+
+async def _measure_loop_lag(samples, stop, interval=0.05):
+    loop = asyncio.get_running_loop()
+    while not stop.is_set():
+        expected = loop.time() + interval
+        await asyncio.sleep(interval)
+        samples.append(max(0.0, loop.time() - expected))
+
+
+async def _timed(recorder, name, coro):
+    started = time.perf_counter()
+    try:
+        result = await coro
+    except Exception:
+        recorder.operation(name, time.perf_counter() - started, False)
+        return None
+    ok = result is not False
+    recorder.operation(name, time.perf_counter() - started, ok)
+    return result
+
+
+async def _run_account(client, sites, recorder, interval, deadline_at, command_rate, rng):
+    if not await _timed(recorder, "connect", client.connect()):
+        return
+
+    # Spread the first polls over the interval so accounts don't poll in lockstep
+    await asyncio.sleep(rng.uniform(0, interval))
+    loop = asyncio.get_running_loop()
+    next_poll = loop.time()
+
+    while loop.time() < deadline_at:
+        await _timed(recorder, "get_telemetry_data", client.get_telemetry_data())
+
+        if rng.random() < command_rate:
+            site = rng.choice(sites)
+            bow = rng.choice(site.bows)
+            command = rng.choice(COMMANDS)
+            pool_id = bow["System-Id"]
+            if command == "set_relay_valve" and bow["relays"]:
+                coro = client.set_relay_valve(site.msp_system_id, pool_id, rng.choice(bow["relays"]), rng.randint(0, 1))
+            elif command == "set_pump_speed" and bow["pumps"]:
+                coro = client.set_pump_speed(site.msp_system_id, pool_id, rng.choice(bow["pumps"]), rng.randint(18, 100))
+            elif command == "set_lightshow" and bow["lights"]:
+                coro = client.set_lightshow(site.msp_system_id, pool_id, rng.choice(bow["lights"]), rng.randint(0, 16))
+            else:
+                coro = client.set_heater_temperature(site.msp_system_id, pool_id, bow["virtual_heater"], rng.randint(70, 90))
+            await _timed(recorder, "command", coro)
+
+        next_poll += interval
+        await asyncio.sleep(max(0, next_poll - loop.time()))
+
+
+def _rss_bytes():
+    """ Current resident set size, falling back to the peak where /proc isn't available """
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError, AttributeError):
+        return _max_rss_bytes()
+
+
+def _max_rss_bytes():
+    """ Peak resident set size, None where the resource module is missing (Windows) """
+    try:
+        import resource
+    except ImportError:
+        return None
+    max_rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return max_rss if sys.platform == "darwin" else max_rss * 1024
+
+
+def _package_version():
+    try:
+        from importlib.metadata import version
+        return version("omnilogic")
+    except Exception:
+        return None
+
+
+async def run_load_test(accounts=10, sites_per_account=1, interval=10.0, duration=60.0, command_rate=0.1,
+                        latency=None, error_rate=0.0, http_error_share=0.5, site_shape=None, api_url=None,
+                        client_options=None, seed=0):
+    """ Run a load test and return the results as a dict.
+
+    Without api_url a StandInApi is started in this process. With api_url the
+    clients are pointed at an already running stand-in (see serve) that was
+    started with the same accounts, sites_per_account and site_shape.
+    """
+    stand_in = StandInApi(accounts, sites_per_account, site_shape, latency, error_rate, http_error_share, seed)
+    if api_url is None:
+        await stand_in.start()
+    else:
+        stand_in.url = api_url.rstrip("/")
+
+    recorder = Recorder()
+    rng = random.Random(seed)
+    clients = []
+    lag_samples = []
+    stop = asyncio.Event()
+    lag_task = asyncio.ensure_future(_measure_loop_lag(lag_samples, stop))
+
+    rss_before = _rss_bytes()
+    cpu_before = time.process_time()
+    started = time.perf_counter()
+    loop = asyncio.get_running_loop()
+    deadline_at = loop.time() + duration
+
+    try:
+        tasks = []
+        for account in range(accounts):
+            username = stand_in.username(account)
+            client = stand_in.configure(LoadTestClient(recorder, username, "password", **(client_options or {})))
+            clients.append(client)
+            tasks.append(_run_account(client, stand_in.accounts[username], recorder, interval, deadline_at,
+                                      command_rate, random.Random(rng.random())))
+        await asyncio.gather(*tasks)
+    finally:
+        elapsed = time.perf_counter() - started
+        cpu = time.process_time() - cpu_before
+        stop.set()
+        await lag_task
+        for client in clients:
+            await client.close()
+        if api_url is None:
+            await stand_in.stop()
+
+    requests = sum(len(values) for values in recorder.methods.values())
+    errors = sum(recorder.method_errors.values())
+    rss_after = _rss_bytes()
+
+    return {
+        "omnilogic_version": _package_version(),
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "config": {
+            "accounts": accounts,
+            "sites_per_account": sites_per_account,
+            "interval": interval,
+            "duration": duration,
+            "command_rate": command_rate,
+            "error_rate": error_rate,
+            "http_error_share": http_error_share,
+            "site_shape": site_shape or {},
+            "latency_median": stand_in.latency.median,
+            "latency_sigma": stand_in.latency.sigma,
+            "in_process_stand_in": api_url is None,
+        },
+        "elapsed": round(elapsed, 3),
+        "requests": requests,
+        "errors": errors,
+        "requests_per_second": round(requests / elapsed, 3) if elapsed else None,
+        "methods": {
+            name: dict(summarize(values), errors=recorder.method_errors.get(name, 0))
+            for name, values in sorted(recorder.methods.items())
+        },
+        "operations": {
+            name: dict(summarize(values), errors=recorder.operation_errors.get(name, 0))
+            for name, values in sorted(recorder.operations.items())
+        },
+        "event_loop_lag_ms": summarize(lag_samples),
+        "cpu_seconds": round(cpu, 3),
+        "cpu_percent": round(100 * cpu / elapsed, 1) if elapsed else None,
+        "rss_bytes": rss_after,
+        "rss_growth_bytes": None if rss_after is None or rss_before is None else rss_after - rss_before,
+        "max_rss_bytes": _max_rss_bytes(),
+    }
+
+
+def _mib(size):
+    return "n/a" if size is None else f"{size / 2**20:.1f} MiB"
+
+
+def format_report(results):
+    lines = [
+        f"{results['config']['accounts']} accounts x {results['config']['sites_per_account']} sites, "
+        f"{results['config']['interval']}s interval, {results['elapsed']}s",
+        f"requests: {results['requests']} ({results['requests_per_second']}/s), errors: {results['errors']}",
+        f"cpu: {results['cpu_seconds']}s ({results['cpu_percent']}%), rss: {_mib(results['rss_bytes'])}",
+        f"event loop lag ms: p50 {results['event_loop_lag_ms']['p50']} p99 {results['event_loop_lag_ms']['p99']} "
+        f"max {results['event_loop_lag_ms']['max']}",
+        "",
+        f"{'method':<24} {'count':>7} {'errors':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}",
+    ]
+    for section in ("methods", "operations"):
+        for name, stats in results[section].items():
+            lines.append(
+                f"{name:<24} {stats['count']:>7} {stats['errors']:>7} {stats['p50']!s:>9} "
+                f"{stats['p95']!s:>9} {stats['p99']!s:>9}"
+            )
+    return "\n".join(lines)
+
+
+async def serve(accounts, sites_per_account=1, site_shape=None, latency=None, error_rate=0.0,
+                http_error_share=0.5, host="127.0.0.1", port=8080, seed=0):
+    """ Run a StandInApi until cancelled """
+    stand_in = StandInApi(accounts, sites_per_account, site_shape, latency, error_rate, http_error_share, seed)
+    url = await stand_in.start(host, port)
+    print(f"Stand-in Hayward API for {accounts} accounts listening on {url}", flush=True)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await stand_in.stop()
+
+
+def add_arguments(parser):
+    """ Arguments shared by run and serve, also used by the omnilogic command line tool """
+    parser.add_argument("--accounts", type=int, default=10)
+    parser.add_argument("--sites", type=int, default=1, help="sites per account")
+    parser.add_argument("--bows", type=int, default=1, help="bodies of water per site")
+    parser.add_argument("--latency-ms", type=float, default=200, help="median stand-in response latency")
+    parser.add_argument("--latency-sigma", type=float, default=0.5, help="log-normal spread of the latency")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="share of API responses that fail")
+    parser.add_argument("--http-error-share", type=float, default=0.5, help="share of failures sent as HTTP 500")
+    parser.add_argument("--seed", type=int, default=0)
+
+
+def add_run_arguments(parser):
+    add_arguments(parser)
+    parser.add_argument("--interval", type=float, default=10, help="seconds between polls per account")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--command-rate", type=float, default=0.1, help="chance of a command after each poll")
+    parser.add_argument("--api-url", help="use a stand-in already running at this URL")
+    parser.add_argument("--output", help="write the results as JSON to this file")
+
+
+def _latency(args):
+    return LatencyModel(args.latency_ms / 1000, args.latency_sigma, seed=args.seed)
+
+
+def run_from_args(args):
+    results = asyncio.run(run_load_test(
+        accounts=args.accounts,
+        sites_per_account=args.sites,
+        interval=args.interval,
+        duration=args.duration,
+        command_rate=args.command_rate,
+        latency=_latency(args),
+        error_rate=args.error_rate,
+        http_error_share=args.http_error_share,
+        site_shape={"bows": args.bows},
+        api_url=args.api_url,
+        seed=args.seed,
+    ))
+    print(format_report(results))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    return results
+
+
+def serve_from_args(args):
+    try:
+        asyncio.run(serve(args.accounts, args.sites, {"bows": args.bows}, _latency(args), args.error_rate,
+                          args.http_error_share, args.host, args.port, args.seed))
+    except KeyboardInterrupt:
+        pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m omnilogic.loadtest", description=__doc__.strip().splitlines()[0])
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    run_parser = commands.add_parser("run", help="run a load test")
+    add_run_arguments(run_parser)
+    run_parser.set_defaults(func=run_from_args)
+
+    serve_parser = commands.add_parser("serve", help="run the stand-in API on its own")
+    add_arguments(serve_parser)
+    serve_parser.add_argument("--host", default="127.0.0.1")
+    serve_parser.add_argument("--port", type=int, default=8080)
+    serve_parser.set_defaults(func=serve_from_args)
+
+    args = parser.parse_args(argv)
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
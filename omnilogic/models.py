@@ -0,0 +1,118 @@
+"""
+Exceptions, enums and small value types shared by the client modules.
+"""
+
+import time
+from enum import Enum
+
+
+class ApiResponse:
+    """ Parsed response from one Hayward API call.
+
+    The body is parsed exactly once in call_api; converters and set_* methods
+    work from the parsed tree instead of the raw text.
+
+    It still reads like the string call_api used to return: str() is the body,
+    or the StatusMessage of a failed call, and `in` searches that string.
+    """
+
+    __slots__ = ("method", "text", "xml", "status", "message", "elapsed")
+
+    def __init__(self, method, text, xml, status, message, elapsed):
+        self.method = method
+        self.text = text
+        self.xml = xml
+        self.status = status
+        self.message = message
+        self.elapsed = elapsed
+
+    @property
+    def ok(self):
+        return self.status == 0
+
+    def parameter(self, name):
+        """ Return the text of a top level response parameter, or None """
+        param = self.xml.find(f"./Parameters/Parameter[@name='{name}']")
+        return None if param is None else param.text
+
+    def __str__(self):
+        if self.ok or self.message is None:
+            return self.text
+        return self.message
+
+    def __contains__(self, item):
+        return item in str(self)
+
+    def __repr__(self):
+        return f"<ApiResponse {self.method} status={self.status} message={self.message!r} elapsed={self.elapsed:.3f}s>"
+
+
+class Deadline:
+    """ Overall time budget shared by the API calls of a composite operation.
+
+    Each call_api made under a deadline is limited to whatever is left of the
+    budget, so a slow response late in a poll can't push the whole poll past it.
+    """
+
+    __slots__ = ("seconds", "expires")
+
+    def __init__(self, seconds):
+        self.seconds = seconds
+        self.expires = time.monotonic() + seconds
+
+    @classmethod
+    def coerce(cls, value):
+        """ Accept a Deadline, a number of seconds or None """
+        if value is None or isinstance(value, Deadline):
+            return value
+        return cls(value)
+
+    def remaining(self):
+        return self.expires - time.monotonic()
+
+    @property
+    def expired(self):
+        return self.remaining() <= 0
+
+
+class LoginException(Exception):
+    pass
+
+
+class OmniLogicException(Exception):
+    pass
+
+
+class OmniLogicTimeoutException(OmniLogicException):
+    pass
+
+
+class LightEffect(Enum):
+    VOODOO_LOUNGE = "0"
+    DEEP_BLUE_SEA = "1"
+    ROYAL_BLUE = "2"
+    AFTERNOON_SKY = "3"
+    AQUA_GREEN = "4"
+    EMERALD = "5"
+    CLOUD_WHITE = "6"
+    WARM_RED = "7"
+    FLAMINGO = "8"
+    VIVID_VIOLET = "9"
+    SANGRIA = "10"
+    TWILIGHT = "11"
+    TRANQUILITY = "12"
+    GEMSTONE = "13"
+    USA = "14"
+    MARDI_GRAS = "15"
+    COOL_CABARET = "16"
+    #### THESE SHOW IN THE APP AFTER SETTING, BUT MAY NOT MATCH ALL LIGHTS
+    YELLOW = "17"
+    ORANGE = "18"
+    GOLD = "19"
+    MINT = "20"
+    TEAL = "21"
+    BURNT_ORANGE = "22"
+    PURE_WHITE = "23"
+    CRISP_WHITE = "24"
+    WARM_WHITE = "25"
+    BRIGHT_YELLOW = "26"
@@ -0,0 +1,722 @@
+"""
+Request payload encoding and response parsing.
+
+Nothing here needs a network stack, so the converters can be imported and run
+on stored responses without loading aiohttp.
+"""
+
+import json
+import logging
+from xml.etree import ElementTree
+
+from .models import ApiResponse, OmniLogicException
+
+_LOGGER = logging.getLogger("omnilogic")
+
+_PARAMETER_DATATYPES = {int: "int", str: "string", bool: "bool"}
+
+
+# SetCHLORParams has a fixed parameter order and dataTypes - API actually requires MspSystemID despite manufacturer feedback
+# Note: Hayward has a typo in their API - they expect "ORPTimout" (missing 'e')
+_CHLOR_PARAMS_SCHEMA = (
+    ("MspSystemID", "int"),
+    ("PoolID", "int"),
+    ("ChlorID", "int"),
+    ("CfgState", "byte"),
+    ("OpMode", "byte"),
+    ("BOWType", "byte"),
+    ("CellType", "byte"),
+    ("TimedPercent", "byte"),
+    ("SCTimeout", "byte"),
+    ("ORPTimout", "byte"),  # Hayward's typo - missing 'e'
+)
+
+
+# 4 hours default for both timeout parameters when the MSP config value is missing
+_CHLOR_PARAMS_DEFAULTS = {"SCTimeout": 4, "ORPTimout": 4}
+
+
+def _escape_text(text):
+    return text.replace("&", "&amp;").replace("<", "&lt;").replace(">", "&gt;")
+
+
+def _escape_attrib(text):
+    return (
+        _escape_text(text)
+        .replace('"', "&quot;")
+        .replace("\r", "&#13;")
+        .replace("\n", "&#10;")
+        .replace("\t", "&#09;")
+    )
+
+
+class RequestTemplate:
+    """ Precompiled XML body for one API method and parameter signature.
+
+    The parameter order, dataType attributes and all static markup are worked
+    out once when the template is compiled, so rendering a request is a single
+    string join over the escaped parameter values. Output is byte-identical to
+    serializing the equivalent ElementTree with ElementTree.tostring.
+    """
+
+    __slots__ = ("name", "keys", "_head", "_open", "_empty", "_tail")
+
+    def __init__(self, name, schema):
+        self.name = name
+        self.keys = tuple(key for key, _ in schema)
+        self._open = tuple(
+            f'<Parameter name="{_escape_attrib(key)}" dataType="{datatype}">' for key, datatype in schema
+        )
+        self._empty = tuple(
+            f'<Parameter name="{_escape_attrib(key)}" dataType="{datatype}" />' for key, datatype in schema
+        )
+        if schema:
+            self._head = f"<Request><Name>{_escape_text(name)}</Name><Parameters>"
+            self._tail = "</Parameters></Request>"
+        else:
+            self._head = f"<Request><Name>{_escape_text(name)}</Name><Parameters />"
+            self._tail = "</Request>"
+
+    def render(self, params):
+        """ Render the request body as ready-to-send bytes """
+        parts = [self._head]
+        for key, opening, empty in zip(self.keys, self._open, self._empty):
+            text = str(params[key])
+            if text:
+                parts.append(opening)
+                parts.append(_escape_text(text))
+                parts.append("</Parameter>")
+            else:
+                parts.append(empty)
+        parts.append(self._tail)
+        return "".join(parts).encode("ascii", "xmlcharrefreplace")
+
+
+class ChlorParamsTemplate:
+    """ Precompiled SetCHLORParams body in the layout Hayward expects """
+
+    name = "SetCHLORParams"
+
+    def __init__(self):
+        self._lines = tuple(
+            (key, f'            <Parameter name="{key}" dataType="{datatype}">')
+            for key, datatype in _CHLOR_PARAMS_SCHEMA
+        )
+
+    def render(self, params):
+        """ Render the request body as ready-to-send bytes """
+        parts = ['<?xml version="1.0" encoding="utf-8"?>', "<Request>", "<Name>SetCHLORParams</Name>", "<Parameters>"]
+
+        for key, opening in self._lines:
+            if key not in params:
+                continue
+            value = params[key]
+            if value is None or str(value) == "":
+                if key not in _CHLOR_PARAMS_DEFAULTS:
+                    # Skip other parameters with empty/None values
+                    _LOGGER.warning("Skipping parameter %s with empty value: %s", key, value)
+                    continue
+                value = _CHLOR_PARAMS_DEFAULTS[key]
+                _LOGGER.info("Using default for %s: %s hours (MSP config value was None)", key, value)
+            parts.append(f"{opening}{_escape_text(str(value))}</Parameter>")
+
+        parts.extend(["</Parameters>", "</Request>"])
+        payload = "\n".join(parts)
+
+        if _LOGGER.isEnabledFor(logging.DEBUG):
+            _LOGGER.debug("Generated XML for SetCHLORParams:\n%s", payload)
+
+        return payload.encode()
+
+
+_REQUEST_TEMPLATES = {}
+
+
+_CHLOR_PARAMS_TEMPLATE = ChlorParamsTemplate()
+
+
+def get_request_template(requestName, params):
+    """ Return the cached template for this method and parameter signature.
+
+    Returns None if a parameter value has a type the API has no dataType for.
+    """
+    if requestName == "SetCHLORParams":
+        return _CHLOR_PARAMS_TEMPLATE
+
+    signature = (requestName, tuple(params), tuple(map(type, params.values())))
+    template = _REQUEST_TEMPLATES.get(signature)
+
+    if template is None:
+        schema = []
+        for k, v in params.items():
+            datatype = _PARAMETER_DATATYPES.get(type(v))
+            if datatype is None:
+                _LOGGER.info(f"Couldn't determine datatype for parameter '{k}' with value '{v}' (type: {type(v)}), exiting.")
+                return None
+            if str(k) != "Token":
+                schema.append((k, datatype))
+
+        template = RequestTemplate(requestName, schema)
+        _REQUEST_TEMPLATES[signature] = template
+
+    return template
+
+
+def build_request_payload(requestName, params):
+    """ Build the request body bytes for an API call, or None if it can't be encoded """
+    template = get_request_template(requestName, params)
+
+    if template is None:
+        return None
+
+    return template.render(params)
+
+
+def element_to_dict(element):
+    """ Convert a parsed XML element into the same structure xmltodict.parse produces.
+
+    Attributes become '@name' keys, text mixed with child elements becomes '#text'
+    and repeated child tags are collected into a list.
+    """
+    children = len(element)
+    text = element.text
+
+    if children:
+        text = "".join([text or ""] + [child.tail or "" for child in element])
+    if text is not None:
+        text = text.strip()
+
+    if not children and not element.attrib:
+        return text or None
+
+    item = {f"@{name}": value for name, value in element.attrib.items()}
+    repeated = set()
+
+    for child in element:
+        tag = child.tag
+        value = element_to_dict(child)
+        if tag in repeated:
+            item[tag].append(value)
+        elif tag in item:
+            item[tag] = [item[tag], value]
+            repeated.add(tag)
+        else:
+            item[tag] = value
+
+    if text:
+        item["#text"] = text
+
+    return item
+
+
+def _equipment_state(telemetryXML):
+    """ Snapshot of the on/off and state attributes of every piece of equipment """
+    return tuple(
+        (child.tag, child.get("systemId"), name, value)
+        for child in telemetryXML
+        for name, value in child.attrib.items()
+        if name.endswith("State") or name in ("state", "status", "enable")
+    )
+
+
+def _response_xml(data):
+    """ Return the parsed tree for an ApiResponse, an element or a raw XML string """
+    if isinstance(data, ApiResponse):
+        return data.xml
+    if isinstance(data, ElementTree.Element):
+        return data
+    try:
+        return ElementTree.fromstring(data)
+    except:
+        raise OmniLogicException("Error loading Hayward data.")
+
+
+def convert_to_json(xmlString):
+    responseXML = _response_xml(xmlString)
+    mspconfig = responseXML.find("MSPConfig")
+
+    if mspconfig is None:
+        raise OmniLogicException("Error converting Hayward data to JSON.")
+
+    return element_to_dict(mspconfig)
+
+
+def normalize_msp_config(configitem, system):
+    """ Normalize one site's converted MSP config: relays, lights and heaters are forced into lists per body of water """
+    configitem["MspSystemID"] = system["MspSystemID"]
+    configitem["BackyardName"] = system["BackyardName"]
+
+    relays = []
+    if "Relay" in configitem["Backyard"]:
+        try:
+            for relay in configitem["Relay"]:
+                relays.append(relay)
+
+        except:
+            if isinstance(configitem["Backyard"]["Relay"], list):
+                relays = configitem["Backyard"]["Relay"]
+            else:
+                relays.append(configitem["Backyard"]["Relay"])
+
+    configitem["Relays"] = relays
+
+    BOW_list = []
+
+    if type(configitem["Backyard"]["Body-of-water"]) == dict:
+        BOW = json.dumps(configitem["Backyard"]["Body-of-water"])
+
+        bow_relays = []
+        bow_lights = []
+        bow_heaters = []
+
+        if "Relay" in BOW:
+            try:
+                for relay in BOW["Relay"]:
+                    bow_relays.append(relay)
+            except:
+                if isinstance(
+                    configitem["Backyard"]["Body-of-water"]["Relay"], list
+                ):
+                    bow_relays = configitem["Backyard"]["Body-of-water"][
+                        "Relay"
+                    ]
+                else:
+                    bow_relays.append(
+                        configitem["Backyard"]["Body-of-water"]["Relay"]
+                    )
+
+        if "Heater" in BOW:
+            this_bow = json.loads(BOW)
+            if isinstance(this_bow["Heater"]["Operation"], list):
+                for heater in this_bow["Heater"]["Operation"]:
+                    # Startup/teardown operations sit alongside the heater equipment
+                    if "Heater-Equipment" not in heater:
+                        continue
+                    this_heater = {}
+                    this_heater["Name"] = heater["Heater-Equipment"]["Name"]
+                    this_heater["System-Id"] = this_bow["Heater"]["System-Id"]
+                    this_heater["Shared-Type"] = this_bow["Heater"]["Shared-Type"]
+                    this_heater["Enabled"] = this_bow["Heater"]["Enabled"]
+                    this_heater["Current-Set-Point"] = this_bow["Heater"]["Current-Set-Point"]
+                    this_heater["Max-Water-Temp"] = this_bow["Heater"]["Max-Water-Temp"]
+                    this_heater["Min-Settable-Water-Temp"] = this_bow["Heater"]["Min-Settable-Water-Temp"]
+                    this_heater["Max-Settable-Water-Temp"] = this_bow["Heater"]["Max-Settable-Water-Temp"]
+                    this_heater["Operation"] = heater
+                    bow_heaters.append(this_heater)
+            else:
+                bow_heaters.append(this_bow["Heater"])
+
+
+        if "ColorLogic-Light" in BOW:
+            try:
+                for light in BOW["ColorLogic-Light"]:
+                    if "V2-Active" not in light:
+                        light["V2-Active"] = "no"
+                    else:
+                        light["V2-Active"] = "yes"
+                    bow_lights.append(light)
+            except:
+                if isinstance(
+                    configitem["Backyard"]["Body-of-water"][
+                        "ColorLogic-Light"
+                    ],
+                    list,
+                ):
+                    for light in configitem["Backyard"]["Body-of-water"][
+                        "ColorLogic-Light"
+                    ]:
+                        if "V2-Active" not in light:
+                            light["V2-Active"] = "no"
+                        else:
+                            light["V2-Active"] = "yes"
+                        bow_lights.append(light)
+                else:
+                    light = configitem["Backyard"]["Body-of-water"][
+                        "ColorLogic-Light"
+                    ]
+                    if "V2-Active" not in light:
+                        light["V2-Active"] = "no"
+                    else:
+                        light["V2-Active"] = "yes"
+                    bow_lights.append(light)
+
+        BOW = json.loads(BOW)
+        BOW["Relays"] = bow_relays
+        BOW["Lights"] = bow_lights
+        BOW["Heaters"] = bow_heaters
+
+        BOW_list.append(BOW)
+    else:
+        for BOW in configitem["Backyard"]["Body-of-water"]:
+            bow_relays = []
+            bow_lights = []
+            bow_heaters = []
+
+            if "Relay" in BOW:
+                try:
+                    for relay in BOW["Relay"]:
+                        if type(relay) == str:
+                            bow_relays.append(BOW["Relay"])
+                            break
+                        else:
+                            bow_relays.append(relay)
+                except:
+                    bow_relays.append(BOW["Relay"])
+
+            if "Heater" in BOW:
+                if isinstance(BOW["Heater"]["Operation"], list):
+                    for heater in BOW["Heater"]["Operation"]:
+                        if "Heater-Equipment" not in heater:
+                            continue
+                        this_heater = {}
+                        this_heater["Name"] = heater["Heater-Equipment"]["Name"]
+                        this_heater["System-Id"] = BOW["Heater"]["System-Id"]
+                        this_heater["Shared-Type"] = BOW["Heater"]["Shared-Type"]
+                        this_heater["Enabled"] = BOW["Heater"]["Enabled"]
+                        this_heater["Current-Set-Point"] = BOW["Heater"]["Current-Set-Point"]
+                        this_heater["Max-Water-Temp"] = BOW["Heater"]["Max-Water-Temp"]
+                        this_heater["Min-Settable-Water-Temp"] = BOW["Heater"]["Min-Settable-Water-Temp"]
+                        this_heater["Max-Settable-Water-Temp"] = BOW["Heater"]["Max-Settable-Water-Temp"]
+                        this_heater["Operation"] = heater
+                        bow_heaters.append(this_heater)
+                else:
+                    bow_heaters.append(BOW["Heater"])
+
+            if "ColorLogic-Light" in BOW:
+                try:
+                    for light in BOW["ColorLogic-Light"]:
+                        if type(light) == str:
+                            this_light = BOW["ColorLogic-Light"]
+                            if "V2-Active" not in this_light:
+                                this_light["V2-Active"] = "no"
+                            else:
+                                this_light["V2-Active"] = "yes"
+                            bow_lights.append(this_light)
+                            break
+                        else:
+                            if "V2-Active" not in light:
+                                light["V2-Active"] = "no"
+                            else:
+                                light["V2-Active"] = "yes"
+                            bow_lights.append(light)
+                except:
+                    bow_lights.append(BOW["ColorLogic-Light"])
+
+            BOW["Relays"] = bow_relays
+            BOW["Lights"] = bow_lights
+            BOW["Heaters"] = bow_heaters
+
+            BOW_list.append(BOW)
+
+    configitem["Backyard"]["BOWS"] = BOW_list
+
+    return configitem
+
+
+def alarms_to_json(alarms):
+    alarmsXML = _response_xml(alarms)
+
+    alarmslist = []
+
+    for child in alarmsXML:
+        if child.tag == "Parameters":
+            for params in child:
+                if params.get("name") == "List":
+                    for alarmitem in params:
+                        thisalarm = {}
+
+                        for alarmline in alarmitem:
+                            thisalarm[alarmline.get("name")] = alarmline.text
+
+                        alarmslist.append(thisalarm)
+
+    if len(alarmslist) == 0:
+        thisalarm = {}
+        thisalarm["BowID"] = "False"
+
+        alarmslist.append(thisalarm)
+
+    return alarmslist
+
+
+class TelemetryFilter:
+    """ Equipment to keep when converting telemetry, by tag, systemId and body of water.
+
+    Each criterion left as None matches everything. The backyard and body of
+    water attributes, such as airTemp and waterTemp, are always kept;
+    equipment outside the filter is skipped before it is enriched with config
+    and alarms.
+
+    Args:
+        types (iterable): Telemetry tags to keep, e.g. {"Filter", "Heater"}.
+        system_ids (iterable): Equipment systemIds to keep.
+        bows (iterable): Body of water systemIds whose equipment is kept; backyard level equipment is dropped.
+    """
+
+    __slots__ = ("types", "system_ids", "bows")
+
+    def __init__(self, types=None, system_ids=None, bows=None):
+        self.types = None if types is None else frozenset(types)
+        self.system_ids = None if system_ids is None else frozenset(str(system_id) for system_id in system_ids)
+        self.bows = None if bows is None else frozenset(str(bow) for bow in bows)
+
+    def wants(self, tag, system_id, bow_id):
+        return (
+            (self.types is None or tag in self.types)
+            and (self.system_ids is None or system_id in self.system_ids)
+            and (self.bows is None or bow_id in self.bows)
+        )
+
+
+def telemetry_to_json(telemetry, config_data, site_alarms, equipment_filter=None):
+    """ Convert telemetry, keeping only the equipment an optional TelemetryFilter wants """
+    telemetryXML = _response_xml(telemetry)
+
+    backyard = {}
+
+    BOW = {}
+
+    backyard_list = []
+    BOW_list = []
+    relays = []
+    bow_lights = []
+    bow_relays = []
+    bow_pumps = []
+    bow_heaters = []
+    bow_item = {}
+
+    backyard_name = ""
+    BOWname = ""
+
+    if site_alarms[0].get("BowID") == "False":
+        site_alarms = []
+
+    for child in telemetryXML:
+        if "version" in child.attrib:
+            continue
+
+        elif (
+            equipment_filter is not None
+            and child.tag not in ("Backyard", "BodyOfWater")
+            and not equipment_filter.wants(child.tag, child.get("systemId"), bow_item.get("System-Id") if BOWname else None)
+        ):
+            continue
+
+        elif child.tag == "Backyard":
+            if backyard_name == "":
+                backyard_name = "Backyard" + str(child.attrib["systemId"])
+                backyard = dict(child.attrib)
+            else:
+                BOW["Lights"] = bow_lights
+                BOW["Relays"] = bow_relays
+                BOW["Pumps"] = bow_pumps
+                BOW["Heaters"] = bow_heaters
+                BOW_list.append(BOW)
+                backyard["BOWS"] = BOW_list
+                backyard_list.append(backyard)
+
+                backyard_name = "Backyard" + str(child.attrib["systemId"])
+                backyard = dict(child.attrib)
+                BOW_list = []
+                bow_lights = []
+                bow_relays = []
+                bow_pumps = []
+                bow_heaters = []
+                relays = []
+                BOWname = ""
+
+        elif child.tag == "BodyOfWater":
+            if BOWname == "":
+                backyard["Relays"] = relays
+                BOWname = "BOW" + str(child.attrib["systemId"])
+
+                for bow in config_data["Backyard"]["BOWS"]:
+                    if child.attrib["systemId"] == bow["System-Id"]:
+                        bow_item = bow
+                BOW = dict(child.attrib)
+            else:
+                BOW["Lights"] = bow_lights
+                BOW["Relays"] = bow_relays
+                BOW["Pumps"] = bow_pumps
+                BOW["Heaters"] = bow_heaters
+
+                BOW_list.append(BOW)
+
+                BOW = {}
+                bow_lights = []
+                bow_relays = []
+                bow_pumps = []
+                bow_heaters = []
+
+                BOWname = "BOW" + str(child.attrib["systemId"])
+
+                for bow in config_data["Backyard"]["BOWS"]:
+                    if child.attrib["systemId"] == bow["System-Id"]:
+                        bow_item = bow
+
+                BOW = dict(child.attrib)
+            BOW["Name"] = bow_item["Name"]
+            BOW["Supports-Spillover"] = bow_item["Supports-Spillover"]
+
+        elif child.tag == "Relay" and BOWname == "":
+            this_relay = dict(child.attrib)
+            for relay in config_data.get("Relays",[]):
+                if this_relay["systemId"] == relay["System-Id"]:
+                    this_relay["Name"] = relay["Name"]
+                    this_relay["Type"] = relay["Type"]
+                    this_relay["Function"] = relay["Function"]
+                    this_relay["Alarms"] = []
+            if "Alarms" in this_relay:
+                for alarm in site_alarms:
+                    if alarm["EquipmentID"] == this_relay["systemId"]:
+                        this_relay["Alarms"].append(alarm)
+
+            relays.append(this_relay)
+
+        elif child.tag == "ColorLogic-Light":
+            this_light = dict(child.attrib)
+            for light in bow_item.get("Lights",[]):
+                if this_light["systemId"] == light["System-Id"]:
+                    this_light["Name"] = light["Name"]
+                    this_light["Type"] = light["Type"]
+                    this_light["V2"] = light["V2-Active"]
+                    this_light["Alarms"] = []
+            if "Alarms" in this_light:
+                for alarm in site_alarms:
+                    if bow_item["System-Id"] == alarm["BowID"] and this_light["systemId"] == alarm["EquipmentID"]:
+                        this_light["Alarms"].append(alarm)
+
+            bow_lights.append(this_light)
+
+        elif child.tag == "Relay":
+            this_relay = dict(child.attrib)
+            for relay in bow_item.get("Relays",[]):
+                if this_relay["systemId"] == relay["System-Id"]:
+                    this_relay["Name"] = relay["Name"]
+                    this_relay["Type"] = relay["Type"]
+                    this_relay["Function"] = relay["Function"]
+                    this_relay["Alarms"] = []
+            if "Alarms" in this_relay:
+                for alarm in site_alarms:
+                    if bow_item["System-Id"] == alarm["BowID"] and this_relay["systemId"] == alarm["EquipmentID"]:
+                        this_relay["Alarms"].append(alarm)
+
+            bow_relays.append(this_relay)
+
+        elif child.tag == "Chlorinator":
+            this_chlorinator = dict(child.attrib)
+            this_chlorinator["Name"] = bow_item["Chlorinator"]["Name"]
+            this_chlorinator["Shared-Type"] = bow_item["Chlorinator"]["Shared-Type"]
+            this_chlorinator["Operation"] = []
+            this_chlorinator["Alarms"] = []
+
+            if type(bow_item["Chlorinator"]["Operation"]) == dict:
+                this_chlorinator["Operation"].append(bow_item["Chlorinator"]["Operation"]["Chlorinator-Equipment"])
+            else:
+                for equipment in bow_item["Chlorinator"]["Operation"]:
+                    this_chlorinator["Operation"].append(equipment)
+
+            for alarm in site_alarms:
+                if bow_item["System-Id"] == alarm["BowID"] and this_chlorinator["systemId"] == alarm["EquipmentID"]:
+                    this_chlorinator["Alarms"].append(alarm)
+
+            BOW[child.tag] = this_chlorinator
+
+        elif child.tag == "Filter":
+            this_filter = dict(child.attrib)
+            this_filter["Name"] = bow_item["Filter"]["Name"]
+            this_filter["Shared-Type"] = bow_item["Filter"]["Shared-Type"]
+            this_filter["Filter-Type"] = bow_item["Filter"]["Filter-Type"]
+            this_filter["Max-Pump-Speed"] = bow_item["Filter"]["Max-Pump-Speed"]
+            this_filter["Min-Pump-Speed"] = bow_item["Filter"]["Min-Pump-Speed"]
+            this_filter["Max-Pump-RPM"] = bow_item["Filter"]["Max-Pump-RPM"]
+            this_filter["Min-Pump-RPM"] = bow_item["Filter"]["Min-Pump-RPM"]
+            this_filter["Priming-Enabled"] = bow_item["Filter"]["Priming-Enabled"]
+            this_filter["Alarms"] = []
+
+            for alarm in site_alarms:
+                if bow_item["System-Id"] == alarm["BowID"] and this_filter["systemId"] == alarm["EquipmentID"]:
+                    this_filter["Alarms"].append(alarm)
+
+            BOW[child.tag] = this_filter
+
+        elif child.tag == "Pump":
+            this_pump = dict(child.attrib)
+
+            if type(bow_item["Pump"]) == dict:
+              this_pump["Name"] = bow_item["Pump"]["Name"]
+              this_pump["Type"] = bow_item["Pump"]["Type"]
+              this_pump["Function"] = bow_item["Pump"]["Function"]
+              this_pump["Min-Pump-Speed"] = bow_item["Pump"]["Min-Pump-Speed"]
+              this_pump["Max-Pump-Speed"] = bow_item["Pump"]["Max-Pump-Speed"]
+              this_pump["Alarms"] = []
+
+              for alarm in site_alarms:
+                  if bow_item["System-Id"] == alarm["BowID"] and this_pump["systemId"] == alarm["EquipmentID"]:
+                      this_pump["Alarms"].append(alarm)
+            else:
+              for pump in bow_item["Pump"]:
+                #Find the right pump
+                if pump["System-Id"] == this_pump["systemId"]:
+                  this_pump["Name"] = pump["Name"]
+                  this_pump["Type"] = pump["Type"]
+                  this_pump["Function"] = pump["Function"]
+                  this_pump["Min-Pump-Speed"] = pump["Min-Pump-Speed"]
+                  this_pump["Max-Pump_Speed"] = pump["Max-Pump-Speed"]
+                  this_pump["Alarms"] = []
+
+                  for alarm in site_alarms:
+                      if bow_item["System-Id"] == alarm["BowID"] and this_pump["systemId"] == alarm["EquipmentID"]:
+                          this_pump["Alarms"].append(alarm)
+
+            bow_pumps.append(this_pump)
+
+        elif child.tag == "Heater":
+            this_heater = dict(child.attrib)
+
+            for heater in bow_item["Heaters"]:
+                if this_heater["systemId"] == heater["Operation"]["Heater-Equipment"]["System-Id"]:
+                    this_heater["Shared-Type"] = heater["Shared-Type"]
+                    this_heater["Operation"] = {}
+                    this_heater["Operation"]["VirtualHeater"] = dict(heater["Operation"]["Heater-Equipment"])
+                    this_heater["Operation"]["VirtualHeater"]["Current-Set-Point"] = heater["Current-Set-Point"]
+                    this_heater["Operation"]["VirtualHeater"]["Max-Water-Temp"] = heater["Max-Water-Temp"]
+                    this_heater["Operation"]["VirtualHeater"]["Min-Settable-Water-Temp"] = heater["Min-Settable-Water-Temp"]
+                    this_heater["Operation"]["VirtualHeater"]["Max-Settable-Water-Temp"] = heater["Max-Settable-Water-Temp"]
+                    this_heater["Operation"]["VirtualHeater"]["enable"] = heater["Operation"]["Heater-Equipment"]["Enabled"]
+                    this_heater["Operation"]["VirtualHeater"]["systemId"] = heater["System-Id"]
+                    this_heater["systemId"] = heater["Operation"]["Heater-Equipment"]["System-Id"]
+                    this_heater["Name"] = heater["Operation"]["Heater-Equipment"]["Name"]
+                    this_heater["Alarms"] = []
+                    for alarm in site_alarms:
+                        if bow_item["System-Id"] == alarm["BowID"] and this_heater["systemId"] == alarm["EquipmentID"]:
+                            this_heater["Alarms"].append(alarm)
+
+            bow_heaters.append(this_heater)
+
+            BOW[child.tag] = this_heater
+
+        elif child.tag == "CSAD":
+            this_csad = dict(child.attrib)
+            this_csad["Alarms"] = []
+
+            for alarm in site_alarms:
+                if this_csad["systemId"] == alarm["EquipmentID"]:
+                    this_csad["Alarms"].append(alarm)
+
+            BOW[child.tag] = this_csad
+
+        else:
+            BOW[child.tag] = dict(child.attrib)
+
+    BOW["Lights"] = bow_lights
+    BOW["Relays"] = bow_relays
+    BOW["Pumps"] = bow_pumps
+    BOW["Heaters"] = bow_heaters
+    BOW_list.append(BOW)
+
+    backyard["BOWS"] = BOW_list
+
+    backyard_list.append(backyard)
+
+    return backyard
@@ -0,0 +1,226 @@
+"""
+Opt-in cProfile and tracemalloc capture for the OmniLogic client.
+
+Give one client a Profiler to profile its public calls without profiling the
+whole process:
+
+    from omnilogic.profiling import Profiler
+
+    api_client = OmniLogic(username, password, profiler=Profiler("profiles", sample_rate=0.1))
+
+or profile a block of calls with the client's profiling() context:
+
+    with api_client.profiling("profiles"):
+        await api_client.get_telemetry_data()
+
+Every sampled call writes a text report with the top functions by cumulative
+and own time and the top allocation sites, plus a .prof file for pstats or
+snakeviz. Inside an event loop only the tracemalloc snapshots are taken on the
+loop; comparing them and building and writing the report happen on the loop's
+default executor. Await flush() to wait for the reports in progress.
+
+A profiler captures one call at a time, so calls that start while its capture
+is running, such as get_site_list inside get_telemetry_data, are not profiled
+separately. Profilers of different clients capture independently as far as
+cProfile allows: it hooks into one thread at a time before Python 3.12 and the
+whole process from 3.12 on, and a call that finds it taken is skipped.
+tracemalloc is shared, so captures that overlap see each other's allocations.
+Other tasks that run on the event loop while a profiled call is waiting on the
+network show up in its profile.
+"""
+
+import asyncio
+import contextlib
+import cProfile
+import io
+import logging
+import os
+import pstats
+import random
+import sys
+import threading
+import time
+import tracemalloc
+
+_LOGGER = logging.getLogger("omnilogic")
+
+# Captures relying on tracemalloc started here; the last one to finish stops it
+_tracing_lock = threading.Lock()
+_tracing_captures = 0
+
+
+def _start_tracing(frames):
+    """ Start tracemalloc for a capture unless someone else traces; True if _stop_tracing must follow """
+    global _tracing_captures
+
+    with _tracing_lock:
+        if _tracing_captures == 0:
+            if tracemalloc.is_tracing():
+                return False
+            tracemalloc.start(frames)
+        _tracing_captures += 1
+        return True
+
+
+def _stop_tracing():
+    global _tracing_captures
+
+    with _tracing_lock:
+        _tracing_captures -= 1
+        if _tracing_captures == 0:
+            tracemalloc.stop()
+
+
+def _profiler_active():
+    """ Whether a profiler is already hooked in where cProfile would go """
+    monitoring = getattr(sys, "monitoring", None)
+    if monitoring is not None:
+        return monitoring.get_tool(monitoring.PROFILER_ID) is not None
+    return sys.getprofile() is not None
+
+
+class Profiler:
+    """ Writes a cProfile and tracemalloc report for a sample of calls.
+
+    Args:
+        directory (str): Where reports are written, created if needed.
+        sample_rate (float): Share of calls to profile, from 0 to 1.
+        top (int): Number of functions and allocation sites in each report.
+        memory (bool): Also record allocations with tracemalloc.
+        frames (int): Traceback depth tracemalloc keeps when started here.
+        label (str): Added to report file names, e.g. to tell accounts apart.
+    """
+
+    def __init__(self, directory, sample_rate=1.0, top=25, memory=True, frames=1, label=None, seed=None):
+        self.directory = directory
+        self.sample_rate = sample_rate
+        self.top = top
+        self.memory = memory
+        self.frames = frames
+        self.label = label
+        self.captured = 0
+        self.skipped = 0
+        self.reports = []
+        self._capturing = False
+        self._pending = set()
+        self._random = random.Random(seed)
+
+    def _sampled(self):
+        return self.sample_rate >= 1 or self._random.random() < self.sample_rate
+
+    @contextlib.contextmanager
+    def capture(self, operation):
+        """ Profile the block if it is sampled, unless this profiler or another one is busy """
+        busy = self._capturing or _profiler_active()
+        if busy or not self._sampled():
+            if busy:
+                self.skipped += 1
+            yield None
+            return
+
+        self._capturing = True
+        traced = self.memory and _start_tracing(self.frames)
+        try:
+            before = tracemalloc.take_snapshot() if self.memory else None
+            profile = cProfile.Profile()
+            try:
+                profile.enable()
+            except ValueError:
+                # Another thread took the process-wide profiler since the check
+                self.skipped += 1
+                yield None
+                return
+
+            cpu_started = time.process_time()
+            started = time.perf_counter()
+            try:
+                yield profile
+            finally:
+                profile.disable()
+                elapsed = time.perf_counter() - started
+                cpu = time.process_time() - cpu_started
+                # Only the snapshot is taken here; comparing it with the first one is left to _write
+                after = tracemalloc.take_snapshot() if self.memory else None
+                self._submit(operation, elapsed, cpu, profile, before, after)
+        finally:
+            if traced:
+                _stop_tracing()
+            self._capturing = False
+
+    def _submit(self, operation, elapsed, cpu, profile, before, after):
+        self.captured += 1
+        capture = (operation, self.captured, elapsed, cpu, profile, before, after)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        if loop is None:
+            self._write(*capture)
+        else:
+            # Building and writing the report would block the event loop
+            future = loop.run_in_executor(None, self._write, *capture)
+            self._pending.add(future)
+            future.add_done_callback(self._done)
+
+    def _done(self, future):
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            _LOGGER.error(f"Error writing profile report: {future.exception()}")
+
+    async def flush(self):
+        """ Wait until the reports of the captures so far are written """
+        while self._pending:
+            await asyncio.wait(list(self._pending))
+
+    def _write(self, operation, number, elapsed, cpu, profile, before, after):
+        os.makedirs(self.directory, exist_ok=True)
+        parts = [time.strftime("%Y%m%d-%H%M%S"), f"{number:04d}", operation]
+        if self.label:
+            parts.insert(2, self.label)
+        base = os.path.join(self.directory, "-".join(parts))
+
+        profile.dump_stats(base + ".prof")
+        with open(base + ".txt", "w") as f:
+            f.write(self.report(operation, elapsed, cpu, profile, before, after))
+
+        self.reports.append(base + ".txt")
+        return base + ".txt"
+
+    def report(self, operation, elapsed, cpu, profile, before=None, after=None):
+        """ Text summary of one capture """
+        lines = [
+            f"operation: {operation}",
+            f"label: {self.label or '-'}",
+            f"wall time: {elapsed * 1000:.2f} ms",
+            f"cpu time: {cpu * 1000:.2f} ms",
+            "",
+        ]
+
+        for sort, title in (("cumulative", "cumulative time"), ("tottime", "own time")):
+            stream = io.StringIO()
+            stats = pstats.Stats(profile, stream=stream)
+            stats.sort_stats(sort).print_stats(self.top)
+            lines.append(f"Top {self.top} functions by {title}")
+            lines.append(_pstats_table(stream.getvalue()))
+            lines.append("")
+
+        if before is not None and after is not None:
+            lines.append(f"Top {self.top} allocation sites")
+            lines.append(f"{'size KiB':>10} {'blocks':>8}  location")
+            ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+            diff = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+            for stat in [stat for stat in diff if stat.size_diff > 0][:self.top]:
+                frame = stat.traceback[0]
+                lines.append(f"{stat.size_diff / 1024:>10.1f} {stat.count_diff:>8}  {frame.filename}:{frame.lineno}")
+            lines.append("")
+
+        return "\n".join(lines)
+
+
+def _pstats_table(output):
+    """ Drop the preamble pstats prints before the table """
+    lines = output.splitlines()
+    for index, line in enumerate(lines):
+        if line.lstrip().startswith("ncalls"):
+            return "\n".join(lines[index:]).rstrip()
+    return output.rstrip()
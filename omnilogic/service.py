@@ -0,0 +1,179 @@
+"""
+Scaffolding shared by the long-running services and the command line tools.
+
+PollingService polls a client on its own schedule and serves what it gets over
+HTTP; FanoutServer and PrometheusExporter build on it. The credential and
+argument helpers back their `python -m` entry points as well as the omnilogic
+command, so they all take credentials the same way:
+
+- --credentials, a JSON file with "username" and "password";
+- otherwise the OMNILOGIC_USERNAME and OMNILOGIC_PASSWORD environment variables.
+
+--api-url points the client at another API, such as the load test stand-in.
+"""
+
+import argparse
+import asyncio
+import json
+import logging
+import os
+
+_LOGGER = logging.getLogger("omnilogic")
+
+USERNAME_VARIABLE = "OMNILOGIC_USERNAME"
+PASSWORD_VARIABLE = "OMNILOGIC_PASSWORD"
+
+
+class CredentialsError(Exception):
+    """ No usable credentials were given """
+
+
+def read_credentials(path=None, environ=os.environ):
+    """ (username, password) from a JSON file, or from the environment when path is None """
+    if path is not None:
+        try:
+            with open(path) as f:
+                credentials = json.load(f)
+        except (OSError, ValueError) as e:
+            raise CredentialsError(f"Can't read credentials from {path}: {e}")
+        missing = [key for key in ("username", "password") if not isinstance(credentials, dict) or not credentials.get(key)]
+        if missing:
+            raise CredentialsError(f"{path} has no {' or '.join(missing)}")
+        return credentials["username"], credentials["password"]
+
+    username = environ.get(USERNAME_VARIABLE)
+    password = environ.get(PASSWORD_VARIABLE)
+    if not username or not password:
+        raise CredentialsError(f"Set {USERNAME_VARIABLE} and {PASSWORD_VARIABLE} or pass --credentials")
+    return username, password
+
+
+def add_client_arguments(parser):
+    parser.add_argument("--credentials", help='JSON file with "username" and "password"')
+    parser.add_argument("--api-url", help="base URL of another API, e.g. a load test stand-in")
+
+
+def client_from_args(args, **kwargs):
+    """ OmniLogic client for the --credentials and --api-url arguments; raises CredentialsError """
+    from .client import OmniLogic
+
+    username, password = read_credentials(args.credentials)
+    client = OmniLogic(username, password, **kwargs)
+    if args.api_url:
+        from .loadtest import API_PATH, AUTH_PATH, REFRESH_PATH
+
+        base = args.api_url.rstrip("/")
+        client.api_url = base + API_PATH
+        client.auth_url = base + AUTH_PATH
+        client.refresh_url = base + REFRESH_PATH
+    return client
+
+
+def add_service_arguments(parser, interval, host, port):
+    parser.add_argument("--interval", type=float, default=interval, help="seconds between cloud polls")
+    parser.add_argument("--host", default=host)
+    parser.add_argument("--port", type=int, default=port)
+
+
+class PollingService:
+    """ Polls a client on its own schedule and serves the results over HTTP.
+
+    Subclasses add their routes in _routes(app) and take each site's telemetry
+    in _received(site).
+
+    Args:
+        client (OmniLogic): Client to poll, the only one talking to the cloud.
+        interval (float): Seconds between the start of one poll and the next.
+        host (str): Interface to listen on.
+        port (int): Port to listen on, 0 for any free port.
+    """
+
+    # Used in log messages
+    name = "Service"
+
+    def __init__(self, client, interval, host, port):
+        self.client = client
+        self.interval = interval
+        self.host = host
+        self.port = port
+        self.url = None
+        self._runner = None
+        self._poller = None
+
+    def _routes(self, app):
+        raise NotImplementedError
+
+    def _received(self, site):
+        raise NotImplementedError
+
+    def _stopping(self):
+        """ Called once polling has stopped, before the server shuts down """
+
+    async def _poll(self):
+        while True:
+            try:
+                async for site in self.client.stream_telemetry(interval=self.interval):
+                    self._received(site)
+                return
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                _LOGGER.error(f"{self.name} poll failed: {e}")
+                await asyncio.sleep(self.interval)
+
+    async def start(self):
+        from aiohttp import web
+
+        app = web.Application()
+        self._routes(app)
+        self._runner = web.AppRunner(app, access_log=None)
+        await self._runner.setup()
+        await web.TCPSite(self._runner, self.host, self.port).start()
+        self.url = f"http://{self.host}:{self._runner.addresses[0][1]}"
+        self._poller = asyncio.ensure_future(self._poll())
+        return self.url
+
+    async def stop(self):
+        if self._poller is not None:
+            self._poller.cancel()
+            try:
+                await self._poller
+            except asyncio.CancelledError:
+                pass
+            self._poller = None
+        self._stopping()
+        if self._runner is not None:
+            await self._runner.cleanup()
+            self._runner = None
+
+
+async def run_service(service, banner):
+    """ Run a PollingService until cancelled, then close its client; banner is formatted with the url """
+    url = await service.start()
+    print(banner.format(url=url), flush=True)
+    try:
+        while True:
+            await asyncio.sleep(3600)
+    finally:
+        await service.stop()
+        await service.client.close()
+
+
+def run_until_interrupted(coroutine):
+    try:
+        asyncio.run(coroutine)
+    except KeyboardInterrupt:
+        pass
+
+
+def service_main(prog, description, add_arguments, serve_from_args, argv=None, **client_options):
+    """ `python -m` entry point of a service module """
+    parser = argparse.ArgumentParser(prog=prog, description=description)
+    add_arguments(parser)
+    add_client_arguments(parser)
+    args = parser.parse_args(argv)
+    try:
+        client = client_from_args(args, **client_options)
+    except CredentialsError as e:
+        parser.error(str(e))
+    serve_from_args(args, client)
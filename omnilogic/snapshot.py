@@ -0,0 +1,99 @@
+"""
+Warm-start snapshots of the client's last good config and telemetry.
+
+Give a client a snapshot path and it saves the normalized config and telemetry
+of every site after each poll. After a restart, warm_start() reads them back
+so consumers have data, marked stale, before login and the first poll finish:
+
+    api_client = OmniLogic(username, password, snapshot="omnilogic.snap")
+    telemetry = api_client.warm_start()       # disk read only
+    telemetry = await api_client.get_telemetry_data()
+
+The file is a small header (magic, schema version, payload length) followed by
+zlib-compressed JSON. Files with another schema version, a bad header or a
+truncated payload are ignored.
+"""
+
+import json
+import logging
+import os
+import struct
+import time
+import zlib
+
+_LOGGER = logging.getLogger("omnilogic")
+
+MAGIC = b"OLSN"
+SCHEMA_VERSION = 1
+
+_HEADER = struct.Struct(">4sHI")
+
+
+def encode_snapshot(configs, telemetry, saved=None):
+    """ Serialize {MspSystemID: config} and {MspSystemID: telemetry} into snapshot bytes """
+    sites = {}
+    for site_id in set(configs) | set(telemetry):
+        sites[str(site_id)] = {"config": configs.get(site_id), "telemetry": telemetry.get(site_id)}
+
+    document = {"saved": time.time() if saved is None else saved, "sites": sites}
+    payload = zlib.compress(json.dumps(document, separators=(",", ":"), default=str).encode(), 6)
+    return _HEADER.pack(MAGIC, SCHEMA_VERSION, len(payload)) + payload
+
+
+def decode_snapshot(data):
+    """ Parse snapshot bytes into (saved timestamp, {MspSystemID: config}, {MspSystemID: telemetry}) """
+    if len(data) < _HEADER.size:
+        raise ValueError("Snapshot is truncated")
+
+    magic, version, length = _HEADER.unpack_from(data)
+    if magic != MAGIC:
+        raise ValueError("Not an OmniLogic snapshot")
+    if version != SCHEMA_VERSION:
+        raise ValueError(f"Unsupported snapshot schema version {version}")
+
+    payload = data[_HEADER.size:]
+    if len(payload) != length:
+        raise ValueError("Snapshot is truncated")
+
+    document = json.loads(zlib.decompress(payload))
+    configs = {}
+    telemetry = {}
+    for site_id, site in document["sites"].items():
+        if site.get("config") is not None:
+            configs[int(site_id)] = site["config"]
+        if site.get("telemetry") is not None:
+            telemetry[int(site_id)] = site["telemetry"]
+    return document["saved"], configs, telemetry
+
+
+class SnapshotStore:
+    """ Reads and atomically replaces one snapshot file """
+
+    def __init__(self, path):
+        self.path = path
+        self.saves = 0
+
+    def load(self):
+        """ (saved timestamp, configs, telemetry) from the file, or None if it is missing or unusable """
+        try:
+            with open(self.path, "rb") as f:
+                data = f.read()
+        except FileNotFoundError:
+            return None
+        except OSError as e:
+            _LOGGER.warning(f"Could not read snapshot {self.path}: {e}")
+            return None
+
+        try:
+            return decode_snapshot(data)
+        except (ValueError, KeyError, zlib.error) as e:
+            _LOGGER.warning(f"Ignoring snapshot {self.path}: {e}")
+            return None
+
+    def write(self, data):
+        """ Write encoded snapshot bytes, replacing the previous file only once they are on disk """
+        temporary = f"{self.path}.tmp"
+        with open(temporary, "wb") as f:
+            f.write(data)
+        os.replace(temporary, self.path)
+        self.saves += 1
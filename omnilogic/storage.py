@@ -0,0 +1,261 @@
+"""
+SQLite persistence of telemetry and alarms.
+
+Attach a SQLiteSink to a client and every get_telemetry_data poll is stored
+as one batch: the normalized snapshot of each site, the numeric samples from
+its telemetry and alarms that were raised or cleared since the previous poll.
+
+    from omnilogic.storage import SQLiteSink
+
+    sink = SQLiteSink("pool.db", retention=30 * 86400)
+    api_client = OmniLogic(username, password, sink=sink)
+    ...
+    await sink.close()
+
+Each batch is written in a single transaction on the sink's own thread, so
+polling never waits on the disk. Retention pruning runs on the same thread in
+small chunks, so poll writes queued in the meantime are not held up behind a
+large delete.
+"""
+
+import asyncio
+import concurrent.futures
+import json
+import logging
+import sqlite3
+import time
+
+from .history import DEFAULT_HISTORY_ATTRIBUTES, numeric_samples
+
+_LOGGER = logging.getLogger("omnilogic")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS snapshots (
+    site_id INTEGER NOT NULL,
+    ts REAL NOT NULL,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS snapshots_site_ts ON snapshots (site_id, ts);
+CREATE INDEX IF NOT EXISTS snapshots_ts ON snapshots (ts);
+
+CREATE TABLE IF NOT EXISTS samples (
+    site_id INTEGER NOT NULL,
+    equipment_id INTEGER NOT NULL,
+    attribute TEXT NOT NULL,
+    ts REAL NOT NULL,
+    value REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS samples_series_ts ON samples (site_id, equipment_id, attribute, ts);
+CREATE INDEX IF NOT EXISTS samples_ts ON samples (ts);
+
+CREATE TABLE IF NOT EXISTS alarm_events (
+    site_id INTEGER NOT NULL,
+    equipment_id INTEGER,
+    bow_id INTEGER,
+    ts REAL NOT NULL,
+    event TEXT NOT NULL,
+    criticality TEXT,
+    message TEXT
+);
+CREATE INDEX IF NOT EXISTS alarm_events_site_equipment_ts ON alarm_events (site_id, equipment_id, ts);
+CREATE INDEX IF NOT EXISTS alarm_events_ts ON alarm_events (ts);
+"""
+
+_PRUNED_TABLES = ("snapshots", "samples", "alarm_events")
+
+
+def _int_or_none(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def _alarm_key(alarm):
+    return (
+        _int_or_none(alarm.get("EquipmentID")),
+        _int_or_none(alarm.get("BowID")),
+        alarm.get("CriticalityType"),
+        alarm.get("Message"),
+    )
+
+
+class SQLiteSink:
+    """ Batched, off-loop writer of telemetry polls into SQLite.
+
+    Args:
+        path (str): Database file, created with the schema if needed.
+        retention (float): Seconds of data to keep, None to keep everything.
+        prune_interval (float): Seconds between retention runs.
+        prune_chunk (int): Rows deleted per transaction while pruning.
+        attributes (set): Telemetry attributes stored as samples, None for every numeric attribute.
+        snapshots (bool): Also store each site's normalized telemetry as JSON.
+    """
+
+    def __init__(self, path, retention=None, prune_interval=3600, prune_chunk=5000,
+                 attributes=DEFAULT_HISTORY_ATTRIBUTES, snapshots=True):
+        self.path = path
+        self.retention = retention
+        self.prune_interval = prune_interval
+        self.prune_chunk = prune_chunk
+        self.attributes = attributes
+        self.snapshots = snapshots
+        self.batches = 0
+        self.rows = 0
+        self.pruned = 0
+        self.errors = 0
+        self._last_prune = 0
+        self._pruning = False
+        self._alarms = {}
+        self._pending = set()
+        self._connection = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers=1, thread_name_prefix="omnilogic-sqlite")
+
+    def _db(self):
+        """ The connection, opened by the first job on the sink's thread so the caller never waits for it """
+        if self._connection is None:
+            connection = sqlite3.connect(self.path, check_same_thread=False)
+            connection.execute("PRAGMA journal_mode=WAL")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            connection.executescript(SCHEMA)
+            connection.commit()
+            self._connection = connection
+        return self._connection
+
+    def _submit(self, func, *args):
+        future = self._executor.submit(func, *args)
+        self._pending.add(future)
+        future.add_done_callback(self._done)
+        return future
+
+    def _done(self, future):
+        self._pending.discard(future)
+        if not future.cancelled() and future.exception() is not None:
+            self.errors += 1
+            _LOGGER.error("SQLite sink write failed: %s", future.exception())
+
+    def submit_poll(self, polled, timestamp=None):
+        """ Queue one poll cycle for writing and return without waiting.
+
+        polled is a list of (MspSystemID, normalized telemetry dict, telemetry
+        XML) for the sites that returned fresh data. Snapshots are serialized
+        and alarms compared here, since the caller may go on to change the
+        dicts; pulling samples out of the XML and writing happen on the sink's
+        thread. Returns a concurrent.futures.Future for the write.
+        """
+        timestamp = time.time() if timestamp is None else timestamp
+        snapshots = []
+        events = []
+        parsed = []
+
+        for site_id, telemetry, telemetryXML in polled:
+            site_id = int(site_id)
+
+            if self.snapshots:
+                snapshots.append((site_id, timestamp, json.dumps(telemetry, default=str)))
+            if telemetryXML is not None:
+                parsed.append((site_id, telemetryXML))
+
+            current = {_alarm_key(alarm) for alarm in telemetry.get("Alarms") or () if alarm.get("Message")}
+            previous = self._alarms.get(site_id, set())
+            for event, keys in (("raised", current - previous), ("cleared", previous - current)):
+                for equipment_id, bow_id, criticality, message in sorted(keys, key=str):
+                    events.append((site_id, equipment_id, bow_id, timestamp, event, criticality, message))
+            self._alarms[site_id] = current
+
+        future = self._submit(self._write_poll, snapshots, parsed, events, timestamp)
+
+        if self.retention is not None and not self._pruning and timestamp - self._last_prune >= self.prune_interval:
+            self._last_prune = timestamp
+            self.prune(timestamp - self.retention)
+
+        return future
+
+    def _write_poll(self, snapshots, parsed, events, timestamp):
+        samples = [
+            (site_id, equipment_id, name, timestamp, value)
+            for site_id, telemetryXML in parsed
+            for equipment_id, _, name, value in numeric_samples(telemetryXML, self.attributes)
+        ]
+
+        connection = self._db()
+        with connection:
+            connection.executemany("INSERT INTO snapshots VALUES (?, ?, ?)", snapshots)
+            connection.executemany("INSERT INTO samples VALUES (?, ?, ?, ?, ?)", samples)
+            connection.executemany("INSERT INTO alarm_events VALUES (?, ?, ?, ?, ?, ?, ?)", events)
+
+        self.batches += 1
+        self.rows += len(snapshots) + len(samples) + len(events)
+
+    def _prune_chunk(self, cutoff, table_index):
+        """ Delete one chunk of expired rows, then queue the next chunk behind any pending writes """
+        try:
+            table = _PRUNED_TABLES[table_index]
+            connection = self._db()
+            with connection:
+                deleted = connection.execute(
+                    f"DELETE FROM {table} WHERE rowid IN (SELECT rowid FROM {table} WHERE ts < ? LIMIT ?)",
+                    (cutoff, self.prune_chunk),
+                ).rowcount
+            self.pruned += deleted
+
+            if deleted < self.prune_chunk:
+                table_index += 1
+            if table_index < len(_PRUNED_TABLES):
+                self._submit(self._prune_chunk, cutoff, table_index)
+                return
+        except BaseException:
+            self._pruning = False
+            raise
+        self._pruning = False
+
+    def prune(self, cutoff):
+        """ Queue deletion of everything older than cutoff (a timestamp) """
+        self._pruning = True
+        return self._submit(self._prune_chunk, cutoff, 0)
+
+    async def flush(self):
+        """ Wait until every queued write and prune has finished """
+        while self._pending:
+            await asyncio.wait([asyncio.wrap_future(future) for future in list(self._pending)])
+
+    def _query(self, sql, params):
+        return self._db().execute(sql, params).fetchall()
+
+    async def query(self, sql, params=()):
+        """ Run a read query on the sink's thread, after the writes queued before it """
+        return await asyncio.wrap_future(self._executor.submit(self._query, sql, params))
+
+    async def samples(self, MspSystemID, equipment_id, attribute, start=None, end=None):
+        """ (ts, value) rows of one series, oldest first """
+        return await self.query(
+            "SELECT ts, value FROM samples WHERE site_id = ? AND equipment_id = ? AND attribute = ? "
+            "AND ts >= ? AND ts <= ? ORDER BY ts",
+            (int(MspSystemID), int(equipment_id), attribute,
+             float("-inf") if start is None else start, float("inf") if end is None else end),
+        )
+
+    async def alarm_events(self, MspSystemID, start=None):
+        """ (ts, event, equipment_id, bow_id, criticality, message) rows for a site, oldest first """
+        return await self.query(
+            "SELECT ts, event, equipment_id, bow_id, criticality, message FROM alarm_events "
+            "WHERE site_id = ? AND ts >= ? ORDER BY ts",
+            (int(MspSystemID), float("-inf") if start is None else start),
+        )
+
+    async def latest_snapshot(self, MspSystemID):
+        rows = await self.query(
+            "SELECT data FROM snapshots WHERE site_id = ? ORDER BY ts DESC LIMIT 1", (int(MspSystemID),)
+        )
+        return json.loads(rows[0][0]) if rows else None
+
+    async def close(self):
+        """ Wait for the queued writes, then close the database and the sink's thread """
+        await self.flush()
+        await asyncio.wrap_future(self._executor.submit(self._close))
+        self._executor.shutdown()
+
+    def _close(self):
+        if self._connection is not None:
+            self._connection.close()
+            self._connection = None
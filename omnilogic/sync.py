@@ -0,0 +1,122 @@
+"""
+Synchronous facade over the OmniLogic client.
+
+SyncOmniLogic runs one event loop in a background thread and sends every call
+to it, so scripts and threaded services can use the client without asyncio.
+The session, its keep-alive connections, the token and the caches live as long
+as the facade and are shared by every thread that uses it:
+
+    from omnilogic.sync import SyncOmniLogic
+
+    with SyncOmniLogic(username, password) as api_client:
+        telemetry = api_client.get_telemetry_data()
+        for site in api_client.stream_telemetry(interval=30):
+            ...
+
+Calls from several threads run concurrently on the loop. Every method runs on
+the loop thread, so the client is never touched from two threads at once.
+"""
+
+import asyncio
+import concurrent.futures
+import functools
+import inspect
+import threading
+
+from .client import OmniLogic
+
+
+class SyncOmniLogic:
+    """ Blocking proxy for an OmniLogic client running on its own event-loop thread.
+
+    Takes the same arguments as OmniLogic, plus timeout: seconds a call may
+    block its caller before concurrent.futures.TimeoutError, None to wait for
+    the client's own timeouts. A call that times out is cancelled on the loop.
+    """
+
+    def __init__(self, username, password, timeout=None, **kwargs):
+        self.timeout = timeout
+        self._loop = asyncio.new_event_loop()
+        self._thread = threading.Thread(target=self._loop.run_forever, name="omnilogic-loop", daemon=True)
+        self._thread.start()
+        self._client = self._run(self._create(username, password, kwargs))
+
+    @staticmethod
+    async def _create(username, password, kwargs):
+        # Built on the loop thread, so anything the client binds to a loop binds to this one
+        return OmniLogic(username, password, **kwargs)
+
+    @property
+    def client(self):
+        """ The wrapped OmniLogic client, only to be used from the loop thread """
+        return self._client
+
+    @property
+    def loop(self):
+        return self._loop
+
+    def _run(self, coroutine):
+        if self._loop.is_closed():
+            coroutine.close()
+            raise RuntimeError("SyncOmniLogic is closed")
+        future = asyncio.run_coroutine_threadsafe(coroutine, self._loop)
+        try:
+            return future.result(self.timeout)
+        except concurrent.futures.TimeoutError:
+            # Otherwise it keeps running, and a command could still be sent after the caller gave up
+            future.cancel()
+            raise
+
+    def __getattr__(self, name):
+        if name.startswith("_"):
+            raise AttributeError(name)
+
+        attribute = getattr(self._client, name)
+        if inspect.isasyncgenfunction(attribute):
+            return functools.partial(self._iterate, attribute)
+        if inspect.iscoroutinefunction(attribute):
+            @functools.wraps(attribute)
+            def call(*args, **kwargs):
+                return self._run(attribute(*args, **kwargs))
+            return call
+        if inspect.ismethod(attribute):
+            @functools.wraps(attribute)
+            def call(*args, **kwargs):
+                return self._run(_call(attribute, args, kwargs))
+            return call
+        return attribute
+
+    def _iterate(self, method, *args, **kwargs):
+        """ Drive an async generator method from the calling thread, one item at a time """
+        generator = method(*args, **kwargs)
+        try:
+            while True:
+                try:
+                    yield self._run(generator.__anext__())
+                except StopAsyncIteration:
+                    return
+        finally:
+            if not self._loop.is_closed():
+                self._run(generator.aclose())
+
+    def close(self):
+        """ Close the client's session and stop the loop thread """
+        if self._loop.is_closed():
+            return
+        try:
+            self._run(self._client.close())
+        finally:
+            self._loop.call_soon_threadsafe(self._loop.stop)
+            self._thread.join()
+            self._loop.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+        return False
+
+
+async def _call(func, args, kwargs):
+    return func(*args, **kwargs)
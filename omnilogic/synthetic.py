@@ -0,0 +1,315 @@
+"""
+Synthetic OmniLogic installations for scaling tests and benchmarks.
+
+SyntheticSite lays out a backyard of any size and shape and renders matching
+GetMspConfigFile, GetTelemetryData and GetAlarmList response bodies for it, so
+the parsers can be exercised well beyond the single recorded fixture.
+"""
+
+import random
+from xml.etree.ElementTree import Element, SubElement, tostring
+
+
+def _add(parent, tag, text=None, **attrib):
+    element = SubElement(parent, tag, attrib)
+    if text is not None:
+        element.text = str(text)
+    return element
+
+
+def _add_fields(parent, tag, fields):
+    element = SubElement(parent, tag)
+    for name, value in fields:
+        _add(element, name, value)
+    return element
+
+
+class SyntheticSite:
+    """ One backyard with a configurable number of bodies of water and equipment.
+
+    Args:
+        msp_system_id (int): MspSystemID of the site
+        name (str): BackyardName
+        bows (int): Bodies of water. A single one is rendered the way Hayward
+            does, which the parsers see as a dict rather than a list
+        relays (int): Relays per body of water
+        lights (int): ColorLogic lights per body of water
+        pumps (int): Pumps per body of water
+        heaters (int): Heater equipment per body of water. More than one gives
+            the virtual heater a multi-entry Operation list
+        alarms (int): Active alarms, spread over the equipment
+        backyard_relays (int): Relays attached to the backyard rather than a body of water
+        v2_lights (bool): Mark the lights as V2 (speed and brightness capable)
+        csad (bool): Add a CSAD (pH/ORP) to every body of water
+        seed (int): Seed for the telemetry values
+    """
+
+    def __init__(self, msp_system_id=1, name="Synthetic", bows=1, relays=2, lights=2, pumps=1,
+                 heaters=1, alarms=0, backyard_relays=1, v2_lights=False, csad=True, seed=0):
+        self.msp_system_id = msp_system_id
+        self.name = name
+        self.bow_count = bows
+        self.relays = relays
+        self.lights = lights
+        self.pumps = pumps
+        self.heaters = heaters
+        self.alarm_count = alarms
+        self.backyard_relay_count = backyard_relays
+        self.v2_lights = v2_lights
+        self.csad = csad
+        self.seed = seed
+
+        self._next_id = 0
+        self.backyard_relays = [self._id() for _ in range(backyard_relays)]
+        self.air_sensor = self._id()
+        self.bows = [self._layout_bow(index) for index in range(bows)]
+
+    def _id(self):
+        self._next_id += 1
+        return self._next_id
+
+    def _layout_bow(self, index):
+        return {
+            "index": index,
+            "System-Id": self._id(),
+            "filter": self._id(),
+            "virtual_heater": self._id(),
+            "heaters": [self._id() for _ in range(self.heaters)],
+            "chlorinator": self._id(),
+            "chlorinator_equipment": self._id(),
+            "csad": self._id() if self.csad else None,
+            "relays": [self._id() for _ in range(self.relays)],
+            "lights": [self._id() for _ in range(self.lights)],
+            "pumps": [self._id() for _ in range(self.pumps)],
+            "water_sensor": self._id(),
+        }
+
+    @property
+    def equipment_count(self):
+        return self._next_id
+
+    @property
+    def system(self):
+        """ The site entry as returned by get_site_list """
+        return {"MspSystemID": self.msp_system_id, "BackyardName": self.name}
+
+    def equipment(self):
+        """ (BowID, EquipmentID) of every piece of equipment that can raise an alarm """
+        items = [("0", system_id) for system_id in self.backyard_relays]
+        for bow in self.bows:
+            bow_id = str(bow["System-Id"])
+            items.append((bow_id, bow["filter"]))
+            items.extend((bow_id, system_id) for system_id in bow["heaters"])
+            items.append((bow_id, bow["chlorinator"]))
+            items.extend((bow_id, system_id) for system_id in bow["relays"] + bow["lights"] + bow["pumps"])
+        return items
+
+    def msp_config(self):
+        """ GetMspConfigFile response body """
+        response = Element("Response")
+        config = SubElement(response, "MSPConfig")
+        _add_fields(config, "System", [
+            ("Msp-Vsp-Speed-Format", "Percent"),
+            ("Msp-Time-Format", "12 Hour Format"),
+            ("Units", "Standard"),
+            ("Msp-Chlor-Display", "Salt"),
+            ("Msp-Language", "English"),
+        ])
+
+        backyard = SubElement(config, "Backyard")
+        _add(backyard, "System-Id", 0)
+        _add(backyard, "Name", "Backyard")
+        _add_fields(backyard, "Sensor", [
+            ("System-Id", self.air_sensor),
+            ("Name", "AirSensor"),
+            ("Type", "SENSOR_AIR_TEMP"),
+            ("Units", "UNITS_FAHRENHEIT"),
+        ])
+        for number, system_id in enumerate(self.backyard_relays, 1):
+            self._relay_config(backyard, system_id, f"Backyard Relay {number}")
+
+        for bow in self.bows:
+            self._bow_config(backyard, bow)
+
+        return tostring(response, encoding="unicode")
+
+    def _relay_config(self, parent, system_id, name):
+        _add_fields(parent, "Relay", [
+            ("System-Id", system_id),
+            ("Name", name),
+            ("Type", "RLY_HIGH_VOLTAGE_RELAY"),
+            ("Function", "RLY_WATER_FEATURE"),
+        ])
+
+    def _bow_config(self, backyard, bow):
+        number = bow["index"] + 1
+        element = SubElement(backyard, "Body-of-water")
+        _add(element, "System-Id", bow["System-Id"])
+        _add(element, "Name", "Pool" if number == 1 else f"Pool {number}")
+        _add(element, "Type", "BOW_POOL" if number % 2 else "BOW_SPA")
+        _add(element, "Shared-Type", "BOW_NO_EQUIPMENT_SHARED")
+        _add(element, "Supports-Spillover", "no")
+
+        _add_fields(element, "Filter", [
+            ("System-Id", bow["filter"]),
+            ("Name", "Filter Pump"),
+            ("Shared-Type", "BOW_NO_EQUIPMENT_SHARED"),
+            ("Filter-Type", "FMT_VARIABLE_SPEED_PUMP"),
+            ("Max-Pump-Speed", 100),
+            ("Min-Pump-Speed", 18),
+            ("Max-Pump-RPM", 3450),
+            ("Min-Pump-RPM", 600),
+            ("Priming-Enabled", "no"),
+        ])
+
+        heater = _add_fields(element, "Heater", [
+            ("System-Id", bow["virtual_heater"]),
+            ("Shared-Type", "BOW_NO_EQUIPMENT_SHARED"),
+            ("Enabled", "yes"),
+            ("Current-Set-Point", 82),
+            ("Max-Water-Temp", 104),
+            ("Min-Settable-Water-Temp", 65),
+            ("Max-Settable-Water-Temp", 104),
+        ])
+        if len(bow["heaters"]) > 1:
+            for function in ("PEO_INIT", "PEO_TEAR_DOWN"):
+                _add(heater, "Operation", function)
+        for number, system_id in enumerate(bow["heaters"], 1):
+            operation = _add(heater, "Operation", "PEO_HEATER_EQUIPMENT")
+            _add_fields(operation, "Heater-Equipment", [
+                ("System-Id", system_id),
+                ("Name", "Gas" if number == 1 else f"Heater {number}"),
+                ("Type", "PET_HEATER"),
+                ("Heater-Type", "HTR_GAS" if number == 1 else "HTR_HEAT_PUMP"),
+                ("Enabled", "yes"),
+            ])
+
+        chlorinator = _add_fields(element, "Chlorinator", [
+            ("System-Id", bow["chlorinator"]),
+            ("Name", "Chlorinator"),
+            ("Shared-Type", "BOW_NO_EQUIPMENT_SHARED"),
+            ("Enabled", "yes"),
+            ("Mode", "CHLOR_OP_MODE_TIMED"),
+            ("Timed-Percent", 50),
+            ("SuperChlor-Timeout", 24),
+            ("Cell-Type", "CELL_TYPE_T15"),
+            ("ORP-Timeout", 86400),
+        ])
+        operation = _add(chlorinator, "Operation", "PEO_CHLORINATOR_EQUIPMENT")
+        _add_fields(operation, "Chlorinator-Equipment", [
+            ("System-Id", bow["chlorinator_equipment"]),
+            ("Name", "Chlorinator1"),
+            ("Type", "PET_CHLORINATOR"),
+            ("Enabled", "yes"),
+        ])
+
+        if bow["csad"] is not None:
+            _add_fields(element, "CSAD", [
+                ("System-Id", bow["csad"]),
+                ("Name", "pH"),
+                ("Type", "ACID"),
+                ("Enabled", "yes"),
+            ])
+
+        for number, system_id in enumerate(bow["relays"], 1):
+            self._relay_config(element, system_id, f"Relay {number}")
+
+        for number, system_id in enumerate(bow["lights"], 1):
+            fields = [
+                ("System-Id", system_id),
+                ("Name", f"Light {number}"),
+                ("Type", "COLOR_LOGIC_UCL"),
+            ]
+            if self.v2_lights:
+                fields.append(("V2-Active", "yes"))
+            _add_fields(element, "ColorLogic-Light", fields)
+
+        _add_fields(element, "Sensor", [
+            ("System-Id", bow["water_sensor"]),
+            ("Name", "WaterSensor"),
+            ("Type", "SENSOR_WATER_TEMP"),
+            ("Units", "UNITS_FAHRENHEIT"),
+        ])
+
+        for number, system_id in enumerate(bow["pumps"], 1):
+            _add_fields(element, "Pump", [
+                ("System-Id", system_id),
+                ("Name", f"Pump {number}"),
+                ("Type", "PMP_VARIABLE_SPEED_PUMP"),
+                ("Function", "PMP_WATER_FEATURE"),
+                ("Min-Pump-Speed", 18),
+                ("Max-Pump-Speed", 100),
+            ])
+
+    def telemetry(self, tick=0):
+        """ GetTelemetryData response body. Sensor readings drift with tick; equipment state doesn't. """
+        rng = random.Random(hash((self.seed, self.msp_system_id, tick)))
+        status = Element("STATUS", version="1.11")
+        SubElement(status, "Backyard", systemId="0", statusVersion="11", airTemp=str(rng.randint(60, 95)),
+                   status="1", state="1")
+
+        for system_id in self.backyard_relays:
+            SubElement(status, "Relay", systemId=str(system_id), relayState="0")
+
+        for bow in self.bows:
+            SubElement(status, "BodyOfWater", systemId=str(bow["System-Id"]),
+                       waterTemp=str(rng.randint(70, 90)), flow="1")
+            SubElement(status, "Filter", systemId=str(bow["filter"]), valvePosition="1", filterSpeed="50",
+                       filterState="1", lastSpeed="50", whyFilterIsOn="14", reportedFilterSpeed="50",
+                       power=str(rng.randint(400, 900)), fpOverride="0")
+            SubElement(status, "VirtualHeater", systemId=str(bow["virtual_heater"]), enable="yes",
+                       whyHeaterIsOn="0")
+            for system_id in bow["heaters"]:
+                SubElement(status, "Heater", systemId=str(system_id), heaterState="0", temp="-1", enable="yes",
+                           priority="254", maintainFor="24")
+            SubElement(status, "Chlorinator", systemId=str(bow["chlorinator"]), status="68",
+                       instantSaltLevel=str(rng.randint(2800, 3600)), avgSaltLevel="3200", chlrAlert="0",
+                       chlrError="0", scMode="0", operatingState="1", operatingMode="1", enable="yes")
+            if bow["csad"] is not None:
+                SubElement(status, "CSAD", systemId=str(bow["csad"]), status="0",
+                           ph=f"{rng.uniform(7.0, 7.8):.1f}", orp=str(rng.randint(600, 800)), mode="1")
+            for system_id in bow["relays"]:
+                SubElement(status, "Relay", systemId=str(system_id), relayState="0")
+            for system_id in bow["lights"]:
+                SubElement(status, "ColorLogic-Light", systemId=str(system_id), lightState="0", currentShow="0",
+                           speed="4", brightness="4", specialEffect="0")
+            for system_id in bow["pumps"]:
+                SubElement(status, "Pump", systemId=str(system_id), pumpState="1", pumpSpeed="60",
+                           lastSpeed="60", whyOn="11")
+
+        return tostring(status, encoding="unicode")
+
+    def alarm_list(self):
+        """ GetAlarmList response body with alarm_count alarms spread over the equipment """
+        response = Element("Response")
+        _add(response, "Name", "GetAlarmList")
+        parameters = SubElement(response, "Parameters")
+        _add(parameters, "Parameter", 0, name="Status", dataType="int")
+        _add(parameters, "Parameter", "Successfully", name="StatusMessage", dataType="String")
+        alarm_list = SubElement(parameters, "Parameter", name="List", dataType="List")
+
+        equipment = self.equipment()
+        for number in range(self.alarm_count):
+            bow_id, equipment_id = equipment[number % len(equipment)]
+            item = SubElement(alarm_list, "Item")
+            _add(item, "Property", self.msp_system_id, name="MspSystemID", dataType="int")
+            _add(item, "Property", bow_id, name="BowID", dataType="int")
+            _add(item, "Property", equipment_id, name="EquipmentID", dataType="int")
+            _add(item, "Property", "ALARM", name="CriticalityType", dataType="String")
+            _add(item, "Property", f"Synthetic alarm {number + 1}", name="Message", dataType="String")
+
+        return tostring(response, encoding="unicode")
+
+
+def site_list(sites):
+    """ GetSiteList response body for a list of SyntheticSite """
+    response = Element("Response")
+    _add(response, "Name", "GetSiteList")
+    parameters = SubElement(response, "Parameters")
+    _add(parameters, "Parameter", 0, name="Status", dataType="int")
+    site_items = SubElement(parameters, "Parameter", name="List", dataType="List")
+    for site in sites:
+        item = SubElement(site_items, "Item")
+        _add(item, "Property", site.msp_system_id, name="MspSystemID", dataType="int")
+        _add(item, "Property", site.name, name="BackyardName", dataType="String")
+    return tostring(response, encoding="unicode")
@@ -0,0 +1,129 @@
+"""
+Tracers for the OmniLogic client.
+
+OpenTelemetryTracer sends the client's spans to OpenTelemetry, so they show up
+in whatever backend the application already exports to. It needs the
+opentelemetry-api package:
+
+    from omnilogic.tracing import OpenTelemetryTracer
+
+    api_client = OmniLogic(username, password, tracer=OpenTelemetryTracer())
+
+RecordingTracer keeps finished spans in memory. Use it to see where the time
+in one slow call went without a tracing backend.
+"""
+
+import contextvars
+import time
+
+from .instrumentation import Tracer
+
+
+class OpenTelemetryTracer(Tracer):
+    """ Tracer that opens OpenTelemetry spans.
+
+    Pass an opentelemetry.trace.Tracer, or leave it out to use the global
+    tracer provider's "omnilogic" tracer.
+    """
+
+    def __init__(self, tracer=None):
+        if tracer is None:
+            try:
+                from opentelemetry import trace
+            except ImportError as e:
+                raise ImportError("OpenTelemetryTracer needs the opentelemetry-api package") from e
+            tracer = trace.get_tracer("omnilogic")
+        self._tracer = tracer
+
+    def span(self, name, attributes=None):
+        return self._tracer.start_as_current_span(name, attributes=attributes)
+
+
+_current_span = contextvars.ContextVar("omnilogic_recording_span", default=None)
+
+
+class RecordedSpan:
+    """ A span kept by RecordingTracer, with its start and end in perf_counter seconds """
+
+    __slots__ = ("name", "attributes", "parent", "children", "start", "end", "exception", "_token")
+
+    def __init__(self, name, attributes, parent):
+        self.name = name
+        self.attributes = dict(attributes or {})
+        self.parent = parent
+        self.children = []
+        self.start = None
+        self.end = None
+        self.exception = None
+        self._token = None
+
+    @property
+    def duration(self):
+        return None if self.end is None else self.end - self.start
+
+    def set_attribute(self, key, value):
+        self.attributes[key] = value
+
+    def record_exception(self, exception):
+        self.exception = exception
+
+    def __enter__(self):
+        self._token = _current_span.set(self)
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end = time.perf_counter()
+        if exc is not None:
+            self.record_exception(exc)
+        _current_span.reset(self._token)
+        return False
+
+    def __repr__(self):
+        return f"<RecordedSpan {self.name} {self.attributes}>"
+
+
+class RecordingTracer(Tracer):
+    """ Tracer that keeps spans in memory as a tree.
+
+    roots lists the top level spans in the order they started. Spans follow the
+    current asyncio task's context, so concurrent calls each get their own tree.
+    """
+
+    def __init__(self):
+        self.roots = []
+
+    def span(self, name, attributes=None):
+        parent = _current_span.get()
+        span = RecordedSpan(name, attributes, parent)
+        if parent is None:
+            self.roots.append(span)
+        else:
+            parent.children.append(span)
+        return span
+
+    def spans(self):
+        """ Every recorded span, depth first """
+        stack = list(reversed(self.roots))
+        while stack:
+            span = stack.pop()
+            yield span
+            stack.extend(reversed(span.children))
+
+    def clear(self):
+        self.roots = []
+
+    def format(self):
+        """ Indented tree of span names, durations and attributes """
+        lines = []
+
+        def walk(span, depth):
+            duration = "running" if span.end is None else f"{span.duration * 1000:.2f}ms"
+            attributes = " ".join(f"{key}={value}" for key, value in span.attributes.items())
+            lines.append(f"{'  ' * depth}{span.name} {duration} {attributes}".rstrip())
+            for child in span.children:
+                walk(child, depth + 1)
+
+        for root in self.roots:
+            walk(root, 0)
+        return "\n".join(lines)
@@ -0,0 +1,375 @@
+"""
+HTTP transport: the shared session, per-method timeouts, hedged requests and
+the call_api entry point every client method goes through.
+"""
+
+import asyncio
+import bisect
+import collections
+import logging
+import time
+from datetime import datetime
+from xml.etree import ElementTree
+
+import aiohttp
+
+from .instrumentation import _text_bytes
+from .models import ApiResponse, LoginException, OmniLogicException, OmniLogicTimeoutException
+from .parsing import build_request_payload
+
+HAYWARD_API_URL = "https://www.haywardomnilogic.com/HAAPI/HomeAutomation/API.ashx"
+
+# Seconds allowed for a single API request unless overridden per method
+DEFAULT_REQUEST_TIMEOUT = 30
+
+# Read-only methods that are safe to send twice when hedging
+HEDGEABLE_METHODS = frozenset({"GetTelemetryData", "GetAlarmList", "GetMspConfigFile", "GetSiteList"})
+
+_LOGGER = logging.getLogger("omnilogic")
+
+
+class HedgePolicy:
+    """ When to send a duplicate of a slow read-only request.
+
+    Recent latencies are kept per method. Once a method has min_samples of them,
+    a request still outstanding after the given percentile of that history gets
+    a duplicate and whichever reply arrives first is used. Duplicates are capped
+    at max_rate of all hedgeable requests so a slow cloud doesn't see double load.
+
+    The history holds how long the first request of each call took, not the
+    reply that won, so hedging doesn't pull its own percentile down.
+    """
+
+    def __init__(self, percentile=95, max_rate=0.1, min_samples=20, window=200, min_delay=0.05):
+        self.percentile = percentile
+        self.max_rate = max_rate
+        self.min_samples = min_samples
+        self.window = window
+        self.min_delay = min_delay
+        self.requests = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self._latencies = {}
+
+    def record(self, method, elapsed):
+        history = self._latencies.get(method)
+        if history is None:
+            history = self._latencies[method] = (collections.deque(), [])
+        # Arrival order to know what drops out of the window, and the same samples kept sorted
+        recent, ordered = history
+        if len(recent) >= self.window:
+            del ordered[bisect.bisect_left(ordered, recent.popleft())]
+        recent.append(elapsed)
+        bisect.insort(ordered, elapsed)
+
+    def delay(self, method):
+        """ Seconds to wait before hedging, or None if there isn't enough history yet """
+        history = self._latencies.get(method)
+        if history is None or len(history[1]) < self.min_samples:
+            return None
+        ordered = history[1]
+        index = min(len(ordered) - 1, int(len(ordered) * self.percentile / 100))
+        return max(self.min_delay, ordered[index])
+
+    def allow(self):
+        """ Claim a hedge if that keeps duplicates within max_rate """
+        if self.hedges + 1 > self.max_rate * self.requests:
+            return False
+        self.hedges += 1
+        return True
+
+
+class ConnectorSettings:
+    """ Connection pool settings for the session the client creates when none is passed.
+
+    Args:
+        limit (int): Connections open at once across all hosts, 0 for no limit.
+        limit_per_host (int): Connections open at once to one host, 0 for no limit.
+        keepalive_timeout (float): Seconds an idle connection is kept for reuse.
+        ttl_dns_cache (float): Seconds resolved addresses are cached, None to cache forever.
+    """
+
+    def __init__(self, limit=100, limit_per_host=0, keepalive_timeout=15, ttl_dns_cache=300):
+        self.limit = limit
+        self.limit_per_host = limit_per_host
+        self.keepalive_timeout = keepalive_timeout
+        self.ttl_dns_cache = ttl_dns_cache
+
+    def connector(self):
+        return aiohttp.TCPConnector(
+            limit=self.limit,
+            limit_per_host=self.limit_per_host,
+            keepalive_timeout=self.keepalive_timeout,
+            ttl_dns_cache=self.ttl_dns_cache,
+        )
+
+
+class TransportStats:
+    """ Bytes on the wire and connection reuse of the session the client created.
+
+    bytes_received counts response bodies as sent, compressed or not, and
+    decoded_bytes the same bodies after decompression.
+    """
+
+    def __init__(self):
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bytes_received = 0
+        self.decoded_bytes = 0
+        self.compressed_responses = 0
+        self.connections_created = 0
+        self.connections_reused = 0
+
+    @property
+    def reuse_rate(self):
+        """ Share of requests that went over an already open connection """
+        total = self.connections_created + self.connections_reused
+        return self.connections_reused / total if total else 0.0
+
+    @property
+    def compression_ratio(self):
+        """ Decoded response bytes per byte received """
+        return self.decoded_bytes / self.bytes_received if self.bytes_received else 1.0
+
+    def observe_response(self, sent, response, text):
+        self.requests += 1
+        self.bytes_sent += sent
+        decoded = _text_bytes(text)
+        self.decoded_bytes += decoded
+        if response.headers.get("Content-Encoding") in ("gzip", "deflate"):
+            self.compressed_responses += 1
+        content = response.content
+        # total_raw_bytes is only in newer aiohttp; the declared length is the next best thing
+        raw = getattr(content, "total_raw_bytes", None)
+        if raw is None:
+            raw = response.content_length or decoded
+        self.bytes_received += raw
+
+    def trace_config(self):
+        trace_config = aiohttp.TraceConfig()
+        trace_config.on_connection_create_end.append(self._connection_created)
+        trace_config.on_connection_reuseconn.append(self._connection_reused)
+        return trace_config
+
+    async def _connection_created(self, session, context, params):
+        self.connections_created += 1
+
+    async def _connection_reused(self, session, context, params):
+        self.connections_reused += 1
+
+    def snapshot(self):
+        return {
+            "requests": self.requests,
+            "bytes_sent": self.bytes_sent,
+            "bytes_received": self.bytes_received,
+            "decoded_bytes": self.decoded_bytes,
+            "compressed_responses": self.compressed_responses,
+            "compression_ratio": self.compression_ratio,
+            "connections_created": self.connections_created,
+            "connections_reused": self.connections_reused,
+            "reuse_rate": self.reuse_rate,
+        }
+
+
+class TransportMixin:
+    """ Session handling and API calls for OmniLogic """
+
+    @property
+    def session(self):
+        if self._session is None:
+            connector = self.connector
+            if not isinstance(connector, aiohttp.BaseConnector):
+                connector = connector.connector()
+            self._session = aiohttp.ClientSession(
+                connector=connector, trace_configs=[self.transport_stats.trace_config()]
+            )
+        return self._session
+
+    async def close(self):
+        if self._session is not None:
+            await self._session.close()
+
+    def _request_timeout(self, methodName, deadline):
+        timeout = self.timeouts.get(methodName, self.request_timeout)
+
+        if deadline is not None:
+            remaining = deadline.remaining()
+            if remaining <= 0:
+                raise OmniLogicTimeoutException(f"Deadline exceeded before {methodName} was sent.")
+            if timeout is None or remaining < timeout:
+                timeout = remaining
+
+        return timeout
+
+    async def _post(self, payload, headers):
+        async with self.session.post(
+            self.api_url, data=payload, headers=headers
+        ) as resp:
+            try:
+                text = await resp.text()
+            except aiohttp.ClientConnectorError as e:
+                raise LoginException(e)
+            if self.transport_stats is not None:
+                self.transport_stats.observe_response(len(payload or b""), resp, text)
+            return text
+
+    async def _hedged_post(self, methodName, payload, headers):
+        policy = self.hedging
+        policy.requests += 1
+        delay = policy.delay(methodName)
+
+        started = time.monotonic()
+        primary = asyncio.ensure_future(self._post(payload, headers))
+        tasks = {primary}
+
+        try:
+            if delay is not None:
+                done, _ = await asyncio.wait(tasks, timeout=delay)
+
+                if not done and policy.allow():
+                    _LOGGER.debug("Hedging %s after %.3f seconds", methodName, delay)
+                    if self.metrics is not None:
+                        self.metrics.count_hedge(methodName)
+                    tasks.add(asyncio.ensure_future(self._post(payload, headers)))
+
+            while True:
+                done, pending = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = done.pop()
+                # The first reply wins; only fall back to the other request if it failed
+                if winner.exception() is None or not pending:
+                    if winner is not primary:
+                        policy.hedge_wins += 1
+                    return winner.result()
+                tasks = pending
+        finally:
+            # The primary's own latency, or how long it had run when it was given
+            # up on, which is still a lower bound; a failed primary says nothing
+            if not primary.done() or (not primary.cancelled() and primary.exception() is None):
+                policy.record(methodName, time.monotonic() - started)
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def call_api(self, methodName, params, deadline=None):
+        """
+        Generic method to call API.
+
+        The request is limited to the per-method timeout and, if a Deadline is
+        passed, to whatever is left of it. OmniLogicTimeoutException is raised
+        when either runs out.
+        """
+        attributes = {"omnilogic.method": methodName}
+        if "MspSystemID" in params:
+            attributes["omnilogic.msp_system_id"] = params["MspSystemID"]
+
+        with self.tracer.span("omnilogic.call_api", attributes) as span:
+            return await self._call_api(methodName, params, deadline, span)
+
+    async def _call_api(self, methodName, params, deadline, span):
+        # Check if authentication is needed
+        if self.token and self.token_expiry and datetime.now() >= self.token_expiry:
+            await self.authenticate()
+            
+        payload = build_request_payload(methodName, params)
+
+        if payload is not None:
+            span.set_attribute("omnilogic.request_size", len(payload))
+
+        headers = {
+            "content-type": "text/xml",
+            "cache-control": "no-cache",
+            "accept-encoding": "gzip, deflate",
+        }
+
+        if self.token:
+            headers["Token"] = self.token
+            if "MspSystemID" in params:
+                headers["SiteID"] = str(params["MspSystemID"])
+            elif methodName == "SetCHLORParams":
+                # Special case: SetCHLORParams needs MspSystemID in header but not in parameters
+                if self.systems and len(self.systems) > 0:
+                    headers["SiteID"] = str(self.systems[0]["MspSystemID"])
+                    _LOGGER.debug("SetCHLORParams: Added SiteID %s to header", self.systems[0]['MspSystemID'])
+                else:
+                    _LOGGER.error("SetCHLORParams: No systems available for SiteID header")
+
+        timeout = self._request_timeout(methodName, deadline)
+        started = time.monotonic()
+
+        if self.hedging is not None and methodName in HEDGEABLE_METHODS:
+            request = self._hedged_post(methodName, payload, headers)
+        else:
+            request = self._post(payload, headers)
+
+        metrics = self.metrics
+
+        try:
+            response = await asyncio.wait_for(request, timeout)
+        except asyncio.TimeoutError:
+            if metrics is not None:
+                metrics.count_error(methodName, "timeout")
+            raise OmniLogicTimeoutException(f"{methodName} timed out after {timeout:.1f} seconds.")
+        except (aiohttp.ClientError, LoginException):
+            if metrics is not None:
+                metrics.count_error(methodName, "http")
+            raise
+
+        elapsed = time.monotonic() - started
+
+        size = _text_bytes(response)
+        span.set_attribute("omnilogic.response_size", size)
+
+        if metrics is not None:
+            metrics.observe_request(methodName, elapsed, size)
+
+        if methodName == "Login" and "There is no information" in response:
+            # login invalid
+            # response = {"Error":"Failed login"}
+            if metrics is not None:
+                metrics.count_error(methodName, "login")
+            raise LoginException("Failed Login: Bad username or password")
+
+        try:
+            with self.tracer.span("omnilogic.parse_xml", {"omnilogic.method": methodName}):
+                if metrics is None:
+                    responseXML = ElementTree.fromstring(response)
+                else:
+                    parse_started = time.perf_counter()
+                    responseXML = ElementTree.fromstring(response)
+                    metrics.observe_parse(methodName, time.perf_counter() - parse_started)
+        except ElementTree.ParseError:
+            if metrics is not None:
+                metrics.count_error(methodName, "parse")
+            raise OmniLogicException(f"Error loading Hayward data for {methodName}.")
+
+        result = ApiResponse(methodName, response, responseXML, None, None, elapsed)
+
+        """ ### GetMspConfigFile/Telemetry do not return a successfull status, having to catch it a different way :thumbsdown: """
+        if methodName == "GetMspConfigFile" and responseXML.find("MSPConfig") is not None:
+            result.status = 0
+            return result
+
+        if methodName == "GetTelemetryData" and responseXML.find("Backyard") is not None:
+            result.status = 0
+            return result
+        """ ######################## """
+
+        status = result.parameter("Status")
+        if status is not None:
+            result.status = int(status)
+            span.set_attribute("omnilogic.status", result.status)
+
+        if not result.ok:
+            result.message = result.parameter("StatusMessage")
+            self.request_statusmessage = result.message
+
+            if metrics is not None:
+                metrics.count_error(methodName, "status")
+
+            # A failed command often comes with a new alarm. The site is in the SiteID header, also for
+            # SetCHLORParams, which may not carry it in its parameters; without one no cache is dropped.
+            site_id = headers.get("SiteID")
+            if methodName not in HEDGEABLE_METHODS and site_id is not None:
+                self.invalidate_alarms(site_id)
+
+        return result
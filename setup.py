@@ -16,18 +16,28 @@ setup(
   url = 'https://github.com/djtimca/omnilogic-api',
   download_url = 'https://github.com/djtimca/omnilogic-api/raw/master/dist/omnilogic-0.5.0.tar.gz',
   keywords = ['OmniLogic', 'Hayward', 'Pool', 'Spa'],
+  python_requires='>=3.9',
   install_requires=[
-          'xmltodict',
           'aiohttp',
       ],
+  extras_require={
+          'opentelemetry': ['opentelemetry-api'],
+          'numpy': ['numpy'],
+          'arrow': ['pyarrow'],
+          'tests': ['pytest', 'xmltodict'],
+      },
+  entry_points={
+          'console_scripts': ['omnilogic=omnilogic.cli:main'],
+      },
   classifiers=[
     'Development Status :: 3 - Alpha',
     'Intended Audience :: Developers',
     'Topic :: Software Development :: Build Tools',
     'License :: OSI Approved :: Apache Software License',
     'Programming Language :: Python :: 3',
-    'Programming Language :: Python :: 3.4',
-    'Programming Language :: Python :: 3.5',
-    'Programming Language :: Python :: 3.6',
+    'Programming Language :: Python :: 3.9',
+    'Programming Language :: Python :: 3.10',
+    'Programming Language :: Python :: 3.11',
+    'Programming Language :: Python :: 3.12',
   ],
 )
\ No newline at end of file
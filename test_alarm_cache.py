@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""
+Tests for fetching alarms on their own cadence during telemetry polls.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic
+from fake_hayward import (
+    FakeSession,
+    status_body,
+    site_list_body,
+    msp_config_body,
+    telemetry_body,
+    alarm_list_body,
+)
+
+
+def make_client(**kwargs):
+    state = {"relay": 0, "alarms": [(1, 2, "Relay fault")]}
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": lambda params: telemetry_body(relay_state=state["relay"]),
+        "GetAlarmList": lambda params: alarm_list_body(state["alarms"]),
+        "SetUIEquipmentCmd": status_body(1, "Command failed"),
+    })
+    client = OmniLogic("user", "pass", session, **kwargs)
+    client.token = "token"
+    client.userid = "12345"
+    return client, state
+
+
+def alarm_requests(client):
+    return sum(1 for name, _ in client._session.calls if name == "GetAlarmList")
+
+
+def test_alarms_are_served_from_cache():
+    client, state = make_client()
+
+    async def run():
+        first = await client.get_telemetry_data()
+        state["alarms"] = []
+        second = await client.get_telemetry_data()
+        return first, second
+
+    first, second = asyncio.run(run())
+
+    assert alarm_requests(client) == 1
+    assert second[0]["Alarms"] == first[0]["Alarms"]
+    assert second[0]["BOWS"][0]["Relays"][0]["Alarms"][0]["Message"] == "Relay fault"
+
+
+def test_cached_alarms_are_copied_for_each_poll():
+    client, state = make_client()
+
+    async def run():
+        first = await client.get_telemetry_data()
+        first[0]["Alarms"][0]["Message"] = "changed by the caller"
+        first[0]["Alarms"].clear()
+        first[0]["BOWS"][0]["Relays"][0]["Alarms"][0]["Message"] = "changed by the caller"
+        return await client.get_telemetry_data()
+
+    second = asyncio.run(run())
+
+    assert alarm_requests(client) == 1
+    assert second[0]["Alarms"][0]["Message"] == "Relay fault"
+    assert second[0]["BOWS"][0]["Relays"][0]["Alarms"][0]["Message"] == "Relay fault"
+
+
+def test_equipment_state_change_refreshes_alarms():
+    client, state = make_client()
+
+    async def run():
+        await client.get_telemetry_data()
+        state["relay"] = 1
+        state["alarms"] = []
+        return await client.get_telemetry_data()
+
+    telemetry = asyncio.run(run())
+
+    assert alarm_requests(client) == 2
+    assert telemetry[0]["Alarms"] == []
+
+
+def test_failed_command_refreshes_alarms():
+    client, state = make_client()
+
+    async def run():
+        await client.get_telemetry_data()
+        assert await client.set_relay_valve(1, 1, 2, 1) is False
+        await client.get_telemetry_data()
+
+    asyncio.run(run())
+
+    assert alarm_requests(client) == 2
+
+
+def test_zero_interval_fetches_every_poll():
+    client, state = make_client(alarm_interval=0)
+
+    async def run():
+        for _ in range(3):
+            await client.get_telemetry_data()
+
+    asyncio.run(run())
+
+    assert alarm_requests(client) == 3
+
+
+def test_failed_command_only_refreshes_its_site():
+    client, state = make_client()
+
+    async def run():
+        await client.get_telemetry_data()
+        cached = dict(client._alarm_cache)
+        await client.call_api("SetUIEquipmentCmd", {"Token": "token", "MspSystemID": 2, "PoolID": 1,
+                                                    "EquipmentID": 2, "IsOn": 1})
+        after_other_site = dict(client._alarm_cache)
+        await client.call_api("SetUIEquipmentCmd", {"Token": "token", "PoolID": 1, "EquipmentID": 2, "IsOn": 1})
+        return cached, after_other_site, dict(client._alarm_cache)
+
+    cached, after_other_site, after_no_site = asyncio.run(run())
+
+    assert 1 in cached
+    assert after_other_site == cached
+    assert after_no_site == cached
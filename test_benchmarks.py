@@ -0,0 +1,92 @@
+#!/usr/bin/env python3
+"""
+Benchmarks for the parsing and normalization hot paths with regression thresholds.
+
+Inputs are the recorded fixtures in test_data. Allocation thresholds don't
+depend on the machine and are always checked. Wall time thresholds are only
+checked with OMNILOGIC_BENCH_TIMING=1, on a quiet machine; scale them with
+OMNILOGIC_BENCH_SCALE.
+
+Run directly for a report, or with --scaling to see how the parsers scale over
+synthetic installations of increasing size:
+
+    python test_benchmarks.py [--scaling] [results.json]
+"""
+
+import sys
+import os
+import json
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic.bench import run_parser_benchmarks, run_scaling_benchmarks, format_results, format_scaling
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "test_data")
+ROUNDS = int(os.environ.get("OMNILOGIC_BENCH_ROUNDS", "30"))
+SCALE = float(os.environ.get("OMNILOGIC_BENCH_SCALE", "1"))
+TIMING = os.environ.get("OMNILOGIC_BENCH_TIMING") == "1"
+
+# name: (median microseconds, peak KiB)
+THRESHOLDS = {
+    "convert_to_json": (10000, 600),
+    "msp_config_to_json": (10000, 600),
+    "telemetry_to_json": (1000, 60),
+    "alarms_to_json": (250, 40),
+    "buildRequest_telemetry": (20, 4),
+    "buildRequest_command": (60, 8),
+    "_parse_chlorinator_config": (5000, 600),
+}
+
+
+def load_fixtures():
+    with open(os.path.join(TEST_DATA_DIR, "MspConfiguration.txt")) as f:
+        msp_config = "<Response>" + f.read().split("?>", 1)[1] + "</Response>"
+    with open(os.path.join(TEST_DATA_DIR, "Telemetry.txt")) as f:
+        telemetry = f.read()
+    with open(os.path.join(TEST_DATA_DIR, "AlarmList.txt")) as f:
+        alarms = f.read()
+    return msp_config, telemetry, alarms
+
+
+@pytest.fixture(scope="module")
+def results():
+    return {result.name: result for result in run_parser_benchmarks(*load_fixtures(), rounds=ROUNDS)}
+
+
+@pytest.mark.parametrize("name", sorted(THRESHOLDS))
+def test_parser_benchmark(results, name):
+    result = results[name]
+    max_us, max_kib = THRESHOLDS[name]
+
+    if TIMING:
+        assert result.median * 1e6 <= max_us * SCALE, f"{name} median {result.median * 1e6:.1f}us over {max_us * SCALE}us"
+    assert result.peak_bytes / 1024 <= max_kib, f"{name} peak {result.peak_bytes / 1024:.1f}KiB over {max_kib}KiB"
+
+
+def test_scaling_benchmarks_run():
+    rows = run_scaling_benchmarks(sizes=(1, 2), rounds=2)
+
+    assert [size for size, _, _ in rows] == [1, 2]
+    assert rows[1][1] > rows[0][1]
+    assert "size" in format_scaling(rows)
+
+
+if __name__ == "__main__":
+    args = sys.argv[1:]
+    if "--scaling" in args:
+        args.remove("--scaling")
+        rows = run_scaling_benchmarks(rounds=ROUNDS)
+        print(format_scaling(rows))
+        output = [
+            {"size": size, "equipment": equipment, "results": [result.as_dict() for result in results]}
+            for size, equipment, results in rows
+        ]
+    else:
+        results = run_parser_benchmarks(*load_fixtures(), rounds=ROUNDS * 5)
+        print(format_results(results))
+        output = [result.as_dict() for result in results]
+
+    if args:
+        with open(args[0], "w") as f:
+            json.dump(output, f, indent=2)
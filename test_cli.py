@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the omnilogic command line tool.
+"""
+
+import sys
+import os
+import asyncio
+import json
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic import cli, exporter, fanout, service
+from omnilogic.loadtest import LatencyModel, StandInApi
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "test_data")
+
+
+def test_read_credentials(tmp_path):
+    path = tmp_path / "credentials.json"
+    path.write_text(json.dumps({"username": "file@example.com", "password": "secret"}))
+    assert service.read_credentials(str(path)) == ("file@example.com", "secret")
+
+    environ = {service.USERNAME_VARIABLE: "env@example.com", service.PASSWORD_VARIABLE: "secret"}
+    assert service.read_credentials(environ=environ) == ("env@example.com", "secret")
+    with pytest.raises(service.CredentialsError):
+        service.read_credentials(environ={})
+
+    path.write_text(json.dumps({"username": "file@example.com"}))
+    with pytest.raises(service.CredentialsError, match="password"):
+        service.read_credentials(str(path))
+
+
+def test_only_credential_errors_are_usage_errors(monkeypatch, capsys):
+    monkeypatch.delenv(service.USERNAME_VARIABLE, raising=False)
+    monkeypatch.delenv(service.PASSWORD_VARIABLE, raising=False)
+    with pytest.raises(SystemExit):
+        cli.main(["poll"])
+    assert service.USERNAME_VARIABLE in capsys.readouterr().err
+
+    # The services' own entry points check credentials the same way
+    for module in (fanout, exporter):
+        with pytest.raises(SystemExit):
+            module.main([])
+        assert service.USERNAME_VARIABLE in capsys.readouterr().err
+
+    with pytest.raises(FileNotFoundError):
+        cli.main(["replay", "--config", "missing.xml", "--telemetry", "missing.xml"])
+
+
+def test_replay_recorded_responses(capsys):
+    cli.main([
+        "replay",
+        "--config", os.path.join(TEST_DATA_DIR, "MspConfiguration.txt"),
+        "--telemetry", os.path.join(TEST_DATA_DIR, "Telemetry.txt"),
+        "--alarms", os.path.join(TEST_DATA_DIR, "AlarmList.txt"),
+        "--site", "42",
+    ])
+    telemetry = json.loads(capsys.readouterr().out)
+    assert telemetry["MspSystemID"] == 42
+    assert telemetry["BOWS"][0]["Name"] == "Pool"
+
+
+def test_poll_and_dump_config_against_stand_in(tmp_path, monkeypatch):
+    monkeypatch.setenv(service.USERNAME_VARIABLE, StandInApi.username(0))
+    monkeypatch.setenv(service.PASSWORD_VARIABLE, "secret")
+    parser = cli.build_parser()
+    output = tmp_path / "telemetry.jsonl"
+
+    async def run():
+        stand_in = StandInApi(1, sites_per_account=2, latency=LatencyModel(median=0.001, sigma=0))
+        url = await stand_in.start()
+        try:
+            written = await cli.poll(parser.parse_args(
+                ["poll", "--api-url", url, "--interval", "0.01", "--count", "4", "--output", str(output)]
+            ))
+            paths = await cli.dump_config(parser.parse_args(
+                ["dump-config", "--api-url", url, "--output-dir", str(tmp_path / "config")]
+            ))
+        finally:
+            await stand_in.stop()
+        return written, paths
+
+    written, paths = asyncio.run(run())
+
+    assert written == 4
+    lines = [json.loads(line) for line in output.read_text().splitlines()]
+    assert len(lines) == 4
+    assert {line["MspSystemID"] for line in lines} == {1001, 1002}
+    assert all("ts" in line and "BOWS" in line for line in lines)
+
+    assert sorted(os.path.basename(path) for path in paths) == ["1001.json", "1001.xml", "1002.json", "1002.xml"]
+    with open(tmp_path / "config" / "1001.json") as f:
+        assert json.load(f)["MspSystemID"] == 1001
+    with open(tmp_path / "config" / "1001.xml") as f:
+        assert "<MSPConfig" in f.read()
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for MSP config change detection.
+"""
+
+import sys
+import os
+import asyncio
+import copy
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic
+from omnilogic.configdiff import build_index, diff_index
+from omnilogic.synthetic import SyntheticSite, site_list
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+LIGHT = (
+    "<ColorLogic-Light><System-Id>3</System-Id><Name>Pool Light</Name>"
+    "<Type>COLOR_LOGIC_UCL</Type></ColorLogic-Light>"
+)
+
+
+def test_diff_is_keyed_by_system_id():
+    client = OmniLogic("user", "pass")
+    system = {"MspSystemID": 1, "BackyardName": "Home"}
+    before = build_index(client.msp_config_to_json(msp_config_body(), system))
+    after = build_index(client.msp_config_to_json(
+        msp_config_body().replace("<Name>Waterfall</Name>", "<Name>Fountain</Name>"), system
+    ))
+
+    assert sorted(before, key=int) == ["0", "1", "2", "11"]
+    assert before["2"].type == "Relay" and before["2"].parent == "1" and before["2"].bow == "1"
+    assert before["11"].bow is None
+
+    diff = diff_index(before, after)
+    assert not diff.added and not diff.removed
+    assert [new.system_id for _, new in diff.changed] == ["2"]
+    assert diff.as_dict()["changed"][0]["Fields"] == ["Name"]
+    assert not diff_index(before, before)
+
+
+def test_client_updates_index_on_config_change():
+    config = {"text": msp_config_body()}
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": lambda params: config["text"],
+        "GetTelemetryData": telemetry_body(),
+        "GetAlarmList": alarm_list_body(),
+    })
+    events = []
+    client = OmniLogic("user", "pass", session, config_listener=lambda site_id, diff: events.append((site_id, diff)))
+    client.token = "token"
+    client.userid = "12345"
+
+    async def run():
+        first = await client.get_telemetry_data()
+        index = client.config_index(1)
+        relay = index["2"]
+
+        # An unchanged config is reused as it is, without another event
+        await client.get_telemetry_data()
+        assert client.config_index(1) is index and index["2"] is relay
+        assert client._alarm_cache
+
+        config["text"] = msp_config_body().replace("</Relay>", "</Relay>" + LIGHT)
+        await client.get_msp_config_file()
+        return first, index, relay
+
+    first, index, relay = asyncio.run(run())
+
+    assert first[0]["BOWS"][0]["Relays"][0]["Name"] == "Waterfall"
+    assert len(events) == 1
+    site_id, diff = events[0]
+    assert site_id == 1
+    assert [entry.system_id for entry in diff.added] == ["3"]
+    assert not diff.removed and not diff.changed
+
+    # The changed config is indexed afresh, with the relay as it was
+    index = client.config_index(1)
+    assert index["2"] == relay and index["3"].type == "ColorLogic-Light"
+    assert 1 not in client._alarm_cache
+    assert "Pool Light" in client.msp_config
+
+
+def test_polls_leave_the_config_unchanged():
+    for heaters in (1, 2):
+        site = SyntheticSite(msp_system_id=1, heaters=heaters)
+        session = FakeSession({
+            "GetSiteList": site_list([site]),
+            "GetMspConfigFile": site.msp_config(),
+            "GetTelemetryData": site.telemetry(),
+            "GetAlarmList": site.alarm_list(),
+        })
+        client = OmniLogic("user", "pass", session)
+        client.token = "token"
+        client.userid = "12345"
+
+        async def run():
+            before = copy.deepcopy(await client.get_msp_config_file())
+            await client.get_telemetry_data()
+            returned = await client.get_telemetry_data()
+            returned[0]["BOWS"][0]["Heaters"].clear()
+            config = await client.get_msp_config_file()
+            config[0]["Stale"] = "changed by the caller"
+            config[0]["Backyard"]["Body-of-water"]["Name"] = "changed by the caller"
+            config[0]["Backyard"]["BOWS"][0]["Heaters"].append("changed by the caller")
+            return before, await client.get_msp_config_file()
+
+        before, after = asyncio.run(run())
+        assert after == before
@@ -0,0 +1,110 @@
+#!/usr/bin/env python3
+"""
+Tests for per-request timeouts and the overall deadline on composite operations.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic import OmniLogic, Deadline, OmniLogicTimeoutException
+from fake_hayward import (
+    FakeSession,
+    site_list_body,
+    msp_config_body,
+    telemetry_body,
+    alarm_list_body,
+)
+
+SLOW_SITE = "2"
+
+
+def make_client(delays=None, **kwargs):
+    session = FakeSession(
+        {
+            "GetSiteList": site_list_body([(1, "Fast"), (2, "Slow")]),
+            "GetMspConfigFile": msp_config_body(),
+            "GetTelemetryData": telemetry_body(),
+            "GetAlarmList": alarm_list_body(),
+        },
+        delays,
+    )
+    client = OmniLogic("user", "pass", session, **kwargs)
+    client.token = "token"
+    client.userid = "12345"
+    return client
+
+
+def test_per_method_timeout():
+    client = make_client({"GetTelemetryData": 0.5}, timeouts={"GetTelemetryData": 0.05})
+
+    with pytest.raises(OmniLogicTimeoutException):
+        asyncio.run(client.call_api("GetTelemetryData", {"Token": "token", "MspSystemID": 1}))
+
+
+def test_expired_deadline_sends_nothing():
+    client = make_client()
+    deadline = Deadline(0)
+
+    with pytest.raises(OmniLogicTimeoutException):
+        asyncio.run(client.call_api("GetTelemetryData", {"Token": "token", "MspSystemID": 1}, deadline))
+    assert client._session.calls == []
+
+
+def test_telemetry_deadline_returns_partial_results():
+    slow_telemetry = lambda params: 0.5 if params["MspSystemID"] == SLOW_SITE else 0
+    client = make_client({"GetTelemetryData": slow_telemetry})
+
+    async def poll_twice():
+        first = await client.get_telemetry_data()
+        second = await client.get_telemetry_data(deadline=0.2)
+        return first, second
+
+    first, second = asyncio.run(poll_twice())
+
+    assert [site["BackyardName"] for site in first] == ["Fast", "Slow"]
+    assert not any(site["Stale"] for site in first)
+
+    # The slow site misses the deadline and comes back from its last good snapshot
+    assert [(site["BackyardName"], site["Stale"]) for site in second] == [("Fast", False), ("Slow", True)]
+
+
+def test_telemetry_deadline_without_history_drops_site():
+    slow_telemetry = lambda params: 0.5 if params["MspSystemID"] == SLOW_SITE else 0
+    client = make_client({"GetTelemetryData": slow_telemetry}, poll_deadline=0.2)
+
+    telemetry = asyncio.run(client.get_telemetry_data())
+
+    assert [site["BackyardName"] for site in telemetry] == ["Fast"]
+
+
+def test_slow_site_list_serves_stale_sites():
+    delays = {"GetSiteList": 0}
+    client = make_client(delays)
+
+    async def run():
+        await client.get_telemetry_data()
+        # A new session has to look the sites up again, and the site list is slow
+        client.systems = []
+        delays["GetSiteList"] = 0.5
+        telemetry = await client.get_telemetry_data(deadline=0.1)
+        config = await client.get_msp_config_file(deadline=0.1)
+        streamed = [site async for site in client.stream_telemetry(deadline=0.1)]
+        return telemetry, config, streamed
+
+    telemetry, config, streamed = asyncio.run(run())
+
+    assert [(site["BackyardName"], site["Stale"]) for site in telemetry] == [("Fast", True), ("Slow", True)]
+    assert [(site["BackyardName"], site["Stale"]) for site in config] == [("Fast", True), ("Slow", True)]
+    assert sorted(site["BackyardName"] for site in streamed) == ["Fast", "Slow"]
+    assert all(site["Stale"] for site in streamed)
+
+
+def test_slow_site_list_without_history_raises():
+    client = make_client({"GetSiteList": 0.5})
+
+    with pytest.raises(OmniLogicTimeoutException):
+        asyncio.run(client.get_telemetry_data(deadline=0.1))
@@ -0,0 +1,117 @@
+#!/usr/bin/env python3
+"""
+Tests for the streaming columnar export.
+"""
+
+import sys
+import os
+import csv
+import asyncio
+import importlib.util
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic import OmniLogic
+from omnilogic.export import COLUMNS, LiveExporter, export, history_rows, row_groups, sqlite_rows
+from omnilogic.history import TelemetryHistory
+from omnilogic.storage import SQLiteSink
+from omnilogic.synthetic import SyntheticSite
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+HAS_PYARROW = importlib.util.find_spec("pyarrow") is not None
+
+
+def stored_database(path, polls=50):
+    site = SyntheticSite(msp_system_id=5)
+    sink = SQLiteSink(path)
+
+    async def run():
+        for tick in range(polls):
+            sink.submit_poll([(5, {"Alarms": []}, site.telemetry(tick))], timestamp=1000 + 30 * tick)
+        await sink.close()
+
+    asyncio.run(run())
+    return site
+
+
+def read_csv(path):
+    with open(path, newline="") as f:
+        return list(csv.reader(f))
+
+
+def test_row_groups_are_bounded():
+    rows = ((float(n), 1, 2, "waterTemp", float(n)) for n in range(10))
+    groups = list(row_groups(rows, 4))
+
+    assert [len(group["ts"]) for group in groups] == [4, 4, 2]
+    assert tuple(groups[0]) == COLUMNS
+
+
+def test_export_sqlite_to_csv(tmp_path):
+    database = str(tmp_path / "pool.db")
+    site = stored_database(database)
+    output = str(tmp_path / "samples.csv")
+
+    written = export(sqlite_rows(database, start=1000 + 30 * 10, batch_size=7), output, row_group_size=16)
+    lines = read_csv(output)
+
+    assert lines[0] == list(COLUMNS)
+    assert written == len(lines) - 1
+    assert float(lines[1][0]) == 1300
+    assert {line[3] for line in lines[1:]} >= {"waterTemp", "instantSaltLevel", "ph"}
+    water = [line for line in lines[1:] if line[3] == "waterTemp" and int(line[2]) == site.bows[0]["System-Id"]]
+    assert len(water) == 40
+
+
+def test_export_history(tmp_path):
+    site = SyntheticSite(msp_system_id=5)
+    history = TelemetryHistory(capacity=8, rollups=())
+    for tick in range(12):
+        history.record(5, site.telemetry(tick), timestamp=tick)
+
+    output = str(tmp_path / "history.csv")
+    written = export(history_rows(history), output, format="csv")
+
+    assert written == len(history) * 8
+
+
+def test_live_exporter_as_client_sink(tmp_path):
+    output = str(tmp_path / "live.csv")
+    exporter = LiveExporter(output, row_group_size=3)
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(),
+        "GetAlarmList": alarm_list_body(),
+    })
+    client = OmniLogic("user", "pass", session, sink=exporter)
+    client.token = "token"
+    client.userid = "12345"
+
+    async def run():
+        for _ in range(3):
+            await client.get_telemetry_data()
+        await client.close()
+        await exporter.close()
+
+    asyncio.run(run())
+
+    lines = read_csv(output)
+    assert sorted({line[3] for line in lines[1:]}) == ["airTemp", "waterTemp"]
+    assert exporter.rows == len(lines) - 1 == 6
+
+
+@pytest.mark.skipif(not HAS_PYARROW, reason="pyarrow not installed")
+def test_export_parquet(tmp_path):
+    import pyarrow.parquet
+
+    database = str(tmp_path / "pool.db")
+    stored_database(database)
+    output = str(tmp_path / "samples.parquet")
+
+    written = export(sqlite_rows(database), output, row_group_size=100)
+    parquet = pyarrow.parquet.ParquetFile(output)
+
+    assert parquet.metadata.num_rows == written
+    assert parquet.metadata.num_row_groups == -(-written // 100)
@@ -0,0 +1,78 @@
+#!/usr/bin/env python3
+"""
+Tests for the Prometheus exporter.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+import aiohttp
+
+from omnilogic import OmniLogic
+from omnilogic.exporter import PrometheusExporter, render
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_client():
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(water_temp=83),
+        "GetAlarmList": alarm_list_body([(1, 2, "Relay fault")]),
+    })
+    client = OmniLogic("user", "pass", session, metrics=True)
+    client.token = "token"
+    client.userid = "12345"
+    return client, session
+
+
+def test_scrapes_are_served_from_memory():
+    client, session = make_client()
+
+    async def run():
+        exporter = PrometheusExporter(client, interval=3600, host="127.0.0.1", port=0)
+        url = await exporter.start()
+        try:
+            while not exporter._sites:
+                await asyncio.sleep(0.01)
+            calls = len(session.calls)
+            async with aiohttp.ClientSession() as http:
+                bodies = [await (await http.get(f"{url}/metrics")).text() for _ in range(3)]
+            return bodies, calls, len(session.calls), exporter.scrapes
+        finally:
+            await exporter.stop()
+
+    bodies, calls_before, calls_after, scrapes = asyncio.run(run())
+    text = bodies[-1]
+
+    assert calls_before == calls_after
+    assert scrapes == 3
+    assert '# TYPE omnilogic_water_temperature gauge' in text
+    assert 'omnilogic_water_temperature{site="1",site_name="Home",bow="1",name="Pool"} 83' in text
+    assert 'omnilogic_alarms{site="1",site_name="Home"} 1' in text
+    assert 'omnilogic_stale{site="1",site_name="Home"} 0' in text
+    assert "omnilogic_request_duration_seconds_count" in text
+
+
+def test_sites_are_rendered_once_per_update():
+    exporter = PrometheusExporter(OmniLogic("user", "pass"))
+    home = {
+        "MspSystemID": 1, "BackyardName": "Home", "airTemp": "70",
+        "BOWS": [{"systemId": "1", "Name": "Pool", "waterTemp": "83"}],
+    }
+    cabin = {"MspSystemID": 2, "BackyardName": "Cabin", "airTemp": "65"}
+    exporter.update(cabin, received=20)
+    exporter.update(home, received=10)
+    home_lines = exporter._sites[1]
+
+    text = exporter.exposition().decode()
+    assert text == render({1: (10, home), 2: (20, cabin)})
+    assert text.count("# TYPE omnilogic_air_temperature gauge") == 1
+    assert text.index('site_name="Home"') < text.index('site_name="Cabin"')
+
+    # Another site's update leaves the rendered lines of this one alone
+    exporter.update(dict(cabin, airTemp="66"), received=30)
+    assert exporter._sites[1] is home_lines
+    assert 'omnilogic_air_temperature{site="2",site_name="Cabin"} 66' in exporter.exposition().decode()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Tests for the local fan-out server.
+"""
+
+import sys
+import os
+import asyncio
+import json
+sys.path.insert(0, os.path.dirname(__file__))
+
+import aiohttp
+
+from omnilogic import OmniLogic
+from omnilogic.fanout import FanoutServer, Subscriber, telemetry_delta
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_client(temps):
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home"), (2, "Cabin")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": lambda params: telemetry_body(water_temp=temps[params["MspSystemID"]]),
+        "GetAlarmList": alarm_list_body(),
+    })
+    client = OmniLogic("user", "pass", session)
+    client.token = "token"
+    client.userid = "12345"
+    return client, session
+
+
+def test_telemetry_delta():
+    previous = {"airTemp": "70", "BOWS": [{"waterTemp": "80", "Pumps": []}], "old": 1}
+    current = {"airTemp": "70", "BOWS": [{"waterTemp": "81", "Pumps": []}], "new": 2}
+
+    assert telemetry_delta(previous, current) == ([[["BOWS", 0, "waterTemp"], "81"], [["new"], 2]], [["old"]])
+    assert telemetry_delta(current, current) == ([], [])
+
+
+def test_subscribers_share_one_poller():
+    temps = {"1": 80, "2": 90}
+    client, session = make_client(temps)
+
+    async def run():
+        server = FanoutServer(client, interval=0.05, port=0)
+        url = await server.start()
+        try:
+            async with aiohttp.ClientSession() as http:
+                sockets = [await http.ws_connect(f"{url}/ws?site=2") for _ in range(5)]
+                events = await http.get(f"{url}/events?mode=snapshot")
+
+                first = [json.loads(await ws.receive_str()) for ws in sockets]
+                temps["2"] = 91
+                second = [json.loads(await ws.receive_str()) for ws in sockets]
+
+                event = (await events.content.readline()).decode()
+                data = json.loads((await events.content.readline()).decode()[len("data: "):])
+                snapshot = await (await http.get(f"{url}/snapshot")).json()
+
+                for ws in sockets:
+                    await ws.close()
+                events.close()
+        finally:
+            await server.stop()
+        return first, second, event, data, snapshot
+
+    first, second, event, data, snapshot = asyncio.run(run())
+
+    assert all(message["type"] == "snapshot" and message["site"] == 2 for message in first)
+    assert first[0]["data"]["BOWS"][0]["waterTemp"] == "90"
+    assert all(message == {"type": "delta", "site": 2, "set": [[["BOWS", 0, "waterTemp"], "91"]], "unset": []}
+               for message in second)
+    assert event == "event: snapshot\n"
+    assert data["type"] == "snapshot"
+    assert set(snapshot) == {"1", "2"}
+
+    # Telemetry requests depend on the number of polls, not of subscribers
+    polls = [name for name, _ in session.calls].count("GetTelemetryData")
+    assert polls < 5 * 2 * 2
+
+
+def test_slow_subscriber_is_resynced():
+    async def run():
+        server = FanoutServer(None, port=0)
+        subscriber = Subscriber(server, mode="snapshot", queue_size=3)
+        server.subscribers.add(subscriber)
+        for tick in range(5):
+            server.publish(1, {"waterTemp": str(80 + tick)})
+            server.publish(2, {"waterTemp": "70"})
+        return subscriber, [subscriber.queue.get_nowait() for _ in range(subscriber.queue.qsize())]
+
+    subscriber, queued = asyncio.run(run())
+
+    assert subscriber.dropped > 0
+    assert len(queued) <= 3
+    latest = json.loads([data for _, data in queued if '"site": 1' in data][-1])
+    assert latest["data"]["waterTemp"] == "84"
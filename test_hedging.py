@@ -0,0 +1,114 @@
+#!/usr/bin/env python3
+"""
+Tests for opt-in hedging of read-only API requests.
+"""
+
+import sys
+import os
+import time
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic, HedgePolicy
+from fake_hayward import FakeSession, telemetry_body, status_body
+
+PARAMS = {"Token": "token", "MspSystemID": 1}
+
+
+def make_client(delay, policy):
+    session = FakeSession(
+        {"GetTelemetryData": telemetry_body(), "SetUIEquipmentCmd": status_body(0)},
+        {"GetTelemetryData": delay, "SetUIEquipmentCmd": delay},
+    )
+    client = OmniLogic("user", "pass", session, hedging=policy, metrics=True)
+    client.token = "token"
+    return client
+
+
+def test_slow_request_is_hedged():
+    calls = []
+
+    def delay(params):
+        calls.append(params)
+        # Warm-up requests are fast, then one primary stalls and its hedge is fast
+        return 1.0 if len(calls) == 6 else 0.001
+
+    policy = HedgePolicy(min_samples=5, max_rate=0.5)
+    client = make_client(delay, policy)
+
+    async def run():
+        for _ in range(5):
+            await client.call_api("GetTelemetryData", PARAMS)
+        started = time.monotonic()
+        response = await client.call_api("GetTelemetryData", PARAMS)
+        return response, time.monotonic() - started
+
+    response, elapsed = asyncio.run(run())
+
+    assert response.ok
+    assert elapsed < 0.5
+    assert len(calls) == 7
+    assert policy.hedges == 1 and policy.hedge_wins == 1
+    # Hedges are counted apart from retries
+    assert client.metrics.hedges == {"GetTelemetryData": 1}
+    assert not client.metrics.retries
+
+
+def test_hedged_call_records_the_primary_latency():
+    calls = []
+
+    def delay(params):
+        calls.append(params)
+        return 0.5 if len(calls) == 2 else 0.001
+
+    policy = HedgePolicy(min_samples=1, max_rate=1.0, min_delay=0.05)
+    client = make_client(delay, policy)
+
+    async def run():
+        await client.call_api("GetTelemetryData", PARAMS)
+        await client.call_api("GetTelemetryData", PARAMS)
+
+    asyncio.run(run())
+
+    # The hedge answered in a millisecond, but the primary had been waiting since before the hedge went out
+    assert policy.hedge_wins == 1
+    assert policy.delay("GetTelemetryData") >= 0.05
+    assert max(policy._latencies["GetTelemetryData"][1]) >= 0.05
+
+
+def test_latency_window_stays_sorted():
+    policy = HedgePolicy(percentile=50, min_samples=1, window=3, min_delay=0)
+    for elapsed in (0.3, 0.1, 0.2, 0.05, 0.4):
+        policy.record("GetTelemetryData", elapsed)
+
+    # Only the last three samples are left
+    assert policy._latencies["GetTelemetryData"][1] == [0.05, 0.2, 0.4]
+    assert policy.delay("GetTelemetryData") == 0.2
+
+
+def test_hedge_rate_is_capped():
+    policy = HedgePolicy(min_samples=1, max_rate=0.0, min_delay=0.01)
+    client = make_client(lambda params: 0.05, policy)
+
+    async def run():
+        for _ in range(3):
+            await client.call_api("GetTelemetryData", PARAMS)
+
+    asyncio.run(run())
+
+    assert policy.hedges == 0
+    assert len(client._session.calls) == 3
+
+
+def test_commands_are_never_hedged():
+    policy = HedgePolicy(min_samples=1, max_rate=1.0, min_delay=0.001)
+    client = make_client(lambda params: 0.02, policy)
+
+    async def run():
+        for _ in range(3):
+            await client.call_api("SetUIEquipmentCmd", PARAMS)
+
+    asyncio.run(run())
+
+    assert policy.requests == 0
+    assert len(client._session.calls) == 3
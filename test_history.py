@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+Tests for the telemetry history ring buffers.
+"""
+
+import sys
+import os
+import asyncio
+import importlib.util
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic import OmniLogic
+from omnilogic.history import RingSeries, RollupSeries, TelemetryHistory, lttb
+from omnilogic.synthetic import SyntheticSite
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+HAS_NUMPY = importlib.util.find_spec("numpy") is not None
+BACKENDS = ["array", pytest.param("numpy", marks=pytest.mark.skipif(not HAS_NUMPY, reason="NumPy not installed"))]
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_ring_series_wraps_and_queries(backend):
+    series = RingSeries(5, backend)
+    for second in range(8):
+        series.append(float(second), second * 10.0)
+
+    assert len(series) == 5
+    assert series.nbytes == 80
+    assert list(series.range()[0]) == [3, 4, 5, 6, 7]
+    assert list(series.range(4.5, 6)[1]) == [50, 60]
+    assert list(series.range(100)[0]) == []
+    assert series.latest() == (7, 70)
+    assert not series.append(1.0, 0)
+
+    summary = series.aggregate(4, 7)
+    assert (summary["count"], summary["min"], summary["max"], summary["mean"]) == (4, 40, 70, 55)
+    assert series.aggregate(100) is None
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_history_records_numeric_attributes(backend):
+    site = SyntheticSite(msp_system_id=7)
+    history = TelemetryHistory(capacity=10, rollups=(), backend=backend)
+    for tick in range(15):
+        history.record(7, site.telemetry(tick), timestamp=1000 + 30 * tick)
+
+    bow_id = site.bows[0]["System-Id"]
+    times, temps = history.query(7, bow_id, "waterTemp")
+    assert len(times) == 10
+    assert times[0] == 1000 + 30 * 5
+    assert history.equipment[(7, bow_id)] == "BodyOfWater"
+    assert (7, site.bows[0]["chlorinator"], "instantSaltLevel") in history.keys(7)
+    assert all(key[2] != "relayState" for key in history.keys())
+    assert history.nbytes == len(history) * 160
+    assert history.aggregate(7, bow_id, "waterTemp")["count"] == 10
+    assert history.aggregate(7, 9999, "waterTemp") is None
+
+    everything = TelemetryHistory(capacity=2, attributes=None, backend=backend)
+    everything.record(7, site.telemetry())
+    assert (7, site.bows[0]["relays"][0], "relayState") in everything.keys()
+    assert all(key[2] != "systemId" for key in everything.keys())
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_rollups_update_incrementally(backend):
+    rollup = RollupSeries(60, 3, backend)
+    for second in range(0, 300, 15):
+        rollup.add(second, second)
+
+    starts, counts, sums, mins, maxs = rollup.rows()
+    assert list(starts) == [120, 180, 240]
+    assert list(counts) == [4, 4, 4]
+    assert (mins[0], maxs[0], sums[0]) == (120, 165, 570)
+    assert list(rollup.rows(190, 200)[0]) == [180]
+    assert not rollup.add(10, 1)
+
+
+@pytest.mark.parametrize("backend", BACKENDS)
+def test_downsample_uses_coarsest_rollup(backend):
+    history = TelemetryHistory(capacity=100, rollups=((60, 100), (600, 100)), backend=backend)
+    site = SyntheticSite(msp_system_id=3)
+    bow_id = site.bows[0]["System-Id"]
+    for tick in range(400):
+        history.record(3, site.telemetry(tick), timestamp=30 * tick)
+
+    # A day at 600 second buckets comes from the 600 second rollup
+    result = history.downsample(3, bow_id, "waterTemp", start=0, end=12000, points=20)
+    assert result["resolution"] == 600
+    assert sum(result["count"]) == 400
+    assert all(low <= mean <= high for low, mean, high in zip(result["min"], result["mean"], result["max"]))
+
+    # Finer buckets over the last hour come from the 60 second rollup, which
+    # reaches back further than the 100 raw samples
+    recent = history.downsample(3, bow_id, "waterTemp", start=8400, end=11970, points=30)
+    assert recent["resolution"] == 60
+    assert sum(recent["count"]) == 120
+
+    # Buckets finer than every rollup read the raw samples
+    raw = history.downsample(3, bow_id, "waterTemp", start=11000, end=11970, points=100)
+    assert raw["resolution"] == 0
+    assert sum(raw["count"]) == len(history.query(3, bow_id, "waterTemp", 11000, 11970)[0])
+
+    shape = history.downsample(3, bow_id, "waterTemp", start=0, end=12000, points=10, method="lttb")
+    assert shape["resolution"] == 60
+    assert len(shape["time"]) == 10
+
+    assert len(history.downsample(3, 9999, "waterTemp")["time"]) == 0
+
+
+def test_lttb_keeps_peaks_and_ends():
+    import array
+    times = array.array("d", range(100))
+    values = array.array("d", [0.0] * 100)
+    values[37] = 50.0
+    values[80] = -20.0
+
+    reduced_times, reduced_values = lttb(times, values, 10)
+
+    assert len(reduced_times) == 10
+    assert (reduced_times[0], reduced_times[-1]) == (0, 99)
+    assert 50.0 in reduced_values and -20.0 in reduced_values
+    assert list(lttb(times, values, 200)[0]) == list(times)
+
+
+def test_polling_feeds_history():
+    history = TelemetryHistory(capacity=4)
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(water_temp=81),
+        "GetAlarmList": alarm_list_body(),
+    })
+    client = OmniLogic("user", "pass", session, history=history)
+    client.token = "token"
+    client.userid = "12345"
+
+    async def run():
+        await client.get_telemetry_data()
+        await client.get_telemetry_data()
+
+    asyncio.run(run())
+
+    times, temps = history.query(1, 1, "waterTemp")
+    assert list(temps) == [81, 81]
+    assert history.query(1, 0, "airTemp")[1][0] == 72
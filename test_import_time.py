@@ -0,0 +1,57 @@
+#!/usr/bin/env python3
+"""
+Cold-start import time of the package.
+
+The client modules load on first use, so the lightweight names must not pull
+in aiohttp. That is always checked; the wall time thresholds only with
+OMNILOGIC_BENCH_TIMING=1 and scaled by OMNILOGIC_BENCH_SCALE, like the parser
+benchmarks.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+import omnilogic
+from omnilogic.bench import measure_import
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+SCALE = float(os.environ.get("OMNILOGIC_BENCH_SCALE", "1"))
+TIMING = os.environ.get("OMNILOGIC_BENCH_TIMING") == "1"
+
+# statement: (best milliseconds, whether aiohttp may be loaded)
+THRESHOLDS = {
+    "import omnilogic": (50, False),
+    "from omnilogic import LightEffect, OmniLogicException": (50, False),
+    "from omnilogic.parsing import telemetry_to_json, build_request_payload": (150, False),
+    "from omnilogic import OmniLogic": (1500, True),
+}
+
+
+@pytest.mark.parametrize("statement", sorted(THRESHOLDS))
+def test_import_time(statement):
+    max_ms, allows_aiohttp = THRESHOLDS[statement]
+    seconds, modules = measure_import(statement, rounds=3 if TIMING else 1, cwd=ROOT)
+
+    if TIMING:
+        assert seconds * 1000 <= max_ms * SCALE, f"{statement} took {seconds * 1000:.1f}ms, over {max_ms * SCALE}ms"
+    if not allows_aiohttp:
+        assert "aiohttp" not in modules
+
+
+def test_lazy_exports():
+    for name in omnilogic.__all__:
+        assert getattr(omnilogic, name) is not None
+    assert "OmniLogic" in dir(omnilogic)
+    assert omnilogic.OmniLogic.__module__ == "omnilogic.client"
+
+    with pytest.raises(AttributeError):
+        omnilogic.NotAName
+
+
+if __name__ == "__main__":
+    for statement in THRESHOLDS:
+        seconds, modules = measure_import(statement, cwd=ROOT)
+        print(f"{statement:<72} {seconds * 1000:>8.1f}ms {'aiohttp' if 'aiohttp' in modules else ''}")
@@ -0,0 +1,36 @@
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic.loadtest import LatencyModel, run_load_test, format_report, percentile
+
+
+def test_percentile():
+    values = [0.1 * n for n in range(1, 11)]
+
+    assert percentile(values, 50) == values[4]
+    assert percentile(values, 99) == values[-1]
+    assert percentile([], 50) is None
+
+
+def test_small_fleet_run():
+    results = asyncio.run(run_load_test(
+        accounts=2,
+        sites_per_account=2,
+        interval=0.2,
+        duration=0.6,
+        command_rate=1.0,
+        latency=LatencyModel(0.005, 0.2, seed=1),
+        error_rate=0.1,
+    ))
+
+    assert results["requests"] > 0
+    assert results["methods"]["Login"]["count"] == 2
+    assert results["methods"]["GetSiteList"]["count"] >= 2
+    assert results["methods"]["GetTelemetryData"]["count"] >= 4
+    assert results["operations"]["get_telemetry_data"]["count"] >= 4
+    assert "command" in results["operations"]
+    assert results["event_loop_lag_ms"]["count"] > 0
+    assert results["rss_bytes"] > 0
+    assert "GetTelemetryData" in format_report(results)
@@ -0,0 +1,96 @@
+#!/usr/bin/env python3
+"""
+Tests for the metrics collector.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic import OmniLogic, OmniLogicException, OmniLogicTimeoutException, MetricsCollector, Histogram
+from fake_hayward import FakeSession, status_body, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_client(metrics=True, **bodies):
+    session = FakeSession(dict({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(),
+        "GetAlarmList": alarm_list_body(),
+        "SetUIEquipmentCmd": status_body(1, "Command failed"),
+    }, **bodies))
+    client = OmniLogic("user", "pass", session, metrics=metrics)
+    client.token = "token"
+    client.userid = "12345"
+    return client
+
+
+def test_histogram_buckets_are_cumulative():
+    histogram = Histogram((1, 5))
+    for value in (0.5, 1, 3, 10):
+        histogram.observe(value)
+
+    assert histogram.buckets() == [(1, 2), (5, 3), (float("inf"), 4)]
+    assert histogram.sum == 14.5
+
+
+def test_poll_records_requests_parsing_and_conversion():
+    client = make_client()
+    asyncio.run(client.get_telemetry_data())
+    snapshot = client.metrics.snapshot()
+
+    for method in ("GetSiteList", "GetMspConfigFile", "GetTelemetryData", "GetAlarmList"):
+        assert snapshot["request_latency"][method]["count"] == 1
+        assert snapshot["parse_time"][method]["count"] == 1
+    assert snapshot["response_bytes"]["GetMspConfigFile"]["sum"] == len(msp_config_body())
+    assert {"msp_config_to_json", "telemetry_to_json", "alarms_to_json"} <= set(snapshot["normalize_time"])
+    assert snapshot["errors"] == {}
+
+
+def test_errors_are_counted_by_kind():
+    client = make_client(GetAlarmList="<html><body>Server Error<br></body></html>")
+    client.timeouts["GetTelemetryData"] = 0.05
+    client._session.delays["GetTelemetryData"] = 0.2
+
+    async def run():
+        await client.set_relay_valve(1, 1, 2, 1)
+        with pytest.raises(OmniLogicException):
+            await client.call_api("GetAlarmList", {"Token": "token", "MspSystemID": 1, "Version": "0"})
+        with pytest.raises(OmniLogicTimeoutException):
+            await client.call_api("GetTelemetryData", {"Token": "token", "MspSystemID": 1})
+
+    asyncio.run(run())
+
+    assert client.metrics.snapshot()["errors"] == {
+        "SetUIEquipmentCmd:status": 1,
+        "GetAlarmList:parse": 1,
+        "GetTelemetryData:timeout": 1,
+    }
+
+
+def test_prometheus_text():
+    client = make_client()
+    asyncio.run(client.get_telemetry_data())
+    client.metrics.count_retry("GetTelemetryData")
+    client.metrics.count_hedge("GetAlarmList")
+    text = client.metrics.to_prometheus()
+
+    assert "# TYPE omnilogic_request_duration_seconds histogram" in text
+    assert 'omnilogic_request_duration_seconds_bucket{method="GetTelemetryData",le="+Inf"} 1' in text
+    assert 'omnilogic_request_duration_seconds_count{method="GetSiteList"} 1' in text
+    assert 'omnilogic_normalize_duration_seconds_count{operation="telemetry_to_json"} 1' in text
+    assert 'omnilogic_request_retries_total{method="GetTelemetryData"} 1' in text
+    assert 'omnilogic_request_hedges_total{method="GetAlarmList"} 1' in text
+    assert 'omnilogic_request_retries_total{method="GetAlarmList"}' not in text
+    assert text.endswith("\n")
+
+
+def test_disabled_by_default():
+    client = make_client(metrics=None)
+    asyncio.run(client.get_telemetry_data())
+
+    assert client.metrics is None
+    assert isinstance(make_client().metrics, MetricsCollector)
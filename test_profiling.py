@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the opt-in profiling mode.
+"""
+
+import sys
+import os
+import asyncio
+import threading
+import tracemalloc
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic
+from omnilogic.profiling import Profiler
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_client(**kwargs):
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(),
+        "GetAlarmList": alarm_list_body(),
+    })
+    client = OmniLogic("user", "pass", session, **kwargs)
+    client.token = "token"
+    client.userid = "12345"
+    return client
+
+
+def test_profiled_call_writes_report(tmp_path):
+    profiler = Profiler(str(tmp_path), top=10, label="pool1")
+    client = make_client(profiler=profiler)
+
+    async def run():
+        await client.get_telemetry_data()
+        # The report is written off the event loop
+        await profiler.flush()
+
+    asyncio.run(run())
+
+    # get_site_list and get_msp_config_file run inside the outer capture
+    assert profiler.captured == 1
+    assert profiler.skipped == 2
+    assert len(profiler.reports) == 1
+
+    report_path = profiler.reports[0]
+    assert report_path.endswith("-pool1-get_telemetry_data.txt")
+    assert os.path.exists(report_path[:-4] + ".prof")
+
+    with open(report_path) as f:
+        report = f.read()
+    assert "operation: get_telemetry_data" in report
+    assert "Top 10 functions by cumulative time" in report
+    assert "(get_telemetry_data)" in report
+    assert "Top 10 allocation sites" in report
+
+
+def test_sample_rate_and_context(tmp_path):
+    client = make_client()
+
+    async def run():
+        with client.profiling(str(tmp_path), sample_rate=0, memory=False) as profiler:
+            await client.get_site_list()
+            await client.get_msp_config_file()
+        return profiler
+
+    profiler = asyncio.run(run())
+
+    assert profiler.captured == 0
+    assert profiler.reports == []
+    assert client.profiler is None
+
+
+def test_profilers_are_independent(tmp_path):
+    profilers = [Profiler(str(tmp_path / name), top=5) for name in ("a", "b")]
+    inside = threading.Barrier(2, timeout=5)
+
+    def work(profiler):
+        with profiler.capture("work") as profile:
+            # Both captures are running here at the same time
+            inside.wait()
+            with profiler.capture("nested") as nested:
+                assert nested is None
+            return profile is not None
+
+    with ThreadPoolExecutor(max_workers=2) as pool:
+        captured = list(pool.map(work, profilers))
+
+    if sys.version_info >= (3, 12):
+        # cProfile hooks into the whole process, so the second capture is skipped
+        assert sorted(captured) == [False, True]
+    else:
+        assert captured == [True, True]
+    for profiler, was_captured in zip(profilers, captured):
+        assert len(profiler.reports) == profiler.captured == int(was_captured)
+        assert profiler.skipped == 2 - profiler.captured
+    assert not tracemalloc.is_tracing()
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""
+Tests for the single-parse response pipeline: call_api parses each body once and
+returns an ApiResponse that the converters and set_* methods reuse.
+"""
+
+import sys
+import os
+import json
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+from xml.etree import ElementTree
+
+import pytest
+
+from omnilogic import OmniLogic, ApiResponse, element_to_dict
+from fake_hayward import FakeSession, status_body, site_list_body
+
+TEST_DATA_DIR = os.path.join(os.path.dirname(__file__), "test_data")
+
+
+def load_msp_config_response():
+    """The fixture is a bare MSPConfig document; the API wraps it in a Response."""
+    with open(os.path.join(TEST_DATA_DIR, "MspConfiguration.txt")) as f:
+        body = f.read().split("?>", 1)[1]
+    return f"<Response>{body}</Response>"
+
+
+def test_element_to_dict_matches_xmltodict():
+    xmltodict = pytest.importorskip("xmltodict")
+    body = load_msp_config_response()
+
+    expected = json.loads(json.dumps(xmltodict.parse(body)))["Response"]["MSPConfig"]
+    assert element_to_dict(ElementTree.fromstring(body).find("MSPConfig")) == expected
+
+
+def test_call_api_returns_parsed_status():
+    session = FakeSession({
+        "SetUIEquipmentCmd": status_body(0, "Successfully"),
+        "SetHeaterEnable": status_body(4, "You don't have permission"),
+    })
+    client = OmniLogic("user", "pass", session)
+    client.token = "token"
+
+    ok = asyncio.run(client.call_api("SetUIEquipmentCmd", {"Token": "token", "MspSystemID": 1}))
+    assert isinstance(ok, ApiResponse)
+    assert ok.ok and ok.status == 0 and ok.message is None
+    assert ok.elapsed >= 0
+
+    failed = asyncio.run(client.call_api("SetHeaterEnable", {"Token": "token", "MspSystemID": 1}))
+    assert not failed.ok
+    assert failed.status == 4
+    assert failed.message == "You don't have permission"
+    assert client.request_statusmessage == "You don't have permission"
+
+    # Callers written against the old string return value keep working
+    assert "Successfully" in ok and str(ok) == ok.text
+    assert str(failed) == "You don't have permission"
+    assert "permission" in failed and "<Response>" not in failed
+
+    assert asyncio.run(client.set_heater_onoff(1, 1, 2, True)) is False
+
+
+def test_msp_config_reuses_parsed_tree():
+    session = FakeSession({
+        "GetSiteList": site_list_body([(49840, "Home")]),
+        "GetMspConfigFile": load_msp_config_response(),
+    })
+    client = OmniLogic("user", "pass", session)
+    client.token = "token"
+    client.userid = "12345"
+
+    systems = asyncio.run(client.get_site_list())
+    assert systems == [{"MspSystemID": 49840, "BackyardName": "Home"}]
+
+    response = asyncio.run(client.call_api("GetMspConfigFile", {"Token": "token", "MspSystemID": 49840, "Version": 0}))
+    assert response.ok
+
+    config = client.convert_to_json(response)
+    assert config["Backyard"]["Body-of-water"]["Name"] == "Pool"
+
+    client.msp_config = response.text
+    client.msp_config_xml = response.xml
+    assert client._parse_chlorinator_config(6)["cellType"] in (1, 2, 3, 4)
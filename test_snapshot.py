@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for warm-start snapshots.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic
+from omnilogic.snapshot import SnapshotStore, decode_snapshot, encode_snapshot
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_session():
+    return FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(water_temp=82),
+        "GetAlarmList": alarm_list_body(),
+    })
+
+
+def test_encode_round_trip():
+    data = encode_snapshot({1: {"Name": "config"}}, {1: {"waterTemp": "82"}, 2: {"waterTemp": "70"}}, saved=1000)
+
+    assert data[:4] == b"OLSN"
+    assert decode_snapshot(data) == (1000, {1: {"Name": "config"}}, {1: {"waterTemp": "82"}, 2: {"waterTemp": "70"}})
+
+
+def test_warm_start_serves_last_poll_before_any_request(tmp_path):
+    path = str(tmp_path / "omnilogic.snap")
+    client = OmniLogic("user", "pass", make_session(), snapshot=path)
+    client.token = "token"
+    client.userid = "12345"
+    polled = asyncio.run(client.get_telemetry_data())
+
+    assert client.snapshot.saves == 1
+
+    session = make_session()
+    restarted = OmniLogic("user", "pass", session, snapshot=path)
+    warm = restarted.warm_start()
+
+    assert session.calls == []
+    assert len(warm) == 1
+    assert warm[0]["Stale"] is True
+    assert warm[0]["BOWS"][0]["waterTemp"] == polled[0]["BOWS"][0]["waterTemp"]
+    assert restarted._last_config[1]["BackyardName"] == "Home"
+
+
+def test_unusable_snapshots_are_ignored(tmp_path):
+    path = tmp_path / "omnilogic.snap"
+    client = OmniLogic("user", "pass", snapshot=str(path))
+
+    assert client.warm_start() == []
+
+    path.write_bytes(b"OLSN\x00\x63\x00\x00\x00\x00")
+    assert client.warm_start() == []
+
+    data = encode_snapshot({}, {1: {"waterTemp": "82"}})
+    path.write_bytes(data[:-3])
+    assert SnapshotStore(str(path)).load() is None
+    assert client.warm_start() == []
@@ -0,0 +1,107 @@
+#!/usr/bin/env python3
+"""
+Tests for the SQLite telemetry sink.
+"""
+
+import sys
+import os
+import asyncio
+import sqlite3
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic
+from omnilogic.storage import SQLiteSink
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def test_polls_are_stored_in_batches(tmp_path):
+    path = str(tmp_path / "pool.db")
+    state = {"temp": 80, "alarms": [(1, 2, "Relay fault")]}
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": lambda params: telemetry_body(water_temp=state["temp"], relay_state=state["temp"] % 2),
+        "GetAlarmList": lambda params: alarm_list_body(state["alarms"]),
+    })
+    sink = SQLiteSink(path)
+    client = OmniLogic("user", "pass", session, sink=sink)
+    client.token = "token"
+    client.userid = "12345"
+    # Opened on the sink's thread by the first write, not by the constructor
+    assert not os.path.exists(path)
+
+    async def run():
+        await client.get_telemetry_data()
+        state["temp"] = 81
+        state["alarms"] = []
+        await client.get_telemetry_data()
+        await sink.flush()
+        result = (
+            await sink.samples(1, 1, "waterTemp"),
+            await sink.alarm_events(1),
+            await sink.latest_snapshot(1),
+        )
+        await sink.close()
+        return result
+
+    samples, events, snapshot = asyncio.run(run())
+
+    assert [value for _, value in samples] == [80, 81]
+    assert [(event, equipment, message) for _, event, equipment, _, _, message in events] == [
+        ("raised", 2, "Relay fault"),
+        ("cleared", 2, "Relay fault"),
+    ]
+    assert snapshot["BOWS"][0]["waterTemp"] == "81"
+    assert sink.batches == 2
+    assert sink.errors == 0
+
+    with sqlite3.connect(path) as connection:
+        assert connection.execute("SELECT COUNT(*) FROM snapshots").fetchone()[0] == 2
+
+
+def test_every_attribute_is_stored_from_the_raw_telemetry(tmp_path):
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(relay_state=1),
+        "GetAlarmList": alarm_list_body(),
+    })
+    sink = SQLiteSink(str(tmp_path / "pool.db"), attributes=None)
+    client = OmniLogic("user", "pass", session, sink=sink)
+    client.token = "token"
+    client.userid = "12345"
+
+    async def run():
+        await client.get_telemetry_data()
+        await client.close()
+        rows = await sink.query("SELECT equipment_id, attribute, value FROM samples ORDER BY equipment_id, attribute")
+        await sink.close()
+        return rows
+
+    rows = asyncio.run(run())
+
+    assert sink.errors == 0
+    # Only what the controller reported; nothing conversion added from the config
+    assert (2, "relayState", 1.0) in rows
+    assert {attribute for _, attribute, _ in rows} <= {"airTemp", "state", "statusVersion", "waterTemp", "flow", "relayState"}
+
+
+def test_retention_prunes_in_chunks(tmp_path):
+    sink = SQLiteSink(str(tmp_path / "pool.db"), retention=100, prune_interval=0, prune_chunk=2)
+    telemetry = {"Alarms": []}
+
+    async def run():
+        for tick in range(10):
+            sink.submit_poll([(1, telemetry, telemetry_body())], timestamp=1000 + 10 * tick)
+        await sink.flush()
+        sink.submit_poll([(1, telemetry, telemetry_body())], timestamp=1200)
+        await sink.flush()
+        rows = await sink.query("SELECT MIN(ts), COUNT(*) FROM snapshots")
+        await sink.close()
+        return rows[0]
+
+    oldest, count = asyncio.run(run())
+
+    assert oldest >= 1100
+    assert count == 1
+    assert sink.pruned > 0
@@ -0,0 +1,65 @@
+#!/usr/bin/env python3
+"""
+Tests for the async telemetry stream.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_client(temps, delays=None):
+    session = FakeSession(
+        {
+            "GetSiteList": site_list_body([(1, "Slow"), (2, "Fast")]),
+            "GetMspConfigFile": msp_config_body(),
+            "GetTelemetryData": lambda params: telemetry_body(water_temp=temps[params["MspSystemID"]]),
+            "GetAlarmList": alarm_list_body(),
+        },
+        delays,
+    )
+    client = OmniLogic("user", "pass", session)
+    client.token = "token"
+    client.userid = "12345"
+    return client
+
+
+def test_fast_sites_are_yielded_first():
+    delays = {"GetTelemetryData": lambda params: 0.2 if params["MspSystemID"] == "1" else 0}
+    client = make_client({"1": 80, "2": 90}, delays)
+
+    async def run():
+        started = asyncio.get_running_loop().time()
+        arrivals = []
+        async for site in client.stream_telemetry():
+            arrivals.append((site["BackyardName"], asyncio.get_running_loop().time() - started))
+        return arrivals
+
+    arrivals = asyncio.run(run())
+
+    assert [name for name, _ in arrivals] == ["Fast", "Slow"]
+    assert arrivals[0][1] < 0.15
+
+
+def test_interval_stream_with_changed_only_and_cancellation():
+    temps = {"1": 80, "2": 90}
+    client = make_client(temps)
+
+    async def run():
+        seen = []
+        async for site in client.stream_telemetry(interval=0.01, changed_only=True):
+            seen.append((site["BackyardName"], site["BOWS"][0]["waterTemp"]))
+            if len(seen) == 2:
+                temps["2"] = 91
+            if len(seen) == 3:
+                break
+        return seen
+
+    seen = asyncio.run(run())
+
+    assert sorted(seen[:2]) == [("Fast", "90"), ("Slow", "80")]
+    assert seen[2] == ("Fast", "91")
@@ -0,0 +1,73 @@
+#!/usr/bin/env python3
+"""
+Tests for the synchronous facade.
+"""
+
+import sys
+import os
+import time
+import asyncio
+import threading
+import concurrent.futures
+from concurrent.futures import ThreadPoolExecutor
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic.sync import SyncOmniLogic
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_client(timeout=10, delays=None):
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home"), (2, "Cabin")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(water_temp=84),
+        "GetAlarmList": alarm_list_body(),
+    }, delays)
+    api_client = SyncOmniLogic("user", "pass", session=session, timeout=timeout)
+    api_client.client.token = "token"
+    api_client.client.userid = "12345"
+    return api_client, session
+
+
+def test_calls_from_many_threads_share_one_client():
+    api_client, session = make_client()
+    with api_client:
+        assert len(api_client.get_telemetry_data()) == 2
+
+        with ThreadPoolExecutor(max_workers=8) as pool:
+            results = list(pool.map(lambda _: api_client.get_telemetry_data(), range(16)))
+
+        assert all([site["BOWS"][0]["waterTemp"] for site in result] == ["84", "84"] for result in results)
+        assert [name for name, _ in session.calls].count("GetSiteList") == 1
+        assert [thread.name for thread in threading.enumerate()].count("omnilogic-loop") == 1
+
+        # Sync methods run on the loop thread too
+        assert len(api_client.warm_start()) == 0
+        assert api_client.alarm_interval == 300
+
+    assert "omnilogic-loop" not in [thread.name for thread in threading.enumerate()]
+    with pytest.raises(RuntimeError):
+        api_client.get_telemetry_data()
+
+
+def test_stream_is_a_plain_iterator():
+    api_client, _ = make_client()
+    with api_client:
+        names = sorted(site["BackyardName"] for site in api_client.stream_telemetry())
+
+    assert names == ["Cabin", "Home"]
+
+
+def test_timed_out_call_is_cancelled():
+    api_client, _ = make_client(timeout=0.1, delays={"GetTelemetryData": 5})
+
+    async def running_tasks():
+        return [task for task in asyncio.all_tasks() if task is not asyncio.current_task()]
+
+    with api_client:
+        with pytest.raises(concurrent.futures.TimeoutError):
+            api_client.get_telemetry_data()
+        time.sleep(0.1)
+        assert api_client._run(running_tasks()) == []
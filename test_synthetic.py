@@ -0,0 +1,88 @@
+#!/usr/bin/env python3
+"""
+Tests that synthetic installations of every shape go through the parsers intact.
+"""
+
+import sys
+import os
+sys.path.insert(0, os.path.dirname(__file__))
+
+import pytest
+
+from omnilogic import OmniLogic, TelemetryFilter
+from omnilogic.synthetic import SyntheticSite
+
+SHAPES = [
+    # single Body-of-water, rendered as a dict by the parsers
+    dict(bows=1),
+    # list of Body-of-water with multi-heater Operation lists and V2 lights
+    dict(bows=3, heaters=2, v2_lights=True, alarms=10),
+    # one of everything
+    dict(bows=1, relays=1, lights=1, pumps=1, heaters=3, alarms=5),
+    dict(bows=2, relays=1, lights=1, pumps=1, backyard_relays=0, csad=False),
+    dict(bows=12, relays=6, lights=6, pumps=3, heaters=2, alarms=150),
+]
+
+
+def equipment_alarms(telemetry):
+    alarms = sum(len(relay.get("Alarms", [])) for relay in telemetry["Relays"])
+    for bow in telemetry["BOWS"]:
+        for item in bow["Relays"] + bow["Lights"] + bow["Pumps"] + bow["Heaters"] + [bow["Filter"], bow["Chlorinator"]]:
+            alarms += len(item.get("Alarms", []))
+    return alarms
+
+
+@pytest.mark.parametrize("shape", SHAPES)
+def test_synthetic_site_parses(shape):
+    site = SyntheticSite(**shape)
+    client = OmniLogic("user", "pass")
+
+    config = client.msp_config_to_json(site.msp_config(), site.system)
+    alarms = client.alarms_to_json(site.alarm_list())
+    telemetry = client.telemetry_to_json(site.telemetry(), config, alarms)
+
+    bows = shape.get("bows", 1)
+    assert len(config["Backyard"]["BOWS"]) == bows
+    assert len(telemetry["BOWS"]) == bows
+    assert len(telemetry["Relays"]) == shape.get("backyard_relays", 1)
+
+    for bow in telemetry["BOWS"]:
+        assert len(bow["Relays"]) == shape.get("relays", 2)
+        assert len(bow["Lights"]) == shape.get("lights", 2)
+        assert len(bow["Pumps"]) == shape.get("pumps", 1)
+        assert len(bow["Heaters"]) == shape.get("heaters", 1)
+        assert all(light["V2"] == ("yes" if shape.get("v2_lights") else "no") for light in bow["Lights"])
+        assert ("CSAD" in bow) == shape.get("csad", True)
+
+    # Every alarm lands on exactly one piece of equipment
+    assert equipment_alarms(telemetry) == shape.get("alarms", 0)
+
+
+def test_telemetry_is_deterministic():
+    site = SyntheticSite(bows=2, seed=7)
+
+    assert site.telemetry(3) == SyntheticSite(bows=2, seed=7).telemetry(3)
+    assert site.telemetry(3) != site.telemetry(4)
+
+
+def test_telemetry_filter_keeps_only_requested_equipment():
+    site = SyntheticSite(bows=3, relays=2, lights=2, pumps=1, heaters=2, alarms=20)
+    client = OmniLogic("user", "pass")
+
+    config = client.msp_config_to_json(site.msp_config(), site.system)
+    alarms = client.alarms_to_json(site.alarm_list())
+    full = client.telemetry_to_json(site.telemetry(), config, alarms)
+    bow_id = full["BOWS"][1]["systemId"]
+
+    telemetry = client.telemetry_to_json(
+        site.telemetry(), config, alarms, TelemetryFilter(types={"Filter"}, bows={bow_id})
+    )
+
+    assert telemetry["Relays"] == []
+    assert [bow["systemId"] for bow in telemetry["BOWS"]] == [bow["systemId"] for bow in full["BOWS"]]
+    for bow in telemetry["BOWS"]:
+        assert "waterTemp" in bow
+        assert bow["Relays"] == bow["Lights"] == bow["Pumps"] == bow["Heaters"] == []
+        assert ("Filter" in bow) == (bow["systemId"] == bow_id)
+    assert telemetry["BOWS"][1]["Filter"] == full["BOWS"][1]["Filter"]
+
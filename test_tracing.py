@@ -0,0 +1,99 @@
+#!/usr/bin/env python3
+"""
+Tests for the tracing hooks.
+"""
+
+import sys
+import os
+import asyncio
+import contextlib
+sys.path.insert(0, os.path.dirname(__file__))
+
+from omnilogic import OmniLogic, NULL_TRACER
+from omnilogic.tracing import OpenTelemetryTracer, RecordingTracer
+from fake_hayward import FakeSession, site_list_body, msp_config_body, telemetry_body, alarm_list_body
+
+
+def make_client(tracer=None):
+    session = FakeSession({
+        "GetSiteList": site_list_body([(1, "Home")]),
+        "GetMspConfigFile": msp_config_body(),
+        "GetTelemetryData": telemetry_body(),
+        "GetAlarmList": alarm_list_body(),
+    })
+    client = OmniLogic("user", "pass", session, tracer=tracer)
+    client.token = "token"
+    client.userid = "12345"
+    return client
+
+
+def tree(span):
+    return (span.name, [tree(child) for child in span.children])
+
+
+def test_poll_opens_nested_spans():
+    tracer = RecordingTracer()
+    asyncio.run(make_client(tracer).get_telemetry_data())
+
+    assert [span.name for span in tracer.roots] == ["omnilogic.get_telemetry_data"]
+    poll = tracer.roots[0]
+    assert [child.name for child in poll.children] == [
+        "omnilogic.get_site_list",
+        "omnilogic.get_msp_config_file",
+        "omnilogic.poll_site",
+    ]
+
+    site = poll.children[2]
+    assert site.attributes == {"omnilogic.msp_system_id": 1}
+    assert tree(site) == ("omnilogic.poll_site", [
+        ("omnilogic.call_api", [("omnilogic.parse_xml", [])]),
+        ("omnilogic.call_api", [("omnilogic.parse_xml", [])]),
+        ("omnilogic.alarms_to_json", []),
+        ("omnilogic.telemetry_to_json", []),
+    ])
+
+    telemetry = site.children[0]
+    assert telemetry.attributes["omnilogic.method"] == "GetTelemetryData"
+    assert telemetry.attributes["omnilogic.msp_system_id"] == 1
+    assert telemetry.attributes["omnilogic.request_size"] > 0
+    assert telemetry.attributes["omnilogic.response_size"] == len(telemetry_body())
+    assert all(span.duration >= 0 for span in tracer.spans())
+    assert "omnilogic.telemetry_to_json" in tracer.format()
+
+
+def test_concurrent_calls_get_separate_trees():
+    tracer = RecordingTracer()
+    client = make_client(tracer)
+    params = {"Token": "token", "MspSystemID": 1}
+
+    async def run():
+        await asyncio.gather(
+            client.call_api("GetTelemetryData", params),
+            client.call_api("GetTelemetryData", params),
+        )
+
+    asyncio.run(run())
+
+    assert [span.name for span in tracer.roots] == ["omnilogic.call_api", "omnilogic.call_api"]
+    assert all(len(span.children) == 1 for span in tracer.roots)
+
+
+def test_opentelemetry_adapter_forwards_spans():
+    opened = []
+
+    class FakeOtelTracer:
+        @contextlib.contextmanager
+        def start_as_current_span(self, name, attributes=None):
+            opened.append((name, attributes))
+            yield RecordingTracer().span(name)
+
+    client = make_client(OpenTelemetryTracer(FakeOtelTracer()))
+    asyncio.run(client.get_site_list())
+
+    assert opened[0] == ("omnilogic.get_site_list", None)
+    assert opened[1] == ("omnilogic.call_api", {"omnilogic.method": "GetSiteList"})
+
+
+def test_no_op_by_default():
+    assert make_client().tracer is NULL_TRACER
+    asyncio.run(make_client().get_telemetry_data())
@@ -0,0 +1,64 @@
+#!/usr/bin/env python3
+"""
+Tests for connection pooling, compression and transport stats against a local HTTP server.
+"""
+
+import sys
+import os
+import asyncio
+sys.path.insert(0, os.path.dirname(__file__))
+
+from aiohttp import web
+
+from omnilogic import OmniLogic, ConnectorSettings
+from fake_hayward import site_list_body
+
+
+async def serve(body):
+    encodings = []
+
+    async def handle(request):
+        encodings.append(request.headers.get("Accept-Encoding"))
+        response = web.Response(text=body, content_type="text/xml")
+        response.enable_compression()
+        return response
+
+    app = web.Application()
+    app.router.add_post("/api", handle)
+    runner = web.AppRunner(app)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    port = runner.addresses[0][1]
+    return runner, f"http://127.0.0.1:{port}/api", encodings
+
+
+def test_compressed_responses_and_connection_reuse():
+    sites = [(site_id, f"Backyard {site_id}") for site_id in range(1, 200)]
+
+    async def run():
+        runner, url, encodings = await serve(site_list_body(sites))
+        client = OmniLogic("user", "pass", connector=ConnectorSettings(limit=4, keepalive_timeout=30))
+        client.api_url = url
+        client.token = "token"
+        client.userid = "12345"
+        try:
+            for _ in range(5):
+                client.systems = []
+                await client.get_site_list()
+        finally:
+            await client.close()
+            await runner.cleanup()
+        return client, encodings
+
+    client, encodings = asyncio.run(run())
+    stats = client.transport_stats
+
+    assert len(client.systems) == len(sites)
+    assert all("gzip" in encoding for encoding in encodings)
+    assert stats.requests == 5
+    assert stats.compressed_responses == 5
+    assert stats.bytes_received < stats.decoded_bytes
+    assert stats.compression_ratio > 2
+    assert stats.connections_created == 1
+    assert stats.reuse_rate == 0.8
@@ -9,6 +9,24 @@ sys.path.insert(0, os.path.dirname(__file__))
 
 from xml.etree.ElementTree import Element, SubElement, tostring
 
+from omnilogic import build_request_payload
+
+
+def elementtree_request(requestName, params):
+    """Reference implementation: build the request the way buildRequest always has."""
+    req = Element("Request")
+    reqName = SubElement(req, "Name")
+    reqName.text = requestName
+    paramTag = SubElement(req, "Parameters")
+
+    for k, v in params.items():
+        datatype = {int: "int", str: "string", bool: "bool"}[type(v)]
+        if str(k) != "Token":
+            param = SubElement(paramTag, "Parameter", name=k, dataType=datatype)
+            param.text = str(v)
+
+    return tostring(req)
+
 def test_buildRequest_logic():
     """Test the SetCHLORParams XML generation logic directly."""
     
@@ -81,5 +99,74 @@ def test_buildRequest_logic():
     
     print("\n✅ All verification checks passed!")
 
+def test_request_templates_match_elementtree():
+    """Compiled request templates must produce the exact bytes ElementTree does."""
+    requests = [
+        ("GetSiteList", {"Token": "abc", "UserID": "12345"}),
+        ("GetTelemetryData", {"Token": "abc", "MspSystemID": 49840}),
+        ("GetAlarmList", {"Token": "abc", "MspSystemID": 49840, "Version": "0"}),
+        ("GetMspConfigFile", {"Token": "abc", "MspSystemID": 49840, "Version": 0}),
+        ("SetUIEquipmentCmd", {
+            "Token": "abc", "MspSystemID": 49840, "Version": "0", "PoolID": 1,
+            "EquipmentID": 10, "IsOn": 100, "IsCountDownTimer": False,
+            "StartTimeHours": 0, "StartTimeMinutes": 0, "EndTimeHours": 0,
+            "EndTimeMinutes": 0, "DaysActive": 0, "Recurring": False,
+        }),
+        ("SetHeaterEnable", {"Token": "abc", "MspSystemID": 1, "HeaterID": 2, "Enabled": True}),
+        ("Escaping", {"Token": "abc", "Name": 'Pool & "Spa" <1>', "Empty": "", "Accent": "Caf\u00e9"}),
+        ("TokenOnly", {"Token": "abc"}),
+    ]
+
+    for requestName, params in requests:
+        # Render twice so the second call goes through the cached template
+        assert build_request_payload(requestName, params) == elementtree_request(requestName, params)
+        assert build_request_payload(requestName, params) == elementtree_request(requestName, params)
+
+
+def test_request_templates_reject_unknown_datatype():
+    assert build_request_payload("GetTelemetryData", {"Token": "abc", "MspSystemID": 1.5}) is None
+
+
+def test_chlor_params_template_layout():
+    """SetCHLORParams keeps its hand-built layout, parameter order and timeout defaults."""
+    params = {
+        "Token": "abc",
+        "MspSystemID": 49840,
+        "PoolID": 1,
+        "ChlorID": 10,
+        "CfgState": 3,
+        "OpMode": 1,
+        "BOWType": 0,
+        "CellType": 4,
+        "TimedPercent": 50,
+        "SCTimeout": None,
+        "ORPTimout": "",
+    }
+
+    expected = "\n".join([
+        '<?xml version="1.0" encoding="utf-8"?>',
+        '<Request>',
+        '<Name>SetCHLORParams</Name>',
+        '<Parameters>',
+        '            <Parameter name="MspSystemID" dataType="int">49840</Parameter>',
+        '            <Parameter name="PoolID" dataType="int">1</Parameter>',
+        '            <Parameter name="ChlorID" dataType="int">10</Parameter>',
+        '            <Parameter name="CfgState" dataType="byte">3</Parameter>',
+        '            <Parameter name="OpMode" dataType="byte">1</Parameter>',
+        '            <Parameter name="BOWType" dataType="byte">0</Parameter>',
+        '            <Parameter name="CellType" dataType="byte">4</Parameter>',
+        '            <Parameter name="TimedPercent" dataType="byte">50</Parameter>',
+        '            <Parameter name="SCTimeout" dataType="byte">4</Parameter>',
+        '            <Parameter name="ORPTimout" dataType="byte">4</Parameter>',
+        '</Parameters>',
+        '</Request>',
+    ]).encode()
+
+    assert build_request_payload("SetCHLORParams", params) == expected
+
+
 if __name__ == "__main__":
     test_buildRequest_logic()
+    test_request_templates_match_elementtree()
+    test_request_templates_reject_unknown_datatype()
+    test_chlor_params_template_layout()